@@ -0,0 +1,106 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Notifications/sec and requests/sec handled by the async response listener when the CSE sends each
+# notification on its own (m2m:sgn) and when it batches them (m2m:agn) with batchNotify sizes of 10 and 100.
+# The listener is served from its own process and loaded by concurrent aiohttp clients.
+#
+#   python benchmarks/BatchNotifyBenchmark.py [seconds] [concurrency]
+
+import os, sys, time, json, socket, asyncio, subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+SGN = {
+    'nev': {
+        'net': 3,
+        'rep': {'m2m:cin': {'con': {'read': {'data': [{'ts': 0, 'v': 240.1}] * 8}}, 'ri': 'cin0', 'rn': 'cin-0'}},
+    },
+    'sur': SUR,
+}
+
+
+def body(batch: int) -> bytes:
+    if batch == 1:
+        return json.dumps({'m2m:sgn': SGN}).encode('utf-8')
+    return json.dumps({'m2m:agn': {'m2m:sgn': [SGN] * batch}}).encode('utf-8')
+
+
+async def handle(notification, res):
+    notification.content
+
+
+def serve(port: int):
+    listener = AsyncResponseListenerFactory('127.0.0.1', port).get_instance()
+    listener.set_rqi_cb(SUR, handle, CallbackMode.NOTIFICATION)
+    listener.start()
+    listener.join()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int):
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+
+async def load(port: int, data: bytes, seconds: float, concurrency: int) -> int:
+    url = 'http://127.0.0.1:{}/notify'.format(port)
+    headers = {'Content-Type': 'application/json'}
+    deadline = time.monotonic() + seconds
+    handled = 0
+
+    async def client(session):
+        nonlocal handled
+        while time.monotonic() < deadline:
+            async with session.post(url, data=data, headers=headers) as response:
+                await response.read()
+                handled += response.status == 200
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+
+    return handled
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    print('{}s per run, {} concurrent clients'.format(seconds, concurrency))
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, __file__, '--serve', str(port)])
+    try:
+        wait_for(port)
+        for batch in (1, 10, 100):
+            requests = asyncio.run(load(port, body(batch), seconds, concurrency))
+            print('batch of {:3}: {:10.0f} requests/sec {:10.0f} notifications/sec'.format(
+                batch, requests / seconds, requests * batch / seconds
+            ))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(int(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,110 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Notifications/sec and latency of the async response listener with the aiohttp and the asyncio
+# (NotificationProtocol) backends.  Each backend is served with the throughput profile from its own
+# process and loaded by concurrent aiohttp clients on kept alive connections.
+#
+#   python benchmarks/ListenerBackendBenchmark.py [seconds] [concurrency]
+
+import os, sys, time, json, socket, asyncio, subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+NOTIFICATION = json.dumps({
+    'm2m:sgn': {
+        'nev': {
+            'net': 3,
+            'rep': {'m2m:cin': {'con': {'read': {'data': [{'ts': 0, 'v': 240.1}] * 8}}, 'ri': 'cin0', 'rn': 'cin-0'}},
+        },
+        'sur': SUR,
+    }
+}).encode('utf-8')
+
+BACKENDS = (AsyncResponseListenerFactory.BACKEND_AIOHTTP, AsyncResponseListenerFactory.BACKEND_ASYNCIO)
+
+
+async def ack(notification, res):
+    pass
+
+
+def serve(port: int, backend: str):
+    listener = AsyncResponseListenerFactory(
+        '127.0.0.1', port, profile=AsyncResponseListenerFactory.PROFILE_THROUGHPUT, backend=backend
+    ).get_instance()
+    listener.set_rqi_cb(SUR, ack, CallbackMode.NOTIFICATION)
+    listener.start()
+    listener.join()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int):
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+
+async def load(port: int, seconds: float, concurrency: int) -> list:
+    url = 'http://127.0.0.1:{}/notify'.format(port)
+    headers = {'Content-Type': 'application/json'}
+    deadline = time.monotonic() + seconds
+    latencies = []
+
+    async def client(session):
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            async with session.post(url, data=NOTIFICATION, headers=headers) as response:
+                await response.read()
+                if response.status == 200:
+                    latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+
+    return latencies
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    print('{}s per run, {} concurrent clients'.format(seconds, concurrency))
+
+    for backend in BACKENDS:
+        port = free_port()
+        server = subprocess.Popen([sys.executable, __file__, '--serve', str(port), backend])
+        try:
+            wait_for(port)
+            latencies = sorted(asyncio.run(load(port, seconds, concurrency)))
+            print('{:8}: {:10.0f} notifications/sec, p50 {:6.2f}ms, p99 {:6.2f}ms'.format(
+                backend,
+                len(latencies) / seconds,
+                latencies[len(latencies) // 2] * 1000,
+                latencies[int(len(latencies) * 0.99)] * 1000,
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(int(sys.argv[2]), sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,106 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Notifications/sec handled by the async response listener with the default and throughput profiles,
+# with CSE connections kept alive and with a new connection per notification.  Each profile is
+# served from its own process and loaded by concurrent aiohttp clients.
+#
+#   python benchmarks/ListenerProfileBenchmark.py [seconds] [concurrency]
+
+import os, sys, time, json, socket, asyncio, logging, subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+NOTIFICATION = json.dumps({
+    'm2m:sgn': {
+        'nev': {
+            'net': 3,
+            'rep': {'m2m:cin': {'con': {'read': {'data': [{'ts': 0, 'v': 240.1}] * 8}}, 'ri': 'cin0', 'rn': 'cin-0'}},
+        },
+        'sur': SUR,
+    }
+}).encode('utf-8')
+
+
+async def ack(raw, res):
+    pass
+
+
+def serve(port: int, profile: str):
+    # Access log lines are only written when logging is configured, as in most deployments.
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, 'w'))
+
+    listener = AsyncResponseListenerFactory('127.0.0.1', port, profile=profile).get_instance()
+    listener.set_rqi_cb(SUR, ack, CallbackMode.RAW)
+    listener.start()
+    listener.join()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int):
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+
+async def load(port: int, seconds: float, concurrency: int, keepalive: bool) -> int:
+    url = 'http://127.0.0.1:{}/notify'.format(port)
+    headers = {'Content-Type': 'application/json'}
+    deadline = time.monotonic() + seconds
+    handled = 0
+
+    async def client(session):
+        nonlocal handled
+        while time.monotonic() < deadline:
+            async with session.post(url, data=NOTIFICATION, headers=headers) as response:
+                await response.read()
+                handled += response.status == 200
+
+    connector = aiohttp.TCPConnector(limit=concurrency, force_close=not keepalive)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+
+    return handled
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    print('{}s per run, {} concurrent clients'.format(seconds, concurrency))
+
+    for profile in AsyncResponseListenerFactory.PROFILES:
+        port = free_port()
+        server = subprocess.Popen([sys.executable, __file__, '--serve', str(port), profile])
+        try:
+            wait_for(port)
+            for keepalive in (True, False):
+                handled = asyncio.run(load(port, seconds, concurrency, keepalive))
+                print('{:10} {:18}: {:10.0f} notifications/sec'.format(
+                    profile, 'kept alive' if keepalive else 'connection each', handled / seconds
+                ))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(int(sys.argv[2]), sys.argv[3])
+    else:
+        main()
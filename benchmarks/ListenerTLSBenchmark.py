@@ -0,0 +1,131 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Notifications/sec delivered over HTTPS to the async response listener by a CSE that opens a new
+# connection per notification with a full TLS handshake, one that resumes its TLS session on each new
+# connection, and one that keeps its connection alive.  The listener is served from its own process.
+#
+#   python benchmarks/ListenerTLSBenchmark.py [seconds]
+
+import os, sys, time, json, socket, ssl, subprocess, tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http.client import HTTPSConnection
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+NOTIFICATION = json.dumps({
+    'm2m:sgn': {
+        'nev': {
+            'net': 3,
+            'rep': {'m2m:cin': {'con': {'read': {'data': [{'ts': 0, 'v': 240.1}] * 8}}, 'ri': 'cin0', 'rn': 'cin-0'}},
+        },
+        'sur': SUR,
+    }
+}).encode('utf-8')
+
+HEADERS = {'Content-Type': 'application/json'}
+
+
+async def ack(notification, res):
+    pass
+
+
+def serve(port: int, certfile: str, keyfile: str):
+    listener = AsyncResponseListenerFactory(
+        '127.0.0.1',
+        port,
+        profile=AsyncResponseListenerFactory.PROFILE_THROUGHPUT,
+        ssl_context=AsyncResponseListenerFactory.ssl_context(certfile, keyfile),
+    ).get_instance()
+    listener.set_rqi_cb(SUR, ack, CallbackMode.NOTIFICATION)
+    listener.start()
+    listener.join()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int):
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+
+def post(connection: HTTPSConnection) -> bool:
+    connection.request('POST', '/notify', NOTIFICATION, HEADERS)
+    response = connection.getresponse()
+    response.read()
+    return response.status == 200
+
+
+def deliver(port: int, context: ssl.SSLContext, seconds: float, mode: str) -> int:
+    deadline = time.monotonic() + seconds
+    handled = 0
+    session = None
+    connection = None
+
+    while time.monotonic() < deadline:
+        if connection is None or mode != 'kept alive':
+            # As HTTPSConnection.connect(), but offering the previous connection's session when resuming.
+            sock = socket.create_connection(('127.0.0.1', port))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = HTTPSConnection('localhost', port, context=context)
+            connection.sock = context.wrap_socket(
+                sock, server_hostname='localhost', session=session if mode == 'resumed' else None
+            )
+            session = connection.sock.session
+
+        handled += post(connection)
+
+        if mode != 'kept alive':
+            connection.close()
+
+    return handled
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+
+    with tempfile.TemporaryDirectory() as directory:
+        certfile = os.path.join(directory, 'cert.pem')
+        keyfile = os.path.join(directory, 'key.pem')
+        subprocess.run(
+            [
+                'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                '-addext', 'subjectAltName=DNS:localhost', '-keyout', keyfile, '-out', certfile,
+            ],
+            check=True,
+            capture_output=True,
+        )
+        context = ssl.create_default_context(cafile=certfile)
+
+        print('{}s per run'.format(seconds))
+
+        port = free_port()
+        server = subprocess.Popen([sys.executable, __file__, '--serve', str(port), certfile, keyfile])
+        try:
+            wait_for(port)
+            for mode in ('full handshake', 'resumed', 'kept alive'):
+                handled = deliver(port, context, seconds, mode)
+                print('{:15}: {:10.0f} notifications/sec'.format(mode, handled / seconds))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(int(sys.argv[2]), sys.argv[3], sys.argv[4])
+    else:
+        main()
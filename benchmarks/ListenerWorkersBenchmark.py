@@ -0,0 +1,100 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Notifications/sec handled by the async response listener with 1, 2, 4 and 8 worker processes.
+# Each configuration is served from its own process and loaded by concurrent aiohttp clients.
+#
+#   python benchmarks/ListenerWorkersBenchmark.py [seconds] [concurrency]
+
+import os, sys, time, json, socket, asyncio, subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+NOTIFICATION = json.dumps({
+    'm2m:sgn': {
+        'nev': {
+            'net': 3,
+            'rep': {'m2m:cin': {'con': {'read': {'data': [{'ts': 0, 'v': 240.1}] * 8}}, 'ri': 'cin0', 'rn': 'cin-0'}},
+        },
+        'sur': SUR,
+    }
+}).encode('utf-8')
+
+
+async def ack(req, res):
+    return res
+
+
+def serve(port: int, workers: int):
+    listener = AsyncResponseListenerFactory('127.0.0.1', port, workers).get_instance()
+    listener.set_rqi_cb(SUR, ack)
+    listener.start()
+    listener.join()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int):
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+
+async def load(port: int, seconds: float, concurrency: int) -> int:
+    url = 'http://127.0.0.1:{}/notify'.format(port)
+    headers = {'Content-Type': 'application/json'}
+    deadline = time.monotonic() + seconds
+    handled = 0
+
+    async def client(session):
+        nonlocal handled
+        while time.monotonic() < deadline:
+            async with session.post(url, data=NOTIFICATION, headers=headers) as response:
+                await response.read()
+                handled += response.status == 200
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+
+    return handled
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    print('{} cpus, {}s per run, {} concurrent clients'.format(os.cpu_count(), seconds, concurrency))
+
+    for workers in (1, 2, 4, 8):
+        port = free_port()
+        server = subprocess.Popen([sys.executable, __file__, '--serve', str(port), str(workers)])
+        try:
+            wait_for(port)
+            handled = asyncio.run(load(port, seconds, concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+
+        print('{} worker(s): {:10.0f} notifications/sec'.format(workers, handled / seconds))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,88 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Short -> long name translation of a large batch of meter read notifications.
+#
+#   python benchmarks/NameTranslatorBenchmark.py [notifications]
+
+import os, sys, time, json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.onem2m.NameTranslator import NameTranslator
+
+
+def notification(i: int):
+    return {
+        'm2m:sgn': {
+            'nev': {
+                'net': 3,
+                'rep': {
+                    'm2m:cin': {
+                        'cnf': 'application/json',
+                        'con': {'read': {'rtype': 'powerQuality', 'data': [{'ts': i, 'v': 240.1}] * 8}},
+                        'cr': 'C1636064176x000015',
+                        'cs': 311,
+                        'ct': '20211105T014934',
+                        'et': '20211106T014934',
+                        'lt': '20211105T014934',
+                        'pi': 'cnt1636064176x000016',
+                        'ri': 'cin1636064176x{:06d}'.format(i),
+                        'rn': 'cin-{}'.format(i),
+                        'st': i,
+                        'ty': 4,
+                    }
+                },
+            },
+            'sur': '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001',
+        }
+    }
+
+
+def per_type_translate(value, table):
+    """Baseline: look the name up in a chain of per resource type tables, as a hand-rolled mapping would.
+    """
+    tables = (NameTranslator.RESOURCE_TYPES, NameTranslator.COMMON, NameTranslator.CONTENT_INSTANCE,
+              NameTranslator.NOTIFICATION, NameTranslator.SUBSCRIPTION, NameTranslator.EVENT_NOTIFICATION_CRITERIA)
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            name = k
+            for t in tables:
+                if k in t:
+                    name = t[k]
+                    break
+            result[name] = v if k == 'con' else per_type_translate(v, table)
+        return result
+    if isinstance(value, list):
+        return [per_type_translate(v, table) for v in value]
+    return value
+
+
+def read_two_fields(n):
+    sgn = NameTranslator.long_view(n)['m2m:notification']
+    return sgn['subscriptionReference'], sgn['notificationEvent']['representation']['m2m:contentInstance']['content']
+
+
+def bench(name, fn, batch):
+    start = time.perf_counter()
+    for n in batch:
+        fn(n)
+    elapsed = time.perf_counter() - start
+    print('{:<28} {:8.2f} us/notification'.format(name, elapsed / len(batch) * 1e6))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    batch = [notification(i) for i in range(count)]
+
+    print('{} notifications, {} bytes each'.format(count, len(json.dumps(batch[0]))))
+    bench('per type tables', lambda n: per_type_translate(n, None), batch)
+    bench('to_long (compiled)', NameTranslator.to_long, batch)
+    bench('long_view, read 2 fields', read_two_fields, batch)
+    bench('to_short(to_long)', lambda n: NameTranslator.to_short(NameTranslator.to_long(n)), batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Routing notifications with 100k registered subscriptions: exact routes, wildcard patterns and
+# references by resource ID, against a linear scan of the patterns.
+#
+#   python benchmarks/NotificationRouterBenchmark.py [routes] [lookups]
+
+import os, sys, time, random, re
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fnmatch import translate
+
+from client.ae.NotificationRouter import NotificationRouter
+from client.onem2m.ResourceAddressIndex import ResourceAddressIndex
+
+
+def cb():
+    pass
+
+
+def sur(node: int, sub: int = 1) -> str:
+    return '/PN_CSE/nod-{:015d}/metersvc/reads/sub-{:05d}'.format(node, sub)
+
+
+def bench(name, fn, references):
+    start = time.perf_counter()
+    for reference in references:
+        assert fn(reference) is not None
+    elapsed = time.perf_counter() - start
+    print('  {:<36} {:8.2f} us/lookup'.format(name, elapsed / len(references) * 1e6))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+    random.seed(1)
+    nodes = random.sample(range(10 ** 12), count)
+
+    # Exact routes, by structured path.
+    addresses = ResourceAddressIndex()
+    router = NotificationRouter(addresses)
+    start = time.perf_counter()
+    for i, node in enumerate(nodes):
+        router.add(sur(node), cb)
+        addresses.add('sub{:012d}'.format(i), sur(node))
+    print('{} exact routes added in {:.2f} s'.format(count, time.perf_counter() - start))
+
+    picked = random.choices(range(count), k=lookups)
+    bench('exact, structured', router.match, [sur(nodes[i]) for i in picked])
+    bench('exact, by resource ID', router.match, ['/PN_CSE/sub{:012d}'.format(i) for i in picked])
+
+    # Patterns: one per node, all subscriptions beneath its metersvc.
+    patterns = NotificationRouter()
+    start = time.perf_counter()
+    for node in nodes:
+        patterns.add('/PN_CSE/nod-{:015d}/metersvc/**'.format(node), cb)
+    patterns.add('/PN_CSE/nod-*/lco/*', cb)
+    print('{} patterns added in {:.2f} s'.format(count + 1, time.perf_counter() - start))
+
+    bench('pattern, trie', patterns.match, [sur(nodes[i], 7) for i in picked])
+    bench('glob, trie', patterns.match, ['/PN_CSE/nod-{:015d}/lco/sub-1'.format(nodes[i]) for i in picked])
+
+    # Baseline: scan every pattern, compiled up front.
+    linear = [(re.compile(translate('/PN_CSE/nod-{:015d}/metersvc/*'.format(node))).match, cb) for node in nodes]
+
+    def scan(reference):
+        for match, route in linear:
+            if match(reference):
+                return route
+
+    bench('pattern, linear regex scan', scan, [sur(nodes[i], 7) for i in picked[:max(1, lookups // 10000)]])
+
+
+if __name__ == '__main__':
+    main()
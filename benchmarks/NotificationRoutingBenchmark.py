@@ -0,0 +1,64 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Finding the subscription reference (sur) of a notification: decoding the whole body, as the
+# listener used to, against scanning the undecoded body with Notification.scan_sur().
+#
+#   python benchmarks/NotificationRoutingBenchmark.py [notifications]
+
+import os, sys, time, json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.onem2m.Notification import Notification
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+
+def notification(i: int, reads: int) -> bytes:
+    con = {'read': {'rtype': 'powerQuality', 'ts': i, 'te': i + 60, 'data': [{'ts': i, 'v': 240.1}] * reads}}
+    return json.dumps({
+        'm2m:sgn': {
+            'nev': {
+                'net': 3,
+                'rep': {
+                    'm2m:cin': {
+                        'cnf': 'application/json',
+                        'con': json.dumps(con),
+                        'cr': 'C1636064176x000015',
+                        'ri': 'cin1636064176x{:06d}'.format(i),
+                        'rn': 'cin-{}'.format(i),
+                        'ty': 4,
+                    }
+                },
+            },
+            'sur': SUR,
+        }
+    }).encode('utf-8')
+
+
+def decode(raw: bytes) -> str:
+    return json.loads(raw)['m2m:sgn']['sur']
+
+
+def bench(name, fn, batch):
+    start = time.perf_counter()
+    for raw in batch:
+        assert fn(raw) == SUR
+    elapsed = time.perf_counter() - start
+    print('  {:<24} {:8.2f} us/notification'.format(name, elapsed / len(batch) * 1e6))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    for reads in (1, 16, 256):
+        batch = [notification(i, reads) for i in range(count)]
+        print('{} notifications, {} bytes each'.format(count, len(batch[0])))
+        bench('json.loads', decode, batch)
+        bench('Notification.scan_sur', Notification.scan_sur, batch)
+
+
+if __name__ == '__main__':
+    main()
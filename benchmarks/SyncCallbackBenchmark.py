@@ -0,0 +1,97 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Notifications/sec and event loop lag of the async response listener when callbacks do blocking
+# work (10ms, ex. a file write or a requests call): as a coroutine function that blocks the loop,
+# and as a plain function run on the listener's thread pool.
+#
+#   python benchmarks/SyncCallbackBenchmark.py [seconds] [concurrency]
+
+import os, sys, time, json, socket, asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+NOTIFICATION = json.dumps({
+    'm2m:sgn': {'nev': {'net': 3, 'rep': {'m2m:cin': {'con': 240.1, 'ri': 'cin0'}}}, 'sur': SUR}
+}).encode('utf-8')
+
+BLOCK = 0.01
+
+
+async def blocking_coroutine(notification, res):
+    time.sleep(BLOCK)
+
+
+def blocking_function(notification, res):
+    time.sleep(BLOCK)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start(port: int, cb, sync_workers: int):
+    AsyncResponseListenerFactory.instance = None
+    listener = AsyncResponseListenerFactory('127.0.0.1', port, sync_workers=sync_workers, lag_interval=0.01).get_instance()
+    listener.set_rqi_cb(SUR, cb, CallbackMode.NOTIFICATION)
+    listener.start()
+
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return listener
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+
+async def load(port: int, seconds: float, concurrency: int) -> int:
+    url = 'http://127.0.0.1:{}/notify'.format(port)
+    headers = {'Content-Type': 'application/json'}
+    deadline = time.monotonic() + seconds
+    handled = 0
+
+    async def client(session):
+        nonlocal handled
+        while time.monotonic() < deadline:
+            async with session.post(url, data=NOTIFICATION, headers=headers) as response:
+                await response.read()
+                handled += response.status == 200
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+
+    return handled
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+    print('{}s per run, {} concurrent clients, {:.0f}ms of blocking work per callback'.format(
+        seconds, concurrency, BLOCK * 1000
+    ))
+
+    for name, cb in (('coroutine on the loop', blocking_coroutine), ('function on 32 threads', blocking_function)):
+        port = free_port()
+        listener = start(port, cb, 32)
+        handled = asyncio.run(load(port, seconds, concurrency))
+        metrics = listener.metrics()
+        listener.stop()
+
+        print('{:24}: {:8.0f} notifications/sec, max loop lag {:6.1f}ms'.format(
+            name, handled / seconds, metrics['max_loop_lag'] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
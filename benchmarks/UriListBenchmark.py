@@ -0,0 +1,68 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+#
+# Memory benchmark: a synthetic 100k node discovery result held as a plain list vs a UriList.
+#
+#   python benchmarks/UriListBenchmark.py [nodes]
+
+import os, sys, time, random, tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.onem2m.UriList import UriList
+
+
+def discovery_result(nodes: int):
+    """Decoded 'm2m:uril' list as returned by a discovery on a large CSE.  Each node contributes its node resource
+    and a few containers beneath it.
+    """
+    rng = random.Random(0)
+    uris = []
+    for imei in sorted(rng.sample(range(10 ** 14, 10 ** 15), nodes)):
+        node = '/PN_CSE/nod-0{}'.format(imei)
+        uris.append(node)
+        for container in ('metersvc', 'metersvc/reads', 'metersvc/policies'):
+            uris.append('{}/{}'.format(node, container))
+    return uris
+
+
+def measure(build):
+    """Return the built value and the memory it retains.
+    """
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    uris, list_size = measure(lambda: discovery_result(nodes))
+    uril, uril_size = measure(lambda: UriList(uris))
+
+    start = time.perf_counter()
+    UriList(uris)
+    build_time = time.perf_counter() - start
+
+    print('URIs:            {}'.format(len(uris)))
+    print('list of str:     {:8.1f} MiB'.format(list_size / 2 ** 20))
+    print('UriList:         {:8.1f} MiB ({:.1f}x smaller, built in {:.2f}s)'.format(
+        uril_size / 2 ** 20, list_size / uril_size, build_time))
+
+    indices = [random.randrange(len(uril)) for _ in range(100000)]
+    start = time.perf_counter()
+    for i in indices:
+        uril[i]
+    print('random access:   {:8.2f} us/item'.format((time.perf_counter() - start) / len(indices) * 1e6))
+
+    start = time.perf_counter()
+    for uri in uril:
+        pass
+    print('iteration:       {:8.2f} us/item'.format((time.perf_counter() - start) / len(uril) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
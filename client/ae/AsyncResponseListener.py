@@ -2,14 +2,70 @@
 
 #!/usr/bin/env python
 
-import json, asyncio, threading
+import json, asyncio, inspect, threading, multiprocessing, pickle, socket, ssl, time
 
 from aiohttp import web
+from client.ae.Backpressure import Backpressure
+from client.ae.ConnectionStats import ConnectionStats
+from client.ae.Expectation import Expectation
+from client.ae.KeyedExecutor import KeyedExecutor
+from client.ae.NotificationDeduplicator import NotificationDeduplicator
+from client.ae.NotificationRouter import NotificationRouter, Route
+from client.ae.NotificationProtocol import NotificationProtocol, NotificationResponse
+from client.ae.NotificationQueue import NotificationQueue
+from client.ae.TimerWheel import TimerWheel
+from client.Utility import Utility
+from client.onem2m.Notification import Notification
 from client.onem2m.OneM2MPrimitive import OneM2MPrimitive
+from client.onem2m.ResourceAddressIndex import ResourceAddressIndex
 
 from client.onem2m.http.OneM2MResponse import OneM2MResponse
 
-from typing import Callable, Mapping, MutableMapping, Optional
+from collections import deque
+from concurrent.futures import Executor, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple, Union, TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from client.cse.CSE import CSE
+
+
+class CallbackMode(Enum):
+    """What a callback is called with.  See set_rqi_cb().
+    """
+    # cb(req: web.Request, res: web.Response) -> web.Response
+    # The decoded notification is also available as req['notification'].
+    REQUEST      = 'request'
+    # cb(notification: Notification, res: web.Response) -> Optional[web.Response]
+    # Return None to acknowledge with X-M2M-RSC 2000.
+    NOTIFICATION = 'notification'
+    # cb(raw: bytes, res: web.Response) -> Optional[web.Response]
+    # The undecoded body, for callbacks that pass it on as is.  Return None to acknowledge with X-M2M-RSC 2000.
+    RAW          = 'raw'
+    # cb(notifications: List[Notification], res: web.Response) -> Optional[web.Response]
+    # The notifications of an aggregated notification (m2m:agn) that match the callback, in one call.  Single
+    # notifications are passed as a list of one.  Return None to acknowledge with X-M2M-RSC 2000.
+    BATCH        = 'batch'
+
+
+class _CpuBound:
+    """A callback run on the listener's process pool.  See set_rqi_cb(cpu_bound=True).
+    """
+
+    __slots__ = ('cb',)
+
+    def __init__(self, cb: Callable):
+        self.cb = cb
+
+    def __call__(self, *args):
+        return self.cb(*args)
+
+    def __getstate__(self):
+        return self.cb
+
+    def __setstate__(self, cb: Callable):
+        self.cb = cb
 
 
 class AsyncResponseListenerFactory:
@@ -19,13 +75,54 @@ class AsyncResponseListenerFactory:
     # Reference to the private inner class.
     instance = None
 
-    def __init__(self, host: str = '0.0.0.0', port: int = 8080):
+    # Server settings presets.  Options given explicitly take precedence.
+    PROFILE_DEFAULT    = 'default'
+    # For listeners receiving a high rate of notifications: uvloop when it is installed, a deeper listen
+    # backlog for bursts of new connections, no access log line per notification, CSE connections kept
+    # alive longer and request bodies capped at 256KB.
+    PROFILE_THROUGHPUT = 'throughput'
+
+    # Server implementations.
+    # aiohttp's web server.  Serves GET and POST, and callbacks get aiohttp's web.Request and web.Response.
+    BACKEND_AIOHTTP = 'aiohttp'
+    # NotificationProtocol, a minimal HTTP/1.1 server on asyncio.Protocol that only serves POST with Content-Length
+    # bodies.  Callbacks get a NotificationRequest and NotificationResponse, which implement the parts of
+    # web.Request and web.Response used for notifications.
+    BACKEND_ASYNCIO = 'asyncio'
+
+    PROFILES: Dict[str, Dict[str, Any]] = {
+        PROFILE_DEFAULT: {},
+        PROFILE_THROUGHPUT: {
+            'use_uvloop': True,
+            'backlog': 4096,
+            'access_log': False,
+            'keepalive_timeout': 300.0,
+            'max_body_size': 256 * 1024,
+        },
+    }
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8080, workers: int = 1, profile: str = PROFILE_DEFAULT, **options):
         """Initialize the singletone or return the existing instance.
+
+        Args:
+            host: Address to listen on.
+            port: Port to listen on.  0 to listen on a free port, which the listener's port is set to once it
+                is ready, see wait_ready().
+            workers: Number of worker processes.  With more than one, each worker is a forked process with its
+                own event loop, listening on the same port with SO_REUSEPORT so that the kernel spreads
+                incoming notifications across them.
+            profile: One of PROFILES, the defaults of the server options.
+            options: Passed to the listener, see __AsyncResponseListener.__init__().
+
+        Raises:
+            ValueError: If the profile is unknown.
         """
+        if profile not in self.PROFILES:
+            raise ValueError('Unknown profile {}, expected one of {}'.format(profile, list(self.PROFILES)))
 
         if AsyncResponseListenerFactory.instance is None:
             AsyncResponseListenerFactory.instance = (
-                AsyncResponseListenerFactory.__AsyncResponseListener(host, port)
+                AsyncResponseListenerFactory.__AsyncResponseListener(host, port, workers, **{**self.PROFILES[profile], **options})
             )
 
     def get_instance(self):
@@ -34,32 +131,274 @@ class AsyncResponseListenerFactory:
 
         return AsyncResponseListenerFactory.instance
 
+    @staticmethod
+    def ssl_context(
+        certfile: str,
+        keyfile: Optional[str] = None,
+        password: Optional[str] = None,
+        cafile: Optional[str] = None,
+        session_tickets: int = 2,
+    ) -> ssl.SSLContext:
+        """Return a server side SSL context for the listener's ssl_context option.
+
+        A CSE that reconnects presents a session ticket, or the ID of a session in the context's cache, and
+        resumes the earlier session instead of doing a full handshake.  Worker processes are forked after the
+        context is created and share its ticket keys, so a session resumes whichever worker accepts it.
+
+        Args:
+            certfile: PEM file with the listener's certificate, and its chain.
+            keyfile: PEM file with the private key, if it is not in certfile.
+            password: Password of the private key.
+            cafile: PEM file with the CAs that CSE client certificates must be issued by.  None to not ask
+                the CSE for a certificate.
+            session_tickets: Number of TLS 1.3 session tickets sent after a full handshake.  0 disables
+                session tickets, and sessions are then only resumed from the session cache, with TLS 1.2 and
+                after the CSE closed the earlier connection cleanly (close_notify).
+
+        Returns:
+            The SSL context.
+        """
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile, password)
+
+        if cafile is not None:
+            context.load_verify_locations(cafile)
+            context.verify_mode = ssl.CERT_REQUIRED
+
+        context.num_tickets = session_tickets
+        if session_tickets:
+            context.options &= ~ssl.OP_NO_TICKET
+        else:
+            context.options |= ssl.OP_NO_TICKET
+
+        return context
+
     class __AsyncResponseListener(threading.Thread):
         """ An async http server that runs in its own thread.
         """
 
         # Refernce to the event loop that will execute the async tasks.
-        loop = None
+        loop: Optional[asyncio.AbstractEventLoop] = None
         _stop_event = threading.Event()
 
-        # RQI to callback function map.  This is where callbacks will be stored.
-        rqi_cb_map: MutableMapping[str, Callable] = {}
         runner: Optional[web.AppRunner] = None
 
+        # Path below which each hosted AE receives its notifications, ex. /notify/meterread.  See host_ae().
+        AE_PATH = '/notify/'
+
+        # Seconds a route change waits for each worker process to acknowledge it.  See _replicate().
+        REPLICATE_TIMEOUT = 5.0
+
         # Defaults are set in the factory class constructor
-        def __init__(self, host: str, port: int):
+        def __init__(
+            self,
+            host: str,
+            port: int,
+            workers: int = 1,
+            ack_first: bool = False,
+            queue_size: int = 1000,
+            queue_workers: int = 4,
+            overflow: str = NotificationQueue.OVERFLOW_REJECT,
+            high_watermark: Optional[int] = None,
+            low_watermark: Optional[int] = None,
+            retry_after: int = 5,
+            priority_surs: Iterable[str] = (),
+            lanes: int = 0,
+            lane_size: int = 1000,
+            lane_key: Optional[Callable[[Mapping], Hashable]] = None,
+            addresses: Optional[ResourceAddressIndex] = None,
+            max_one_shot: int = 10000,
+            expiry_interval: float = 60.0,
+            cse: Optional['CSE'] = None,
+            dedupe_window: Optional[float] = None,
+            dedupe_size: int = 100000,
+            dedupe_false_positive_rate: float = 1e-9,
+            sync_workers: int = 8,
+            process_workers: int = 0,
+            lag_interval: float = 0.1,
+            expect_tick: float = 0.1,
+            use_uvloop: bool = False,
+            backlog: int = 128,
+            access_log: bool = True,
+            keepalive_timeout: float = 75.0,
+            max_body_size: int = 1024 ** 2,
+            backend: str = 'aiohttp',
+            ssl_context: Optional[ssl.SSLContext] = None,
+        ):
+            """Constructor.
+
+            Args:
+                host: Address to listen on.
+                port: Port to listen on.
+                workers: Number of worker processes, see AsyncResponseListenerFactory.
+                ack_first: Acknowledge notifications as soon as they are validated and run the callbacks
+                    afterwards from a bounded queue, rather than holding the CSE's request open until the
+                    callback returns.  The callback's response is then discarded.
+                queue_size: Maximum number of notifications waiting for a callback in ack_first mode.
+                queue_workers: Number of callbacks run concurrently in ack_first mode.
+                overflow: What to do with notifications when the queue is full, one of
+                    NotificationQueue.OVERFLOW_POLICIES.  Rejected and dropped new notifications are answered with 503.
+                high_watermark: Number of notifications being handled or queued at which the listener starts
+                    answering 503 with Retry-After, so that the CSE holds and retries them.  None to never shed.
+                low_watermark: Load at which shedding stops, see Backpressure.
+                retry_after: Seconds sent in Retry-After.
+                priority_surs: Subscription references whose notifications are never shed.
+                lanes: Run callbacks on this many ordered lanes, see KeyedExecutor.  Notifications with the same
+                    key are handled one at a time, in the order they arrived, while notifications with different
+                    keys are handled concurrently.  In ack_first mode the queue then feeds the lanes in order
+                    and queue_workers is ignored.  0 to run callbacks as notifications arrive.
+                lane_size: Maximum number of notifications waiting on each lane.
+                lane_key: Function of the decoded notification body returning its ordering key, ex.
+                    lambda body: body['m2m:sgn'].get('cr').  Defaults to the subscription reference (sur).
+                addresses: The CSE's ResourceAddressIndex (CSE.addresses), so that callbacks set for a
+                    subscription's structured path also receive notifications that reference it by resource ID.
+                max_one_shot: Maximum number of one shot callbacks, see set_rqi_cb().  The oldest are evicted.
+                expiry_interval: Seconds between removals of expired callbacks.
+                cse: The CSE that notifications retrieve the full resource from when a callback reads an
+                    attribute their representation lacks, ex. for subscriptions with nct 2 or 3.  See Notification.
+                    Also sets addresses when it is not given.
+                dedupe_window: Seconds during which a notification resent by the CSE, ex. after a timeout, is
+                    acknowledged without calling its callback again.  See NotificationDeduplicator.  None to
+                    call callbacks for every copy.
+                dedupe_size: Maximum number of notifications remembered for deduplication.
+                dedupe_false_positive_rate: Acceptable chance of suppressing a notification that is not a duplicate.
+                sync_workers: Number of threads that callbacks which are plain functions, rather than coroutine
+                    functions, run on, so that blocking work does not stall the event loop.
+                process_workers: Number of processes that cpu_bound callbacks run on, see set_rqi_cb().  Defaults
+                    to the number of CPUs.  The processes are started with forkserver, or spawn where it is not
+                    available, rather than forked from the listener's threads.
+                lag_interval: Seconds between measures of the event loop's lag, ie. how late a timer fires.
+                expect_tick: Resolution, in seconds, of the timeouts of expect().
+                use_uvloop: Run on a uvloop event loop, if uvloop is installed.
+                backlog: Listen backlog, ie. the number of connections the kernel queues before they are accepted.
+                access_log: Log a line per request to the aiohttp.access logger.
+                keepalive_timeout: Seconds an idle CSE connection is kept open for its next notification.
+                max_body_size: Largest accepted request body, in bytes.  Larger bodies are answered with 413.
+                backend: The server implementation, AsyncResponseListenerFactory.BACKEND_AIOHTTP or BACKEND_ASYNCIO.
+                ssl_context: Serve notifications over HTTPS with this server side SSL context, ex. one returned by
+                    AsyncResponseListenerFactory.ssl_context().  None to serve HTTP.
+            """
             threading.Thread.__init__(self)
             # Server host and port.
             self.host = host
             self.port = port
             self.daemon = True  # Kill thread when main exists.
+            self._stop_event = threading.Event()
+            # Set once the listener, or all of its worker processes, accept connections.
+            self._ready = threading.Event()
+
+            # Subscription reference to callback routes.  This is where callbacks will be stored.
+            self.cse = cse
+            if addresses is None and cse is not None:
+                addresses = cse.addresses
+            self.routes: NotificationRouter[Callable] = NotificationRouter(addresses, max_one_shot)
+            self.expiry_interval = expiry_interval
+
+            # Routes of the AEs hosted on the listener, by the path segment of their poa.  See host_ae().
+            self.addresses = addresses
+            self.max_one_shot = max_one_shot
+            self.hosted: Dict[str, NotificationRouter[Callable]] = {}
+
+            # Subscriptions, and subscription creators, whose verification requests are answered without
+            # calling a callback.  See expect_verification().
+            self.verifications: NotificationRouter[None] = NotificationRouter(addresses, max_one_shot)
+            self.verified_creators: Set[str] = set()
+
+            # Worker processes (workers > 1) and the pipes used to replicate callbacks registered after they
+            # have been forked.  The lock keeps callback registration and forking consistent.
+            self.workers = workers
+            self._processes: List[multiprocessing.Process] = []
+            self._pipes: List[Connection] = []
+            self._workers_lock = threading.Lock()
+            # Released by each worker once it accepts connections.
+            self._workers_ready: Any = None
+            # With port 0, a socket bound to the free port chosen for the workers, which keeps it from being reused.
+            self._reserved: Optional[socket.socket] = None
 
-        async def _init_async_response_server(self):
+            # Ordered lanes.  Started on the listener's event loop.
+            self.executor: Optional[KeyedExecutor] = None
+            self.lane_key = lane_key
+            if lanes:
+                self.executor = KeyedExecutor(lanes, lane_size)
+                # A single queue worker hands notifications to the lanes in arrival order.
+                queue_workers = 1
+
+            # Queue of acknowledged notifications (ack_first).  Started on the listener's event loop.
+            self.queue: Optional[NotificationQueue] = None
+            if ack_first:
+                self.queue = NotificationQueue(self._dispatch_queued, queue_size, queue_workers, overflow)
+
+            # Load shedding, and the number of notifications whose callbacks are running inline.
+            self.backpressure: Optional[Backpressure] = None
+            if high_watermark is not None:
+                self.backpressure = Backpressure(high_watermark, low_watermark, retry_after, priority_surs)
+            self.in_flight = 0
+            self.retry_after = retry_after
+
+            # Suppression of resent notifications.
+            self.deduplicator: Optional[NotificationDeduplicator] = None
+            if dedupe_window is not None:
+                self.deduplicator = NotificationDeduplicator(
+                    dedupe_window, max_entries=dedupe_size, false_positive_rate=dedupe_false_positive_rate
+                )
+
+            # Notifications routed on the sur found by Notification.scan_sur(), and by decoding the body.
+            self.sur_scanned = 0
+            self.sur_decoded = 0
+            # Notifications being waited for, see expect(): by subscription reference, each with the expectations in
+            # the order they were made, and by predicate.  Subscription references are matched with the routes of
+            # expectations, without callbacks, whose keys index _waiting.  Timeouts are tracked on the timer wheel.
+            self.expectations: NotificationRouter[None] = NotificationRouter(addresses, max_one_shot)
+            self._waiting: Dict[str, Deque[Expectation]] = {}
+            self._predicates: List[Tuple[Callable[[Notification], bool], Expectation]] = []
+            self._expect_lock = threading.Lock()
+            self.timers = TimerWheel(expect_tick)
+            self.expected = 0
+            self.expect_timeouts = 0
+
+            # Server settings.
+            if backend not in (AsyncResponseListenerFactory.BACKEND_AIOHTTP, AsyncResponseListenerFactory.BACKEND_ASYNCIO):
+                raise ValueError('Unknown backend {}'.format(backend))
+            self.backend = backend
+            self.server: Optional[asyncio.Server] = None
+            self.ssl_context = ssl_context
+            self.connections = ConnectionStats(ssl_context)
+            self.use_uvloop = use_uvloop
+            self.backlog = backlog
+            self.access_log = access_log
+            self.keepalive_timeout = keepalive_timeout
+            self.max_body_size = max_body_size
+
+            # Pools for callbacks that are plain functions, created on first use.
+            self.sync_workers = sync_workers
+            self.process_workers = process_workers or None
+            self._thread_pool: Optional[ThreadPoolExecutor] = None
+            self._process_pool: Optional[ProcessPoolExecutor] = None
+            # The process pool is created from the listener's thread, once the process has other threads whose
+            # locks a forked child could inherit held, so its processes are started without fork.
+            self.process_context = multiprocessing.get_context(
+                'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            )
+            self.sync_calls = 0
+
+            # Event loop lag, in seconds.
+            self.lag_interval = lag_interval
+            self.loop_lag = 0.0
+            self.max_loop_lag = 0.0
+
+            # Verification requests answered from the pre-registrations.
+            self.verified = 0
+            # Aggregated notifications (m2m:agn), the notifications split from them, and those that matched no callback.
+            self.aggregated = 0
+            self.split = 0
+            self.unrouted = 0
+
+        async def _init_async_response_server(self, reuse_port: bool = False):
             """Build the async response server.
             """
 
             # Initialize the server.
-            server = web.Application()
+            server = web.Application(client_max_size=self.max_body_size)
 
             # @todo make routes configurable via params.
             server.add_routes(
@@ -68,29 +407,268 @@ class AsyncResponseListenerFactory:
                     web.post('/', self._handler),
                     web.get('/notify', self._handler),
                     web.post('/notify', self._handler),
+                    web.post(self.AE_PATH + '{ae}', self._handler),
                 ]
             )
 
+            loop = self.loop = asyncio.get_event_loop()
+
+            asyncio.ensure_future(self._expire_routes())
+            asyncio.ensure_future(self._measure_loop_lag())
+            asyncio.ensure_future(self._expire_expectations())
+
+            if self.executor is not None:
+                self.executor.start()
+
+            if self.queue is not None:
+                self.queue.start()
+
             # Start the server.
-            if self.runner is None:
-                self.runner = web.AppRunner(server)
+            if self.backend == AsyncResponseListenerFactory.BACKEND_ASYNCIO:
+                if self.server is None:
+                    self.server = await loop.create_server(
+                        lambda: NotificationProtocol(
+                            self._handler,
+                            ('/', '/notify'),
+                            self.max_body_size,
+                            self.keepalive_timeout,
+                            self.connections,
+                            (self.AE_PATH,),
+                        ),
+                        self.host,
+                        self.port,
+                        backlog=self.backlog,
+                        reuse_port=reuse_port or None,
+                        ssl=self.ssl_context,
+                    )
+                    self.port = self.server.sockets[0].getsockname()[1]
+            elif self.runner is None:
+                options: Dict[str, Any] = {} if self.access_log else {'access_log': None}
+                self.runner = web.AppRunner(server, keepalive_timeout=self.keepalive_timeout, **options)
                 await self.runner.setup()
-                site = web.TCPSite(self.runner, self.host, self.port)
-                await site.start()
+                if self.runner.server is None:
+                    raise RuntimeError('The aiohttp runner has no server after setup')
+
+                # Serve aiohttp's server, a protocol factory, directly rather than from a TCPSite, so that its
+                # connections are counted.
+                self.server = await loop.create_server(
+                    self.connections.counted(self.runner.server),
+                    self.host,
+                    self.port,
+                    backlog=self.backlog,
+                    reuse_port=reuse_port or None,
+                    ssl=self.ssl_context,
+                )
+                self.port = self.server.sockets[0].getsockname()[1]
+
+            self._ready.set()
+
+        def start(self):
+            """Start the listener thread.  Worker processes (workers > 1) are forked here first, from the calling
+            thread, before the listener has an event loop, executors or a thread of its own for them to inherit.
+            """
+            if self.workers > 1:
+                self._fork_workers()
+
+            threading.Thread.start(self)
 
         def run(self):
             """Starts the async response server in its own thread.
             """
-            asyncio.set_event_loop(asyncio.new_event_loop())
-            loop = asyncio.get_event_loop()
+            if self.workers > 1:
+                self._join_workers()
+                return
+
+            asyncio.set_event_loop(self._new_event_loop())
+            loop = self.loop = asyncio.get_event_loop()
             loop.create_task(self._init_async_response_server())
             loop.run_forever()
+            loop.close()
+
+        def wait_ready(self, timeout: Optional[float] = None) -> bool:
+            """Wait until the listener accepts connections, after start().
+
+            Returns:
+                Whether it does, False if the timeout passed first.
+            """
+            return self._ready.wait(timeout)
+
+        def _new_event_loop(self) -> asyncio.AbstractEventLoop:
+            """Return a new event loop: a uvloop one if use_uvloop is set and uvloop is installed.
+            """
+            if self.use_uvloop:
+                try:
+                    import uvloop # type: ignore
+                    return uvloop.new_event_loop()
+                except ImportError:
+                    pass
+
+            return asyncio.new_event_loop()
+
+        def _fork_workers(self):
+            """Fork the worker processes.
+            """
+            # Fork (rather than spawn) so that workers inherit the callbacks registered so far, including
+            # closures that can not be pickled.
+            context = multiprocessing.get_context('fork')
+            self._workers_ready = context.Semaphore(0)
+
+            if self.port == 0:
+                # Every worker must listen on the same port.
+                self._reserved = socket.socket(socket.AF_INET6 if ':' in self.host else socket.AF_INET)
+                self._reserved.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                self._reserved.bind((self.host, 0))
+                self.port = self._reserved.getsockname()[1]
+
+            with self._workers_lock:
+                for _ in range(self.workers):
+                    # Duplex, so that workers acknowledge the route changes they receive.
+                    receiver, sender = context.Pipe()
+                    process = context.Process(target=self._run_worker, args=(receiver,), daemon=True)
+                    self._pipes.append(sender)
+                    process.start()
+                    receiver.close()
+                    self._processes.append(process)
+
+        def _join_workers(self):
+            """Wait for the worker processes to be ready, then to exit.
+            """
+            for _ in self._processes:
+                while not self._workers_ready.acquire(timeout=0.1):
+                    if self.stopped():
+                        return
+            self._ready.set()
+
+            for process in self._processes:
+                process.join()
+
+        def _run_worker(self, receiver: Connection):
+            """Worker process entry point.  Serves on its own event loop and SO_REUSEPORT socket.
+            """
+            # The lock was inherited held by the forking thread, which does not exist in the worker.
+            self._workers_lock = threading.Lock()
+
+            # Drop the inherited sending ends of the pipes, so the worker sees EOF when the parent exits.
+            for pipe in self._pipes:
+                pipe.close()
+            self._pipes = []
+            self._processes = []
+            if self._reserved is not None:
+                self._reserved.close()
+
+            asyncio.set_event_loop(self._new_event_loop())
+            loop = asyncio.get_event_loop()
+            loop.add_reader(receiver.fileno(), self._receive_route, receiver)
+            loop.run_until_complete(self._init_async_response_server(reuse_port=True))
+            self._workers_ready.release()
+            loop.run_forever()
+
+        def _receive_route(self, receiver: Connection):
+            """Apply a route change replicated from the parent process, and acknowledge it.  Exit when the parent
+            goes away.
+            """
+            try:
+                method, args = receiver.recv()
+            except EOFError:
+                asyncio.get_event_loop().stop()
+                return
+
+            try:
+                getattr(self, method)(*args)
+            finally:
+                receiver.send_bytes(b'')
+
+        async def _expire_routes(self):
+            """Periodically remove the expired routes.
+            """
+            while True:
+                await asyncio.sleep(self.expiry_interval)
+                self.routes.expire()
+                self.verifications.expire()
+                for router in list(self.hosted.values()):
+                    router.expire()
+
+        async def _expire_expectations(self):
+            """Fail the expectations whose timeout has passed, once per tick of the timer wheel.
+            """
+            while True:
+                await asyncio.sleep(self.timers.tick)
+                for expectation, sur in self.timers.advance():
+                    if not expectation.done():
+                        self._forget(expectation, sur)
+                        if self._settle(expectation, exception=TimeoutError('No notification within the timeout')):
+                            self.expect_timeouts += 1
 
-        def stop(self):
+        async def _measure_loop_lag(self):
+            """Periodically measure how late the event loop runs a timer, ie. how long callbacks block it.
+            """
+            loop = asyncio.get_event_loop()
+            while True:
+                start = loop.time()
+                await asyncio.sleep(self.lag_interval)
+                self.loop_lag = max(0.0, loop.time() - start - self.lag_interval)
+                self.max_loop_lag = max(self.max_loop_lag, self.loop_lag)
+
+        def stop(self, timeout: float = 10.0):
+            """Stop serving: close the server and its connections, cancel the listener's tasks, stop the event
+            loop and the worker processes, and wait for the listener thread to exit.
+
+            Args:
+                timeout: Seconds to wait for the server to close.
+            """
             print('Stopping async response server.')
             # if self.thread is not None:
             self._stop_event.set()
 
+            loop = self.loop
+            if loop is not None and not loop.is_closed():
+                try:
+                    if loop.is_running():
+                        asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+                finally:
+                    loop.call_soon_threadsafe(loop.stop)
+
+            for process in self._processes:
+                process.terminate()
+            for process in self._processes:
+                process.join()
+            for pipe in self._pipes:
+                pipe.close()
+            self._pipes = []
+            if self._reserved is not None:
+                self._reserved.close()
+
+            if self.is_alive() and threading.current_thread() is not self:
+                self.join(timeout)
+
+            for pool in (self._thread_pool, self._process_pool):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+
+        async def _shutdown(self):
+            """Close the server, then cancel the listener's tasks.  Runs on the listener's event loop.
+            """
+            if self.server is not None:
+                self.server.close()
+
+            # aiohttp's connections are closed by its runner.
+            if self.runner is not None:
+                await self.runner.cleanup()
+
+            if self.server is not None:
+                await self.server.wait_closed()
+
+            if self.queue is not None:
+                await self.queue.stop()
+
+            if self.executor is not None:
+                await self.executor.stop()
+
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
         def stopped(self):
             return self._stop_event.is_set()
 
@@ -99,33 +677,688 @@ class AsyncResponseListenerFactory:
 
         async def _handler(self, req: web.Request):
 
+            self.connections.request()
+            res = self._response()
+
+            fingerprints: List[bytes] = []
+            res = await self._handle(req, res, fingerprints)
+
+            # The CSE resends notifications that were refused, so they must not be taken for duplicates then.
+            if fingerprints and self.deduplicator is not None and getattr(res, 'status', 500) >= 500:
+                self.deduplicator.discard(fingerprints)
+
+            return res
+
+        def _response(self) -> web.Response:
+            """Return a new response for the backend.
+            """
+            if self.backend == AsyncResponseListenerFactory.BACKEND_ASYNCIO:
+                # Implements the part of web.Response that the listener and its callbacks use.
+                return cast(web.Response, NotificationResponse(content_type=OneM2MPrimitive.CONTENT_TYPE_JSON))
+
+            return web.Response(content_type=OneM2MPrimitive.CONTENT_TYPE_JSON)
+
+        @staticmethod
+        def _error(res: web.Response, status: int, rsc: Optional[str], debug: str) -> web.Response:
+            """Set an error status, with its diagnostic as the body's debugging info (m2m:dbg).  The reason phrase
+            is the status' standard one: diagnostics may hold request data, ex. the sur.
+            """
+            res.set_status(status)
+            if rsc is not None:
+                res.headers['X-M2M-RSC'] = rsc
+            res.text = json.dumps({'m2m:dbg': debug})
+
+            return res
+
+        async def _handle(self, req: web.Request, res: web.Response, fingerprints: List[bytes]) -> web.Response:
             try:
+                router = self._router_of(req.path)
+                if router is None:
+                    return self._error(res, 404, '4004', 'No AE is hosted at {}'.format(req.path))
+
                 #request_method = req.method
-                body = await req.json()
-                request_id = body['m2m:sgn']['sur']
+                # Route on the sur found without decoding the body when possible, otherwise decode the body once.
+                # Callbacks get the notification rather than decoding it again.
+                raw = await req.read()
+                notifications = self._notifications(raw)
 
-                res = web.Response(content_type=OneM2MPrimitive.CONTENT_TYPE_JSON)
+                if len(notifications) == 1 and self._expected_verification(raw, notifications[0]):
+                    self.verified += 1
+                    return self._ack(req, res)
 
-                if request_id in self.rqi_cb_map.keys():
-                    # Execute callback and pass it the req.
-                    return await self.rqi_cb_map[request_id](req, res)  # TODO: check argument types
+                if self.deduplicator is not None and notifications:
+                    notifications = self._deduplicate(self.deduplicator, notifications, fingerprints)
+                    if not notifications:
+                        return self._ack(req, res)
+
+                if len(self.expectations) or self._predicates:
+                    notifications = [n for n in notifications if not self._fulfil(n)]
+                    if not notifications:
+                        return self._ack(req, res)
+
+                req['notification'] = notifications[0] if notifications else None
+                request_id = notifications[0].sur if notifications else None
+
+                groups = self._route(notifications, router)
+
+                if not groups:
+                    # No handler has been registed for this request id.  HTTP binding of NOT_FOUND, TS-0008 6.4.
+                    self._error(res, 404, '4004', 'No response handler has been set for rqi {}'.format(request_id))
+                elif self.backpressure is not None and self.backpressure.should_shed(self.load(), request_id):
+                    return self._shed(res)
+                elif self.queue is not None:
+                    return await self._enqueue(self.queue, groups, req, res)
                 else:
-                    # No handler has been registed for this request id.
-                    res.set_status(4004, 'No response handler has been set for rqi {}'.format(request_id))
+                    # Execute callback and pass it the req.
+                    self.in_flight += len(notifications)
+                    try:
+                        if self.executor is not None:
+                            # Submit every group before waiting, so that groups on different lanes run concurrently.
+                            futures = [
+                                await self.executor.submit(self._key(batch[0]), self._dispatch, route, req, res, batch)
+                                for route, batch in groups
+                            ]
+                            results = [await future for future in futures]
+                        else:
+                            results = [await self._dispatch(route, req, res, batch) for route, batch in groups]
+                    finally:
+                        self.in_flight -= len(notifications)
+
+                    # A single notification gets its callback's response, an aggregated one is acknowledged once.
+                    if len(notifications) == 1:
+                        return results[0]
+                    return self._ack(req, res)
+            except web.HTTPException:
+                # Ex. 413 for bodies above max_body_size.
+                raise
             except Exception as err:
                 print(err)
-                res.set_status(500, str(err))
+                self._error(res, 500, None, str(err))
 
             return res
 
-        def set_rqi_cb(self, rqi: str, cb: Callable):
+        def _notifications(self, raw: bytes) -> List[Notification]:
+            """Return the notifications of a request body, splitting aggregated notifications (m2m:agn).
+            """
+            if Notification.is_aggregated(raw):
+                notifications = Notification.split(raw, self.cse)
+                self.aggregated += 1
+                self.split += len(notifications)
+                self.sur_decoded += 1
+                return notifications
+
+            sur = Notification.scan_sur(raw)
+            if sur is not None:
+                self.sur_scanned += 1
+            else:
+                self.sur_decoded += 1
+
+            return [Notification(raw, sur=sur, cse=self.cse)]
+
+        def _fulfil(self, notification: Notification) -> bool:
+            """Resolve the oldest expectation that a notification matches, if any.  Returns whether one was.
+            """
+            with self._expect_lock:
+                route = self.expectations.match(notification.sur) if len(self.expectations) else None
+                if route is not None and route.pattern is not None:
+                    waiting = self._waiting.get(route.pattern, deque())
+                    while waiting:
+                        expectation = waiting.popleft()
+                        if self._settle(expectation, notification):
+                            if not waiting:
+                                self._unwait(route.pattern)
+                            return True
+                    self._unwait(route.pattern)
+
+                for i, (predicate, expectation) in enumerate(self._predicates):
+                    if expectation.done():
+                        continue
+                    try:
+                        matched = predicate(notification)
+                    except Exception as err:
+                        self._settle(expectation, exception=err)
+                        continue
+                    if matched and self._settle(expectation, notification):
+                        del self._predicates[i]
+                        return True
+
+            return False
+
+        def _settle(self, expectation: Expectation, notification: Optional[Notification] = None, exception=None) -> bool:
+            """Resolve an expectation unless it is already done, ex. cancelled by its caller.  Returns whether it was.
+            """
+            try:
+                if exception is not None:
+                    expectation.set_exception(exception)
+                else:
+                    expectation.set_result(notification)
+            except InvalidStateError:
+                return False
+
+            return True
+
+        def _forget(self, expectation: Expectation, sur: Optional[str]):
+            """Stop tracking an expectation that timed out or was cancelled by its caller.
+            """
+            with self._expect_lock:
+                if sur is None:
+                    self._predicates = [(p, e) for p, e in self._predicates if e is not expectation]
+                    return
+
+                key = NotificationRouter.key(sur)
+                waiting = self._waiting.get(key)
+                if waiting is not None:
+                    try:
+                        waiting.remove(expectation)
+                    except ValueError:
+                        pass
+                    if not waiting:
+                        self._unwait(key)
+
+        def _unwait(self, key: str):
+            """Remove the route and expectations of a subscription reference.  Called with _expect_lock held.
+            """
+            self.expectations.remove(key)
+            self._waiting.pop(key, None)
+
+        def expect(
+            self, sur_or_predicate: Union[str, Callable[[Notification], bool]], timeout: Optional[float] = 30.0
+        ) -> Expectation:
+            """Wait for a notification, ex. a device's response to a contentInstance created on its config container.
+
+            The notification resolves the returned Expectation instead of being passed to a callback, and is
+            acknowledged with X-M2M-RSC 2000.  When several expectations match, the oldest is resolved.
+
+                expectation = listener.expect('/PN_CSE/nod-015322009906000/config/sub-00001', timeout=60)
+                cse.create_content_instance(...)
+                notification = expectation.result()     # or: notification = await expectation
+
+            Args:
+                sur_or_predicate: The subscription reference, in any form, or a pattern (see set_rqi_cb()), or a
+                    function of the Notification returning whether it is the one waited for.  References are
+                    looked up in an index, predicates are tried one by one, so prefer references.
+                timeout: Seconds after which the expectation fails with TimeoutError.  None to wait forever, or
+                    until the expectation is cancelled.
+
+            Returns:
+                A concurrent.futures.Future resolved with the Notification, which can also be awaited.
+
+            Raises:
+                InvalidAsyncResponseHandlerArgument: If the listener runs worker processes, whose notifications
+                    can not resolve a future in this process.
+            """
+            if self.workers > 1:
+                raise InvalidAsyncResponseHandlerArgument('expect() is not supported with worker processes')
+
+            expectation = Expectation()
+            sur = None
+
+            with self._expect_lock:
+                if callable(sur_or_predicate):
+                    self._predicates.append((sur_or_predicate, expectation))
+                else:
+                    sur = str(sur_or_predicate)
+                    key = NotificationRouter.key(sur)
+                    if key not in self._waiting:
+                        self.expectations.add(sur, None)
+                        self._waiting[key] = deque()
+                    self._waiting[key].append(expectation)
+                self.expected += 1
+
+            if timeout is not None:
+                self.timers.schedule(timeout, (expectation, sur))
+
+            # Resolved and timed out expectations are removed where they settle, cancelled ones once cancelled.
+            expectation.add_done_callback(lambda _: self._forget(expectation, sur) if expectation.cancelled() else None)
+
+            return expectation
+
+        def _expected_verification(self, raw: bytes, notification: Notification) -> bool:
+            """Whether a notification is a verification request that has been pre-registered.
+            """
+            if not (self.verified_creators or len(self.verifications)) or not Notification.may_be_verification(raw):
+                return False
+
+            if not notification.vrq:
+                return False
+
+            return notification.creator in self.verified_creators or self.verifications.match(notification.sur) is not None
+
+        def _deduplicate(
+            self, deduplicator: NotificationDeduplicator, notifications: List[Notification], fingerprints: List[bytes]
+        ) -> List[Notification]:
+            """Drop the notifications that have already been received.  The fingerprints of the others are
+            appended to fingerprints.
+            """
+            unique = []
+            for notification in notifications:
+                fingerprint = deduplicator.fingerprint(notification)
+                if fingerprint is None:
+                    unique.append(notification)
+                elif deduplicator.add(fingerprint):
+                    fingerprints.append(fingerprint)
+                    unique.append(notification)
+
+            return unique
+
+        def _router_of(self, path: str) -> Optional[NotificationRouter]:
+            """Return the routes of the AE that a request path belongs to, the listener's own routes for / and
+            /notify, or None if no AE is hosted at the path.
+            """
+            if path.startswith(self.AE_PATH):
+                return self.hosted.get(path[len(self.AE_PATH):])
+
+            return self.routes
+
+        def _route(
+            self, notifications: List[Notification], router: Optional[NotificationRouter] = None
+        ) -> List[Tuple[Route, List[Notification]]]:
+            """Match notifications to their routes, in router or else the listener's own routes.  Returns each
+            matched route with its notifications, in the order they were sent.  Notifications that match no
+            route are counted and dropped.
+            """
+            if router is None:
+                router = self.routes
+
+            groups: Dict[Route, List[Notification]] = {}
+            for notification in notifications:
+                route = router.match(notification.sur)
+                if route is None:
+                    self.unrouted += 1
+                else:
+                    groups.setdefault(route, []).append(notification)
+
+            return list(groups.items())
+
+        async def _dispatch(
+            self, route: Route, req: web.Request, res: web.Response, notifications: List[Notification]
+        ) -> web.Response:
+            """Run the callback of a route for its notifications: once with all of them for CallbackMode.BATCH,
+            otherwise once per notification, in order.
+            """
+            if route.mode == CallbackMode.BATCH:
+                await self._prefetch(route.cb, notifications)
+                result = await self._invoke(route.cb, notifications, res)
+                return self._ack(req, res) if result is None else result
+
+            result = None
+            for notification in notifications:
+                result = await self._call(route, req, res, notification)
+
+            return result
+
+        async def _call(self, route: Route, req: web.Request, res: web.Response, notification: Notification) -> web.Response:
+            """Run the callback of a notification, with the arguments of its CallbackMode.
+            """
+            cb = route.cb
+            mode = route.mode
+
+            if mode != CallbackMode.RAW:
+                await self._prefetch(cb, [notification])
+
+            if mode == CallbackMode.NOTIFICATION:
+                result = await self._invoke(cb, notification, res)
+                return self._ack(req, res) if result is None else result
+
+            if mode == CallbackMode.RAW:
+                result = await self._invoke(cb, notification.raw, res)
+                return self._ack(req, res) if result is None else result
+
+            # The request is shared by the notifications of an aggregated notification.
+            req['notification'] = notification
+            return await self._invoke(cb, req, res)  # TODO: check argument types
+
+        async def _prefetch(self, cb: Callable, notifications: List[Notification]):
+            """Fetch the resources sent only by ID (nct 3) off the event loop, before a coroutine callback reads
+            them on it.  Coroutine callbacks that read attributes missing from modified attributes (nct 2) await
+            Notification.fetch_async() first.  Plain function callbacks fetch on the thread pool when they read them.
+            """
+            if self.cse is None or not asyncio.iscoroutinefunction(cb):
+                return
+
+            pending = [notification for notification in notifications if notification.fetch_needed]
+            results = await asyncio.gather(*(notification.fetch_async() for notification in pending), return_exceptions=True)
+            for notification, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    print('Failed to fetch {}: {}'.format(notification.address, result))
+
+        async def _invoke(self, cb: Callable, arg: Any, res: web.Response) -> Any:
+            """Call a callback: coroutine functions on the event loop, plain functions on the thread pool and
+            cpu_bound callbacks, with arg only, on the process pool.
+            """
+            if isinstance(cb, _CpuBound):
+                self.sync_calls += 1
+                await asyncio.get_event_loop().run_in_executor(self._pool(ProcessPoolExecutor), cb.cb, arg)
+                return None
+
+            if asyncio.iscoroutinefunction(cb):
+                return await cb(arg, res)
+
+            self.sync_calls += 1
+            result = await asyncio.get_event_loop().run_in_executor(self._pool(ThreadPoolExecutor), cb, arg, res)
+            # Callable objects may still return a coroutine.
+            if inspect.isawaitable(result):
+                result = await result
+
+            return result
+
+        def _pool(self, kind: type) -> Executor:
+            """Return the thread or process pool, creating it on first use.
+            """
+            if kind is ProcessPoolExecutor:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(self.process_workers, mp_context=self.process_context)
+                return self._process_pool
+
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.sync_workers, thread_name_prefix='listener-callback')
+            return self._thread_pool
+
+        def _ack(self, req: web.Request, res: web.Response) -> web.Response:
+            """Acknowledge a notification with X-M2M-RSC 2000.
+            """
+            res.headers['X-M2M-RSC'] = '2000'
+            if 'X-M2M-RI' in req.headers:
+                res.headers['X-M2M-RI'] = req.headers['X-M2M-RI']
+
+            return res
+
+        def _key(self, notification: Notification) -> Optional[Hashable]:
+            """Return the ordering key of a notification, or None if lanes are not used.
+            """
+            if self.executor is None:
+                return None
+
+            return notification.sur if self.lane_key is None else self.lane_key(notification.body)
+
+        async def _enqueue(
+            self,
+            queue: NotificationQueue,
+            groups: List[Tuple[Route, List[Notification]]],
+            req: web.Request,
+            res: web.Response,
+        ) -> web.Response:
+            """Queue validated notifications for their callbacks and acknowledge them (ack_first).  The
+            notifications of an aggregated notification are queued, or refused, together.
+            """
+            try:
+                queued = await queue.put((groups, req))
+            except asyncio.QueueFull:
+                queued = False
+
+            if not queued:
+                # Refused or dropped (overflow drop_newest): the CSE retries it.
+                return self._shed(res, 'Notification queue is full')
+
+            return self._ack(req, res)
+
+        def _shed(self, res: web.Response, debug: str = 'Notification listener is overloaded') -> web.Response:
+            """Ask the CSE to hold the notification and retry it later.
+            """
+            res.headers['Retry-After'] = str(self.retry_after)
+
+            return self._error(res, 503, None, debug)
+
+        def load(self) -> int:
+            """Return the number of notifications being handled or waiting in the queue.
+            """
+            load = self.in_flight
+            if self.queue is not None:
+                load += len(self.queue) + self.queue.active
+                if self.executor is not None:
+                    load += len(self.executor) + self.executor.active
+
+            return load
+
+        async def _dispatch_queued(self, item):
+            """Run the callback of a queued notification.  The request body has already been read, so
+            callbacks can still call req.json().
+            """
+            groups, req = item
+            res = self._response()
+
+            for route, batch in groups:
+                if self.executor is not None:
+                    await self.executor.post(self._key(batch[0]), self._dispatch, route, req, res, batch)
+                else:
+                    await self._dispatch(route, req, res, batch)
+
+        def metrics(self) -> Dict[str, Any]:
+            """Return the listener's metrics.  With worker processes, these are the parent's and the
+            workers' own metrics are not included.
+            """
+            metrics = {
+                'in_flight': self.in_flight,
+                'load': self.load(),
+                'sur_scanned': self.sur_scanned,
+                'sur_decoded': self.sur_decoded,
+                'verified': self.verified,
+                'sync_calls': self.sync_calls,
+                'expected': self.expected,
+                'expect_timeouts': self.expect_timeouts,
+                'loop_lag': self.loop_lag,
+                'max_loop_lag': self.max_loop_lag,
+                'aggregated': self.aggregated,
+                'split': self.split,
+                'unrouted': self.unrouted,
+                'routes': self.routes.metrics(),
+                'hosted': {name: router.metrics() for name, router in self.hosted.items()},
+                'connections': self.connections.metrics(),
+            }
+
+            if self.backpressure is not None:
+                metrics['backpressure'] = self.backpressure.metrics()
+
+            if self.queue is not None:
+                metrics['queue'] = self.queue.metrics()
+
+            if self.executor is not None:
+                metrics.update(self.executor.metrics())
+
+            if self.deduplicator is not None:
+                metrics['dedupe'] = self.deduplicator.metrics()
+
+            return metrics
+
+        def set_rqi_cb(
+            self,
+            rqi: str,
+            cb: Callable,
+            mode: CallbackMode = CallbackMode.REQUEST,
+            et: Optional[str] = None,
+            ttl: Optional[float] = None,
+            one_shot: bool = False,
+            cpu_bound: bool = False,
+            ae: Optional[str] = None,
+        ):
             """Set the callback function for a specific rqi.
 
+            Callbacks may be coroutine functions, run on the listener's event loop, or plain functions, run on
+            its thread pool (see sync_workers) so that blocking work does not hold up other notifications.
+
             Args:
-                rqi (string): The request id.
+                rqi (string): The subscription reference (sur) in any form, ex. the subscription's resource ID or
+                    structured path, or a pattern such as '/PN_CSE/nod-*/metersvc/**'.  See NotificationRouter.
                 cb (function): The callback function.
+                mode (CallbackMode): What the callback is called with.  CallbackMode.NOTIFICATION callbacks get
+                    the decoded Notification instead of the aiohttp request, CallbackMode.RAW callbacks get the
+                    undecoded body, CallbackMode.BATCH callbacks get the list of notifications of an aggregated
+                    notification (m2m:agn) at once.  Other callbacks are called once per notification.
+                et (string): The subscription's expirationTime, ex. '20211106T014934'.  The callback is removed
+                    once it has passed.
+                ttl (float): Seconds until the callback is removed, if et is not given.
+                one_shot (bool): Remove the callback once it has been called, ex. for a single correlated
+                    response.  With worker processes, each worker calls it at most once.
+                cpu_bound (bool): Run the callback on the listener's process pool (see process_workers), for CPU bound
+                    work.  It is called with the notification, raw body or list of notifications only, must be
+                    picklable and importable by the pool's processes, which are not forked (ex. a module level
+                    function), and its result is discarded.  Not for CallbackMode.REQUEST.
+                ae (string): Set the callback for the notifications sent to this hosted AE's poa, see host_ae(),
+                    rather than to / or /notify.
+
+            Raises:
+                InvalidAsyncResponseHandlerArgument: If the worker processes are running and the callback
+                    can not be pickled (ex. a closure) to replicate it to them.
+                ValueError: If the pattern or et is invalid, a CallbackMode.REQUEST callback is cpu_bound, or the
+                    AE is not hosted.
+            """
+            rqi = str(rqi)  # Key must be string.
+            mode = CallbackMode(mode)
+
+            if cpu_bound:
+                if mode == CallbackMode.REQUEST:
+                    raise ValueError('CallbackMode.REQUEST callbacks can not be cpu_bound, the request can not be pickled')
+                cb = _CpuBound(cb)
+
+            # Resolve the expiry here so that every worker expires the callback at the same time.
+            expires = None
+            if et is not None:
+                expires = NotificationRouter.parse_timestamp(et)
+            elif ttl is not None:
+                expires = time.time() + ttl
+
+            self._replicate('_set_route', rqi, cb, mode, expires, one_shot, ae)
+
+        def remove_rqi_cb(self, rqi: str, ae: Optional[str] = None):
+            """Remove the callback function of a specific rqi, ex. after deleting the subscription.
+            """
+            self._replicate('_remove_route', str(rqi), ae)
+
+        def set_default_cb(self, cb: Optional[Callable], mode: CallbackMode = CallbackMode.REQUEST, ae: Optional[str] = None):
+            """Set the callback of notifications that match no other callback, or None to remove it.
+            """
+            self._replicate('_set_route', None, cb, CallbackMode(mode), None, False, ae)
+
+        def host_ae(self, name: str, host: Optional[str] = None) -> str:
+            """Host an AE on the listener, so that one listener process, with its event loop, workers, queue
+            and pools, receives the notifications of many AEs instead of each AE running its own listener.
+
+            Each hosted AE receives notifications at its own path, AE_PATH + name, and has its own callbacks,
+            set with set_rqi_cb(ae=name) and matched on the subscription reference (sur) as usual.  Register
+            the returned URL as the AE's pointOfAccess (poa), or as the nu of its subscriptions.
+
+            Args:
+                name: The path segment of the AE, ex. its resource name 'meterread'.
+                host: Host name or address the CSE reaches the listener at.  Defaults to the address
+                    listened on, or this machine's address if that is 0.0.0.0.
+
+            Returns:
+                The AE's notification URL, ex. 'http://10.0.0.5:8080/notify/meterread'.
+
+            Raises:
+                ValueError: If name is empty or contains a '/'.
             """
-            self.rqi_cb_map[str(rqi)] = cb  # Key must be string.
+            if not name or '/' in name:
+                raise ValueError('Invalid AE path segment {!r}'.format(name))
+
+            if name not in self.hosted:
+                self._replicate('_host_ae', name)
+
+            if host is None:
+                host = Utility.myIpAddress() if self.host == '0.0.0.0' else self.host
+
+            return '{}://{}:{}{}{}'.format('https' if self.ssl_context else 'http', host, self.port, self.AE_PATH, name)
+
+        def unhost_ae(self, name: str):
+            """Stop hosting an AE and remove its callbacks.  Its notifications are then answered with 404.
+            """
+            self._replicate('_unhost_ae', name)
+
+        def _host_ae(self, name: str):
+            self.hosted.setdefault(name, NotificationRouter(self.addresses, self.max_one_shot))
+
+        def _unhost_ae(self, name: str):
+            self.hosted.pop(name, None)
+
+        def _router(self, ae: Optional[str]) -> NotificationRouter:
+            """Return the routes of a hosted AE, or the listener's own routes if ae is None.
+
+            Raises:
+                ValueError: If the AE is not hosted.
+            """
+            if ae is None:
+                return self.routes
+
+            if ae not in self.hosted:
+                raise ValueError('AE {} is not hosted, see host_ae()'.format(ae))
+
+            return self.hosted[ae]
+
+        def expect_verification(self, sur: str, ttl: Optional[float] = 300.0):
+            """Answer the verification request (vrq) of a subscription about to be created with X-M2M-RSC
+            2000, without calling a callback, so that creating many subscriptions does not wait on user code.
+
+            Args:
+                sur: The subscription's address, ex. its structured path '/PN_CSE/<AE-ID>/meterread/sub-00001',
+                    or a pattern such as '/PN_CSE/nod-*/metersvc/reads/sub-00001'.  An address is answered
+                    once, a pattern until it expires.
+                ttl: Seconds until the pre-registration expires.  None to keep it until it is answered.
+
+            Raises:
+                InvalidAsyncResponseHandlerArgument: See set_rqi_cb().
+                ValueError: If the pattern is invalid.
+            """
+            expires = None if ttl is None else time.time() + ttl
+            self._replicate('_set_verification', str(sur), expires)
+
+        def accept_verifications_from(self, creator: str):
+            """Answer every verification request (vrq) of subscriptions created by creator, ex. the AE's own
+            ID (AE.ri), with X-M2M-RSC 2000, without calling a callback.  See expect_verification().
+            """
+            self._replicate('_set_verified_creator', str(creator))
+
+        def _set_verification(self, sur: str, expires: Optional[float]):
+            self.verifications.add(sur, None, expires=expires, one_shot=not NotificationRouter.is_pattern(sur))
+
+        def _set_verified_creator(self, creator: str):
+            self.verified_creators.add(creator)
+
+        def _replicate(self, method: str, *args):
+            """Apply a route change here and in every worker process.  Returns once every worker has acknowledged
+            it, or REPLICATE_TIMEOUT has passed.
+            """
+            with self._workers_lock:
+                message = None
+                if self._pipes:
+                    try:
+                        message = pickle.dumps((method, args))
+                    except (pickle.PicklingError, AttributeError, TypeError) as err:
+                        raise InvalidAsyncResponseHandlerArgument(
+                            'Callbacks set after worker processes have started must be picklable: {}'.format(err)
+                        )
+
+                # Apply locally first, so that invalid changes raise here and are not sent.
+                getattr(self, method)(*args)
+
+                if message is not None:
+                    for pipe in self._pipes:
+                        pipe.send_bytes(message)
+                    for pipe in self._pipes:
+                        try:
+                            if pipe.poll(self.REPLICATE_TIMEOUT):
+                                pipe.recv_bytes()
+                                continue
+                        except (EOFError, OSError):
+                            pass
+                        print('A worker process did not acknowledge {}'.format(method))
+
+        def _set_route(
+            self,
+            rqi: Optional[str],
+            cb: Optional[Callable],
+            mode: CallbackMode,
+            expires: Optional[float],
+            one_shot: bool,
+            ae: Optional[str] = None,
+        ):
+            router = self._router(ae)
+            if rqi is None:
+                router.set_default(cb, mode)
+            elif cb is not None:
+                router.add(rqi, cb, mode, expires, one_shot=one_shot)
+
+        def _remove_route(self, rqi: str, ae: Optional[str] = None):
+            self._router(ae).remove(rqi)
 
         def call_rqi_cb(self, rqi: str, res=None):
             """Execute the callback function for the specified rqi.
@@ -135,7 +1368,7 @@ class AsyncResponseListenerFactory:
                 res (OneM2MResponse): The response from the CSE.
             """
             if res is None:
-                self.rqi_cb_map[rqi]()
+                self.get_rqi_cb(rqi)()
             else:
                 # Enforce callback response type.
                 if not isinstance(res, OneM2MResponse):
@@ -143,19 +1376,22 @@ class AsyncResponseListenerFactory:
                         'Async response callbacks can have no argument or an argument of type OneM2MResponse'
                     )
 
-                self.rqi_cb_map[rqi](res)
+                self.get_rqi_cb(rqi)(res)
 
-        def get_rqi_cb(self, rqi: str):
+        def get_rqi_cb(self, rqi: str, ae: Optional[str] = None):
             """Return the callback function of the specified rqi.
             """
-            try:
-                return self.rqi_cb_map[rqi]
-            except KeyError as err:
+            route = self._router(ae).get(str(rqi))
+
+            if route is None:
                 # @todo create custom error.
-                print(err)
+                print(KeyError(rqi))
+                return None
+
+            return route.cb.cb if isinstance(route.cb, _CpuBound) else route.cb
 
         def __str__(self):
-            return json.dumps(self.rqi_cb_map)
+            return json.dumps(list(self.routes))
 
 
 class InvalidAsyncResponseHandlerArgument(Exception):
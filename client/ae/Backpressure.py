@@ -0,0 +1,86 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+from client.ae.NotificationRouter import NotificationRouter
+
+from typing import Any, Dict, Iterable, Optional
+
+
+class Backpressure:
+    """Decides when the listener should shed notifications so that the CSE holds and retries them.
+
+    Shedding starts when the load (notifications being handled or queued) reaches the high
+    watermark and stops once it has fallen to the low watermark, so that the listener does not
+    flip between accepting and shedding on every notification.  Notifications for priority
+    subscriptions (sur values) are never shed, whatever form the sur is given or sent in.
+    """
+
+    def __init__(
+        self,
+        high_watermark: int,
+        low_watermark: Optional[int] = None,
+        retry_after: int = 5,
+        priority: Iterable[str] = (),
+    ):
+        """Constructor.
+
+        Args:
+            high_watermark: Load at which shedding starts.
+            low_watermark: Load at which shedding stops.  Defaults to 3/4 of the high watermark.
+            retry_after: Seconds the CSE is asked to wait before retrying, sent as Retry-After.
+            priority: Subscription references (sur) that are never shed, ex. '/PN_CSE/sub-00001' or an
+                absolute URL.  Compared with the sur of notifications after NotificationRouter.key().
+
+        Raises:
+            ValueError: If the low watermark is above the high watermark.
+        """
+        if low_watermark is None:
+            low_watermark = high_watermark * 3 // 4
+
+        if low_watermark > high_watermark:
+            raise ValueError('low_watermark {} is above high_watermark {}'.format(low_watermark, high_watermark))
+
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.retry_after = retry_after
+        self.priority = {NotificationRouter.key(sur) for sur in priority}
+
+        self.shedding = False
+
+        # Counters.
+        self.shed = 0
+        self.priority_admitted = 0
+        self.episodes = 0
+
+    def should_shed(self, load: int, sur: Optional[str]) -> bool:
+        """Update the shedding state for the current load and return whether to shed a notification.
+        """
+        if self.shedding:
+            if load <= self.low_watermark:
+                self.shedding = False
+        elif load >= self.high_watermark:
+            self.shedding = True
+            self.episodes += 1
+
+        if not self.shedding:
+            return False
+
+        if sur is not None and NotificationRouter.key(sur) in self.priority:
+            self.priority_admitted += 1
+            return False
+
+        self.shed += 1
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the shedding state and counters.
+        """
+        return {
+            'shedding': self.shedding,
+            'high_watermark': self.high_watermark,
+            'low_watermark': self.low_watermark,
+            'shed': self.shed,
+            'priority_admitted': self.priority_admitted,
+            'episodes': self.episodes,
+        }
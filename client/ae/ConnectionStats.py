@@ -0,0 +1,114 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, ssl
+
+from typing import Any, Callable, Dict, Optional
+
+
+class ConnectionStats:
+    """Counts the connections a listener accepts and how well they are reused: the requests served
+    per connection and, over TLS, the handshakes that resumed an earlier session (from a session
+    ticket or the server's session cache) rather than doing a full handshake.
+    """
+
+    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None):
+        """Constructor.
+
+        Args:
+            ssl_context: The listener's server side SSL context, whose session cache statistics are included
+                in metrics().
+        """
+        self.ssl_context = ssl_context
+
+        # Counters.
+        self.accepted = 0
+        self.open = 0
+        self.requests = 0
+        self.tls = 0
+        self.resumed = 0
+
+    def opened(self, transport: asyncio.BaseTransport):
+        """Count a new connection.  Over TLS, the handshake is complete by the time a protocol's
+        connection_made() is called.
+        """
+        self.accepted += 1
+        self.open += 1
+
+        ssl_object = transport.get_extra_info('ssl_object')
+        if ssl_object is not None:
+            self.tls += 1
+            if ssl_object.session_reused:
+                self.resumed += 1
+
+    def closed(self):
+        """Count a closed connection.
+        """
+        self.open -= 1
+
+    def request(self):
+        """Count a request served.
+        """
+        self.requests += 1
+
+    def counted(self, protocol_factory: Callable[[], asyncio.Protocol]) -> Callable[[], asyncio.Protocol]:
+        """Return a protocol factory, for loop.create_server(), whose connections are counted.
+
+        Args:
+            protocol_factory: The server's protocol factory, ex. an aiohttp web.Server.
+        """
+        return lambda: _CountedProtocol(protocol_factory(), self)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the counters, the mean number of requests per connection and, over TLS, the share of
+        handshakes that were resumed and the SSL context's session statistics.
+        """
+        metrics: Dict[str, Any] = {
+            'accepted': self.accepted,
+            'open': self.open,
+            'requests': self.requests,
+            'requests_per_connection': self.requests / self.accepted if self.accepted else 0.0,
+        }
+
+        if self.ssl_context is not None:
+            metrics.update({
+                'tls': self.tls,
+                'resumed': self.resumed,
+                'full_handshakes': self.tls - self.resumed,
+                'resumption_rate': self.resumed / self.tls if self.tls else 0.0,
+                'session_stats': self.ssl_context.session_stats(),
+            })
+
+        return metrics
+
+
+class _CountedProtocol(asyncio.Protocol):
+    """Passes the events of a connection on to its protocol, counting the connection in a ConnectionStats.
+    """
+
+    __slots__ = ('protocol', 'stats')
+
+    def __init__(self, protocol: asyncio.Protocol, stats: ConnectionStats):
+        self.protocol = protocol
+        self.stats = stats
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        self.stats.opened(transport)
+        self.protocol.connection_made(transport)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.stats.closed()
+        self.protocol.connection_lost(exc)
+
+    def data_received(self, data: bytes):
+        self.protocol.data_received(data)
+
+    def eof_received(self) -> Optional[bool]:
+        return self.protocol.eof_received()
+
+    def pause_writing(self):
+        self.protocol.pause_writing()
+
+    def resume_writing(self):
+        self.protocol.resume_writing()
@@ -0,0 +1,19 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio
+
+from concurrent.futures import Future
+
+
+class Expectation(Future):
+    """A notification the listener has been asked to wait for, see expect().
+
+    Resolved with the matching Notification, or with TimeoutError.  Being a
+    concurrent.futures.Future it can be waited on from any thread with result(timeout), and it can
+    be awaited from coroutines on any event loop.
+    """
+
+    def __await__(self):
+        return asyncio.wrap_future(self).__await__()
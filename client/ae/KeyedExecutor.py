@@ -0,0 +1,122 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class KeyedExecutor:
+    """Runs coroutine functions on a fixed number of lanes, one at a time per lane, in the order
+    they were submitted.
+
+    Work is assigned to a lane by hashing its key (ex. the subscription reference), so work for one
+    key is always processed in order while work for different keys runs concurrently on the other
+    lanes.
+    """
+
+    def __init__(self, lanes: int = 4, lane_size: int = 1000):
+        """Constructor.
+
+        Args:
+            lanes: Number of lanes.
+            lane_size: Maximum number of waiting items per lane.  Submitting to a full lane waits.
+        """
+        self.lanes = lanes
+        self.lane_size = lane_size
+
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+
+        # Number of items running, and per lane counters.
+        self.active = 0
+        self.max_depth = [0] * lanes
+        self.processed = [0] * lanes
+        self.failed = [0] * lanes
+
+    def __len__(self):
+        """Number of waiting items across all lanes.
+        """
+        return sum(queue.qsize() for queue in self._queues)
+
+    def start(self):
+        """Start the lanes.  Must be called from the event loop that will run them.
+        """
+        self._queues = [asyncio.Queue(self.lane_size) for _ in range(self.lanes)]
+        self._tasks = [asyncio.ensure_future(self._work(lane)) for lane in range(self.lanes)]
+
+    async def stop(self):
+        """Cancel the lanes.  Waiting items are discarded.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def lane(self, key: Hashable) -> int:
+        """Return the lane that work for key runs on.
+        """
+        return hash(key) % self.lanes
+
+    async def submit(self, key: Hashable, fn: Callable[..., Awaitable], *args) -> asyncio.Future:
+        """Queue fn(*args) on the lane of key.
+
+        Returns:
+            A future resolved with fn's result, or its exception, once it has run.
+        """
+        future = asyncio.get_event_loop().create_future()
+        await self._put(key, fn, args, future)
+
+        return future
+
+    async def post(self, key: Hashable, fn: Callable[..., Awaitable], *args):
+        """Queue fn(*args) on the lane of key without waiting for a result.  Exceptions are counted
+        and printed.
+        """
+        await self._put(key, fn, args, None)
+
+    async def _put(self, key: Hashable, fn: Callable[..., Awaitable], args: tuple, future: Optional[asyncio.Future]):
+        lane = self.lane(key)
+        queue = self._queues[lane]
+
+        await queue.put((fn, args, future))
+        self.max_depth[lane] = max(self.max_depth[lane], queue.qsize())
+
+    async def _work(self, lane: int):
+        queue = self._queues[lane]
+
+        while True:
+            fn, args, future = await queue.get()
+
+            self.active += 1
+            try:
+                result = await fn(*args)
+            except Exception as err:
+                self.failed[lane] += 1
+                if future is None:
+                    # @todo route to a configurable error handler.
+                    print(err)
+                elif not future.cancelled():
+                    future.set_exception(err)
+            else:
+                self.processed[lane] += 1
+                if future is not None and not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.active -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the depth and counters of each lane.
+        """
+        return {
+            'lanes': [
+                {
+                    'depth': queue.qsize(),
+                    'max_depth': self.max_depth[lane],
+                    'processed': self.processed[lane],
+                    'failed': self.failed[lane],
+                }
+                for lane, queue in enumerate(self._queues)
+            ]
+        }
@@ -0,0 +1,205 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import hashlib, threading
+import requests
+
+from client.onem2m.OneM2MResource import OneM2MResource
+from client.onem2m.resource.Subscription import Subscription
+
+from typing import Any, Dict, Iterable, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from client.cse.CSE import CSE
+
+
+class ListenerPool:
+    """Spreads an AE's subscriptions across a pool of listener endpoints, so that no single listener is a
+    bottleneck or a single point of failure.
+
+    Endpoints are notification URLs, ex. 'http://10.0.0.5:8080/notify', each served by a listener (on
+    another port or host) with the same callbacks.  All of them are registered as the AE's
+    pointOfAccess (poa), which the CSE tries in turn to reach the AE.  Each subscription gets the one
+    endpoint chosen for it as its notificationURI (nu): a CSE sends a notification to every nu, so
+    listing them all would deliver each notification to every listener.
+
+    Subscriptions are assigned with rendezvous hashing: each subscription goes to the endpoint that
+    ranks highest for it.  When an endpoint is added, only the subscriptions that now rank it highest
+    move to it, and when one is removed only its own subscriptions move.  Moved subscriptions have
+    their nu updated on the CSE.
+    """
+
+    def __init__(self, cse: 'CSE', endpoints: Iterable[str] = ()):
+        """Constructor.
+
+        Args:
+            cse: The CSE that the AE is registered with, or will be, and creates its subscriptions on.
+            endpoints: Notification URLs of the listeners.
+        """
+        self.cse = cse
+        self.endpoints: List[str] = list(dict.fromkeys(endpoints))
+        # CSE relative path of each subscription to the endpoint in its nu.
+        self.subscriptions: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+        # Counters.
+        self.moved = 0
+        self.failed = 0
+
+    def poa(self) -> List[str]:
+        """Return the endpoints, for the AE's pointOfAccess (poa) when it is registered.
+        """
+        return list(self.endpoints)
+
+    def endpoint(self, path: str) -> str:
+        """Return the endpoint a subscription is assigned to.
+
+        Args:
+            path: The subscription's path relative to the CSE, ex. 'meterread/sub-00001'.
+
+        Raises:
+            ValueError: If the pool has no endpoints.
+        """
+        if not self.endpoints:
+            raise ValueError('The listener pool has no endpoints')
+
+        return max(self.endpoints, key=lambda endpoint: self._rank(endpoint, path))
+
+    @staticmethod
+    def _rank(endpoint: str, path: str) -> bytes:
+        return hashlib.blake2b('{}\0{}'.format(endpoint, path).encode('utf-8'), digest_size=8).digest()
+
+    def subscribe(self, uri: str, sub_name: str, **options):
+        """Create a subscription whose nu is the endpoint assigned to it.
+
+        Args:
+            uri: URI of the subscribed-to resource, as for CSE.create_subscription().
+            sub_name: The subscription's resource name.
+            options: Passed to CSE.create_subscription(), ex. event_types or enc.
+
+        Returns:
+            OneM2MResponse: The request response.
+
+        Raises:
+            ValueError: If the pool has no endpoints.
+        """
+        path = '{}/{}'.format(uri, sub_name)
+        with self._lock:
+            endpoint = self.endpoint(path)
+            response = self.cse.create_subscription(uri, sub_name, endpoint, **options)
+            self.subscriptions[path] = endpoint
+
+        return response
+
+    def unsubscribe(self, uri: str, sub_name: str):
+        """Delete a subscription created with subscribe().
+
+        Returns:
+            OneM2MResponse: The request response.
+        """
+        path = '{}/{}'.format(uri, sub_name)
+        with self._lock:
+            response = self.cse.delete_resource(path, with_ae=False)
+            self.subscriptions.pop(path, None)
+
+        return response
+
+    def add(self, endpoint: str) -> List[str]:
+        """Add an endpoint, register it as a poa of the AE and move the subscriptions that are now assigned
+        to it.  If the poa can not be updated, the endpoint is not added.
+
+        Returns:
+            The paths of the subscriptions moved.
+        """
+        with self._lock:
+            if endpoint in self.endpoints:
+                return []
+
+            endpoints = self.endpoints + [endpoint]
+            self._register_poa(endpoints)
+            self.endpoints = endpoints
+            return self.rebalance()
+
+    def remove(self, endpoint: str) -> List[str]:
+        """Remove an endpoint, ex. before stopping its listener, and move its subscriptions to the others.
+        If the poa can not be updated, the endpoint is kept, and subscriptions already moved stay moved.
+
+        Returns:
+            The paths of the subscriptions moved.
+
+        Raises:
+            ValueError: If it is the last endpoint and subscriptions are assigned to it.
+        """
+        with self._lock:
+            if endpoint not in self.endpoints:
+                return []
+
+            if len(self.endpoints) == 1 and self.subscriptions:
+                raise ValueError('Can not remove the last endpoint of a listener pool with subscriptions')
+
+            endpoints = self.endpoints
+            self.endpoints = [other for other in endpoints if other != endpoint]
+            # Move the subscriptions first, so that the CSE still reaches the AE while they are updated.
+            moved = self.rebalance()
+            try:
+                self._register_poa(self.endpoints)
+            except Exception:
+                self.endpoints = endpoints
+                raise
+
+            return moved
+
+    def rebalance(self) -> List[str]:
+        """Update the nu of the subscriptions whose assigned endpoint has changed.  Subscriptions whose update
+        fails keep their endpoint, and are moved by the next rebalance.
+
+        Returns:
+            The paths of the subscriptions moved.
+        """
+        moved = []
+        with self._lock:
+            for path, current in list(self.subscriptions.items()):
+                endpoint = self.endpoint(path)
+                if endpoint == current:
+                    continue
+
+                try:
+                    self.cse.update_resource(
+                        path, Subscription({Subscription.M2M_ATTR_NOTIFICATION_URI: [endpoint]}), with_ae=False
+                    )
+                except requests.exceptions.RequestException as err:
+                    print('Failed to move subscription {} to {}: {}'.format(path, endpoint, err))
+                    self.failed += 1
+                    continue
+
+                self.subscriptions[path] = endpoint
+                self.moved += 1
+                moved.append(path)
+
+        return moved
+
+    def _register_poa(self, endpoints: List[str]):
+        """Update the poa of the registered AE to endpoints.
+        """
+        ae = self.cse.ae
+        if ae is None:
+            return
+
+        poa = list(endpoints)
+        self.cse.update_resource(None, OneM2MResource(ae.SHORT_NAME, {ae.M2M_ATTR_POINT_OF_ACCESS: poa}))
+        setattr(ae, ae.M2M_ATTR_POINT_OF_ACCESS, poa)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the number of subscriptions assigned to each endpoint and the counters.
+        """
+        with self._lock:
+            assigned = {endpoint: 0 for endpoint in self.endpoints}
+            for endpoint in self.subscriptions.values():
+                assigned[endpoint] = assigned.get(endpoint, 0) + 1
+
+            return {
+                'subscriptions': assigned,
+                'moved': self.moved,
+                'failed': self.failed,
+            }
@@ -0,0 +1,139 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import hashlib, math, time
+
+from collections import deque
+from client.onem2m.Notification import Notification
+
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Set, Tuple
+
+
+class NotificationDeduplicator:
+    """Remembers the notifications received within a time window so that the copies a CSE resends
+    after a timeout can be suppressed.
+
+    A notification is identified by its subscription reference (sur), event type (net) and the ri,
+    creation time (ct) and state tag (st) of the notified resource.  Notifications without an ri,
+    ex. verification requests, are never suppressed.
+
+    Only a fixed size fingerprint of each identity is kept, in one set per slice of the window, so
+    memory is bounded by max_entries fingerprints and old slices are dropped whole as time passes.
+    The fingerprint is just wide enough for the chance that a new notification is mistaken for a
+    duplicate of any remembered one to stay below false_positive_rate.
+    """
+
+    def __init__(
+        self,
+        window: float = 300.0,
+        buckets: int = 10,
+        max_entries: int = 100000,
+        false_positive_rate: float = 1e-9,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Constructor.
+
+        Args:
+            window: Seconds a notification is remembered for.
+            buckets: Number of slices of the window.  A notification is remembered for between
+                window * (buckets - 1) / buckets and window seconds.
+            max_entries: Maximum number of notifications remembered.  When it is reached the oldest
+                slice is dropped early.
+            false_positive_rate: Acceptable chance of suppressing a notification that is not a duplicate.
+            clock: Time source, in seconds.
+
+        Raises:
+            ValueError: If an argument is out of range.
+        """
+        if window <= 0 or buckets < 1 or max_entries < 1 or not 0 < false_positive_rate < 1:
+            raise ValueError('Invalid deduplication window {}, buckets {}, max_entries {} or false_positive_rate {}'.format(
+                window, buckets, max_entries, false_positive_rate
+            ))
+
+        self.window = window
+        self.buckets = buckets
+        self.max_entries = max_entries
+        self.clock = clock
+
+        # A fingerprint collides with one of max_entries others with a chance of max_entries / 2^bits.
+        self.digest_size = min(64, max(4, math.ceil(math.log2(max_entries / false_positive_rate) / 8)))
+
+        self._span = window / buckets
+        # (slice index, fingerprints), oldest first.
+        self._buckets: Deque[Tuple[int, Set[bytes]]] = deque()
+        self._entries = 0
+
+        # Counters.
+        self.suppressed = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return self._entries
+
+    def fingerprint(self, notification: Notification) -> Optional[bytes]:
+        """Return the fingerprint of a notification, or None if it can not be identified.
+        """
+        rep = notification.rep
+        attributes = notification.attributes
+        ri = rep if isinstance(rep, str) else attributes.get('ri')
+        if ri is None:
+            return None
+
+        identity = '\0'.join(str(field) for field in (
+            notification.sur, notification.net, ri, attributes.get('ct'), attributes.get('st')
+        ))
+
+        return hashlib.blake2b(identity.encode('utf-8'), digest_size=self.digest_size).digest()
+
+    def add(self, fingerprint: bytes) -> bool:
+        """Remember a fingerprint.
+
+        Returns:
+            False if it was already remembered, ie. the notification is a duplicate.
+        """
+        self._expire()
+
+        for _, fingerprints in self._buckets:
+            if fingerprint in fingerprints:
+                self.suppressed += 1
+                return False
+
+        index = int(self.clock() // self._span)
+        if not self._buckets or self._buckets[-1][0] != index:
+            self._buckets.append((index, set()))
+        self._buckets[-1][1].add(fingerprint)
+        self._entries += 1
+
+        while self._entries > self.max_entries:
+            _, fingerprints = self._buckets.popleft()
+            self._entries -= len(fingerprints)
+            self.evicted += len(fingerprints)
+
+        return True
+
+    def discard(self, fingerprints: Iterable[bytes]):
+        """Forget fingerprints, ex. of notifications that were refused and will be resent.
+        """
+        for fingerprint in fingerprints:
+            for _, bucket in self._buckets:
+                if fingerprint in bucket:
+                    bucket.remove(fingerprint)
+                    self._entries -= 1
+                    break
+
+    def _expire(self):
+        oldest = int(self.clock() // self._span) - self.buckets + 1
+        while self._buckets and self._buckets[0][0] < oldest:
+            _, fingerprints = self._buckets.popleft()
+            self._entries -= len(fingerprints)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the number of remembered notifications and the counters.
+        """
+        return {
+            'entries': self._entries,
+            'fingerprint_bits': self.digest_size * 8,
+            'suppressed': self.suppressed,
+            'evicted': self.evicted,
+        }
@@ -0,0 +1,335 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, json
+
+from client.ae.ConnectionStats import ConnectionStats
+from collections import deque
+from http import HTTPStatus
+from multidict import CIMultiDict
+
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Tuple, cast
+
+
+class NotificationRequest:
+    """A request received by NotificationProtocol.  Implements the part of aiohttp's web.Request that
+    the listener and its callbacks use: method, path, headers, read(), text(), json() and item access
+    to per request values, ex. req['notification'].
+    """
+
+    __slots__ = ('method', 'path', 'version', 'headers', '_body', '_values')
+
+    def __init__(self, method: str, path: str, version: str, headers: 'CIMultiDict[str]', body: bytes):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self._body = body
+        self._values: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __setitem__(self, key: str, value: Any):
+        self._values[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode('utf-8')
+
+    async def json(self) -> Any:
+        return json.loads(self._body)
+
+
+class NotificationResponse:
+    """A response sent by NotificationProtocol.  Implements the part of aiohttp's web.Response that the
+    listener and its callbacks use: status, reason, headers, set_status(), body and text.
+    """
+
+    __slots__ = ('status', 'reason', 'headers', 'body')
+
+    def __init__(self, status: int = 200, reason: Optional[str] = None, content_type: Optional[str] = None):
+        self.status = status
+        self.reason = reason
+        self.headers: CIMultiDict[str] = CIMultiDict()
+        if content_type is not None:
+            self.headers['Content-Type'] = content_type
+        self.body = b''
+
+    def set_status(self, status: int, reason: Optional[str] = None):
+        self.status = status
+        self.reason = reason
+
+    @property
+    def text(self) -> str:
+        return self.body.decode('utf-8')
+
+    @text.setter
+    def text(self, text: str):
+        self.body = text.encode('utf-8')
+
+
+class NotificationProtocol(asyncio.Protocol):
+    """Minimal HTTP/1.1 server for notifications, built directly on asyncio.Protocol.
+
+    Supports only what a CSE uses to deliver notifications: POST requests to a fixed set of paths, or
+    below a set of path prefixes, bodies sent with Content-Length, keep-alive and pipelining.  Anything else is answered with an
+    error and, when the rest of the stream can not be parsed, the connection is closed:
+
+        404     other paths
+        405     other methods
+        411     POST without Content-Length
+        413     bodies above max_body_size
+        431     request lines and headers above MAX_HEAD_SIZE
+        501     Transfer-Encoding (ex. chunked)
+        400     malformed requests, ex. a header line without a colon or a Content-Length that is repeated
+                or not a number
+
+    Requests on a connection are handled one at a time and answered in order.  Responses may be any
+    object with status, reason, headers and body, ex. a NotificationResponse or an aiohttp
+    web.Response.  A response whose reason or headers hold a CR or LF, which would split it, or characters
+    that are not latin-1 is replaced with a 500.
+    """
+
+    # Longest accepted request line and headers.
+    MAX_HEAD_SIZE = 16 * 1024
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        paths: Iterable[str] = ('/', '/notify'),
+        max_body_size: int = 1024 ** 2,
+        keepalive_timeout: float = 75.0,
+        connections: Optional[ConnectionStats] = None,
+        prefixes: Iterable[str] = (),
+    ):
+        """Constructor.
+
+        Args:
+            handler: Coroutine function called with each request, returning its response.  Requests are
+                NotificationRequests, which implement the part of aiohttp's web.Request that handlers use.
+            paths: Paths that notifications are accepted on.
+            max_body_size: Largest accepted body, in bytes.
+            keepalive_timeout: Seconds an idle connection is kept open.
+            connections: Statistics shared by the connections of a server.
+            prefixes: Prefixes of other paths that notifications are accepted on, ex. '/notify/' for
+                '/notify/meterread'.
+        """
+        self.handler = handler
+        self.paths = paths if isinstance(paths, (set, frozenset)) else frozenset(paths)
+        self.max_body_size = max_body_size
+        self.keepalive_timeout = keepalive_timeout
+        self.connections = connections if connections is not None else ConnectionStats()
+        self.prefixes = tuple(prefixes)
+
+        self.transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray()
+        self._pending: Deque[Tuple[Optional[NotificationRequest], Optional[Tuple[int, bool]]]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._idle: Optional[asyncio.TimerHandle] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        # Servers' connections have full transports.
+        self.transport = cast(asyncio.Transport, transport)
+        self.connections.opened(transport)
+        self._reset_idle()
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.connections.closed()
+        self._closing = True
+        if self._idle is not None:
+            self._idle.cancel()
+        if self._task is not None:
+            self._task.cancel()
+
+    def data_received(self, data: bytes):
+        if self._closing:
+            return
+
+        self._buffer += data
+        self._reset_idle()
+
+        while self._buffer and not self._closing:
+            if not self._parse():
+                break
+
+        if self._pending and self._task is None:
+            self._task = asyncio.ensure_future(self._respond())
+
+    def _parse(self) -> bool:
+        """Move one complete request from the buffer to the pending requests.  Returns False if the
+        buffer does not hold a complete request yet.
+        """
+        buffer = self._buffer
+        end = buffer.find(b'\r\n\r\n')
+        if end < 0:
+            if len(buffer) > self.MAX_HEAD_SIZE:
+                self._fail(431, close=True)
+            return False
+
+        try:
+            head = bytes(buffer[:end]).decode('latin-1')
+            lines = head.split('\r\n')
+            method, path, version = lines[0].split(' ')
+            headers: CIMultiDict[str] = CIMultiDict()
+            for line in lines[1:]:
+                name, colon, value = line.partition(':')
+                if not colon or not name or name != name.strip():
+                    raise ValueError('Malformed header line')
+                headers.add(name, value.strip())
+        except ValueError:
+            self._fail(400, close=True)
+            return False
+
+        if 'Transfer-Encoding' in headers:
+            self._fail(501, close=True)
+            return False
+
+        lengths = headers.getall('Content-Length', [])
+        if not lengths:
+            if method == 'POST':
+                self._fail(411, close=True)
+                return False
+            length = 0
+        elif len(lengths) > 1 or not (lengths[0].isascii() and lengths[0].isdigit()):
+            # Requests smuggled past a proxy that reads another Content-Length, or a negative one.
+            self._fail(400, close=True)
+            return False
+        else:
+            length = int(lengths[0])
+
+        if length > self.max_body_size:
+            self._fail(413, close=True)
+            return False
+
+        start = end + 4
+        if len(buffer) < start + length:
+            return False
+
+        body = bytes(buffer[start:start + length])
+        del buffer[:start + length]
+
+        request = NotificationRequest(method, path.split('?', 1)[0], version, headers, body)
+        if request.path not in self.paths and not (self.prefixes and request.path.startswith(self.prefixes)):
+            self._pending.append((None, (404, False)))
+        elif method != 'POST':
+            self._pending.append((None, (405, False)))
+        else:
+            self._pending.append((request, None))
+
+        return True
+
+    def _fail(self, status: int, close: bool):
+        """Answer the request being parsed with an error, after the requests before it.
+        """
+        self._pending.append((None, (status, close)))
+        self._buffer.clear()
+        self._closing = close
+
+    def _reset_idle(self):
+        if self._idle is not None:
+            self._idle.cancel()
+        self._idle = asyncio.get_event_loop().call_later(self.keepalive_timeout, self._close_idle)
+
+    def _close_idle(self):
+        if self._task is None and self.transport is not None:
+            self.transport.close()
+        else:
+            self._reset_idle()
+
+    def _close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    async def _respond(self):
+        """Handle the pending requests in order and write their responses.
+        """
+        try:
+            while self._pending:
+                request, error = self._pending.popleft()
+
+                if error is not None:
+                    status, close = error
+                    self._write(NotificationResponse(status), close=close)
+                    if close:
+                        self._close()
+                        return
+                    continue
+
+                try:
+                    response = await self.handler(request)
+                except Exception as err:
+                    print(err)
+                    response = NotificationResponse(500)
+
+                keep_alive = self._keep_alive(request)
+                self._write(response, close=not keep_alive)
+                if not keep_alive:
+                    self._close()
+                    return
+        finally:
+            self._task = None
+
+    @staticmethod
+    def _keep_alive(request: NotificationRequest) -> bool:
+        connection = request.headers.get('Connection', '').lower()
+        if request.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+
+        return connection != 'close'
+
+    def _write(self, response: Any, close: bool = False):
+        status = response.status
+        reason = response.reason
+        if reason is None:
+            try:
+                reason = HTTPStatus(status).phrase
+            except ValueError:
+                reason = ''
+
+        body = response.body
+        if body is None:
+            body = b''
+        elif not isinstance(body, (bytes, bytearray)):
+            body = str(body).encode('utf-8')
+
+        try:
+            lines = ['HTTP/1.1 {} {}'.format(status, self._field(reason))]
+            for name, value in response.headers.items():
+                if name.lower() not in ('content-length', 'connection'):
+                    lines.append('{}: {}'.format(self._field(name), self._field(value)))
+            lines.append('Content-Length: {}'.format(len(body)))
+            if close:
+                lines.append('Connection: close')
+            head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        except ValueError as err:
+            # Including UnicodeEncodeError.
+            print(err)
+            self._write(NotificationResponse(500), close)
+            return
+
+        if self.transport is not None:
+            self.transport.write(head + body)
+
+    @staticmethod
+    def _field(text: Any) -> str:
+        """Return the text of a status line or header field.
+
+        Raises:
+            ValueError: If it holds a CR or LF, which would split the response.
+        """
+        text = str(text)
+        if '\r' in text or '\n' in text:
+            raise ValueError('Response field holds a CR or LF: {!r}'.format(text))
+
+        return text
@@ -0,0 +1,175 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, time
+
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class NotificationQueue:
+    """Bounded queue of notifications consumed by a pool of worker tasks on the listener's event loop.
+
+    Lets the listener acknowledge a notification as soon as it has been validated and process it
+    afterwards, so that slow callbacks do not hold the CSE's request open.  What happens when the
+    queue is full is set by the overflow policy:
+
+        OVERFLOW_REJECT         the notification is refused; put() raises asyncio.QueueFull
+        OVERFLOW_BLOCK          put() waits for room, holding the CSE's request open
+        OVERFLOW_DROP_OLDEST    the oldest queued notification is discarded to make room
+        OVERFLOW_DROP_NEWEST    the new notification is discarded; put() returns False
+    """
+
+    OVERFLOW_REJECT      = 'reject'
+    OVERFLOW_BLOCK       = 'block'
+    OVERFLOW_DROP_OLDEST = 'drop_oldest'
+    OVERFLOW_DROP_NEWEST = 'drop_newest'
+
+    OVERFLOW_POLICIES = (OVERFLOW_REJECT, OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable],
+        maxsize: int = 1000,
+        workers: int = 4,
+        overflow: str = OVERFLOW_REJECT,
+    ):
+        """Constructor.
+
+        Args:
+            handler: Coroutine function called with each queued item.
+            maxsize: Maximum number of queued items.
+            workers: Number of items processed concurrently.
+            overflow: One of OVERFLOW_POLICIES.
+
+        Raises:
+            ValueError: If the overflow policy is unknown.
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError('Unknown overflow policy {}, expected one of {}'.format(overflow, self.OVERFLOW_POLICIES))
+
+        self.handler = handler
+        self.maxsize = maxsize
+        self.workers = workers
+        self.overflow = overflow
+
+        # (enqueued at as time.monotonic(), item)
+        self._items: deque = deque()
+        # Created by start(), on the event loop that uses them.  Items put wake one worker, items taken one
+        # put() waiting for room (OVERFLOW_BLOCK).  Both share a lock.
+        self._not_empty: Optional[asyncio.Condition] = None
+        self._not_full: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Counters.
+        self.enqueued = 0
+        self.active = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def __len__(self):
+        return len(self._items)
+
+    def start(self):
+        """Start the workers.  Must be called from the event loop that will run them.
+        """
+        lock = asyncio.Lock()
+        self._not_empty = asyncio.Condition(lock)
+        self._not_full = asyncio.Condition(lock)
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers.  Items still queued are discarded.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def put(self, item: Any) -> bool:
+        """Queue an item.
+
+        Returns:
+            True if the item was queued, False if it was discarded (OVERFLOW_DROP_NEWEST).
+
+        Raises:
+            asyncio.QueueFull: If the queue is full and the policy is OVERFLOW_REJECT.
+        """
+        not_empty, not_full = self._conditions()
+        async with not_empty:
+            if len(self._items) >= self.maxsize:
+                if self.overflow == self.OVERFLOW_REJECT:
+                    self.rejected += 1
+                    raise asyncio.QueueFull()
+                elif self.overflow == self.OVERFLOW_DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                elif self.overflow == self.OVERFLOW_DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    await not_full.wait_for(lambda: len(self._items) < self.maxsize)
+
+            self._items.append((time.monotonic(), item))
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            not_empty.notify()
+
+        return True
+
+    def _conditions(self) -> Tuple[asyncio.Condition, asyncio.Condition]:
+        if self._not_empty is None or self._not_full is None:
+            raise RuntimeError('The queue has not been started')
+
+        return self._not_empty, self._not_full
+
+    async def _work(self):
+        not_empty, not_full = self._conditions()
+        while True:
+            async with not_empty:
+                await not_empty.wait_for(lambda: self._items)
+                enqueued_at, item = self._items.popleft()
+                not_full.notify()
+
+            self.last_wait = time.monotonic() - enqueued_at
+            self.max_wait = max(self.max_wait, self.last_wait)
+
+            self.active += 1
+            try:
+                await self.handler(item)
+            except Exception as err:
+                # @todo route to a configurable error handler.
+                print(err)
+                self.failed += 1
+            else:
+                self.processed += 1
+            finally:
+                self.active -= 1
+
+    def oldest_age(self) -> float:
+        """Seconds the oldest queued item has been waiting, or 0.0 if the queue is empty.
+        """
+        return time.monotonic() - self._items[0][0] if self._items else 0.0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue depth, age and counters.
+        """
+        return {
+            'depth': len(self._items),
+            'active': self.active,
+            'max_depth': self.max_depth,
+            'oldest_age': self.oldest_age(),
+            'last_wait': self.last_wait,
+            'max_wait': self.max_wait,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,432 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import heapq, threading, time
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar, Union
+
+from client.onem2m.ResourceAddressIndex import ResourceAddressIndex
+
+# What a router's routes lead to: a callback, or None for routes that are only matched.
+C = TypeVar('C')
+
+
+class Route(Generic[C]):
+    """A callback registered with a NotificationRouter, or None in a router whose routes are only matched.
+    """
+
+    __slots__ = ('pattern', 'cb', 'mode', 'expires', 'one_shot')
+
+    def __init__(
+        self, pattern: Optional[str], cb: C, mode: Any = None, expires: Optional[float] = None, one_shot: bool = False
+    ):
+        self.pattern = pattern
+        self.cb = cb
+        self.mode = mode
+        # Expiry as time.time(), or None.
+        self.expires = expires
+        self.one_shot = one_shot
+
+    def expired(self, now: float) -> bool:
+        return self.expires is not None and self.expires <= now
+
+    def __repr__(self):
+        return 'Route({!r})'.format(self.pattern)
+
+
+class _Node:
+    """Segment trie node.  deep is the route of a pattern ending in '**' at this node.
+    """
+
+    __slots__ = ('children', 'globs', 'route', 'deep')
+
+    def __init__(self) -> None:
+        self.children: Dict[str, '_Node'] = {}
+        self.globs: List[Tuple[str, '_Node']] = []
+        self.route: Optional[Route[Any]] = None
+        self.deep: Optional[Route[Any]] = None
+
+    def empty(self) -> bool:
+        return not (self.children or self.globs or self.route or self.deep)
+
+
+class NotificationRouter(Generic[C]):
+    """Routes notifications to callbacks on their subscription reference (sur).
+
+    Subscription references come in several forms (/PN_CSE/sub-00001 by resource ID, the structured
+    path, with or without scheme and host, SP-relative ~/...), so routes and references are
+    normalized to one key, see key().  Exact routes are found with a single dict lookup.  Patterns
+    are matched segment by segment with a trie:
+
+        /PN_CSE/nod-*/metersvc/reads/sub-00001  '*' and other glob characters match within a segment
+        /PN_CSE/*/metersvc/**                   a final '**' matches any number of segments beneath
+
+    The most specific route wins: exact routes first, then patterns compared segment by segment
+    from the left, literal segments before glob segments before '*' before '**'.  The default route,
+    if set, receives everything else.
+
+    When given the CSE's ResourceAddressIndex, references by resource ID also match routes
+    registered by structured path and vice versa.
+
+    Routes can expire, ex. with the subscription's expirationTime (et), and are then dropped on the
+    next match or expire().  One shot routes are removed once matched; they are kept apart from the
+    other routes and only the max_one_shot most recently added are kept, so that correlations that
+    are never answered do not accumulate.
+    """
+
+    WILDCARD = '*'
+    DEEP = '**'
+
+    # oneM2M timestamp format, ex. '20211106T014934'.  TS-0004 6.3.3.
+    M2M_TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S'
+
+    def __init__(self, addresses: Optional[ResourceAddressIndex] = None, max_one_shot: int = 10000):
+        """Constructor.
+
+        Args:
+            addresses: Index used to translate between resource IDs and structured paths.
+            max_one_shot: Maximum number of one shot routes.  The least recently added are evicted.
+        """
+        self.addresses = addresses
+        self.max_one_shot = max_one_shot
+        self.default: Optional[Route[C]] = None
+
+        self._exact: Dict[str, Route[C]] = {}
+        self._patterns: Dict[str, Route[C]] = {}
+        self._one_shot: 'OrderedDict[str, Route[C]]' = OrderedDict()
+        self._trie = _Node()
+        # (expires, key) of the routes that expire.  Entries of replaced or removed routes are skipped.
+        self._expiries: List[Tuple[float, str]] = []
+
+        # Counters.
+        self.expired = 0
+        self.evicted = 0
+        self.removed = 0
+        # Routes are added from the caller's thread and matched on the listener's, so writes are serialized
+        # and never leave a partially built node or list visible to readers.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._exact) + len(self._patterns) + len(self._one_shot)
+
+    def __contains__(self, pattern: str) -> bool:
+        return self.get(pattern) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._exact)
+        yield from list(self._patterns)
+        yield from list(self._one_shot)
+
+    @classmethod
+    def is_pattern(cls, pattern: str) -> bool:
+        """Whether a route is matched with the trie rather than exactly.
+        """
+        return any(c in pattern for c in '*?[')
+
+    @staticmethod
+    def key(address: str) -> str:
+        """Return the key a route or reference is stored and looked up under.
+
+        Addresses are normalized with ResourceAddressIndex.normalize() and unstructured SP-relative
+        addresses (/PN_CSE/<ri>) are reduced to the resource ID.
+        """
+        address = ResourceAddressIndex.normalize(address)
+
+        if address.startswith('/') and not NotificationRouter.is_pattern(address):
+            segments = address[1:].split('/')
+            if len(segments) == 2 and segments[0] != '~':
+                return segments[1]
+
+        return address
+
+    @classmethod
+    def parse_timestamp(cls, timestamp: str) -> float:
+        """Convert a oneM2M timestamp, ex. an expirationTime (et) of '20211106T014934', to time.time().
+
+        Raises:
+            ValueError: If the timestamp is not valid.
+        """
+        # Fractional seconds, ex. '20211106T014934,123', are ignored.
+        parsed = datetime.strptime(timestamp[:15], cls.M2M_TIMESTAMP_FORMAT)
+
+        return parsed.replace(tzinfo=timezone.utc).timestamp()
+
+    def add(
+        self,
+        pattern: str,
+        cb: C,
+        mode: Any = None,
+        expires: Union[str, float, None] = None,
+        ttl: Optional[float] = None,
+        one_shot: bool = False,
+    ) -> Route[C]:
+        """Add or replace a route.
+
+        Args:
+            pattern: The subscription reference or pattern.
+            cb: The callback.
+            mode: Passed on with the route.
+            expires: When the route expires, as a oneM2M timestamp (ex. the subscription's et) or time.time().
+            ttl: Seconds until the route expires, if expires is not given.
+            one_shot: Remove the route once it has been matched.  Patterns can not be one shot.
+
+        Raises:
+            ValueError: If '**' is not the last segment of the pattern, a pattern is one shot or expires is
+                not a valid timestamp.
+        """
+        key = self.key(pattern)
+
+        if isinstance(expires, str):
+            expires = self.parse_timestamp(expires)
+        elif expires is None and ttl is not None:
+            expires = time.time() + ttl
+
+        route = Route(key, cb, mode, expires, one_shot)
+
+        if expires is not None:
+            with self._lock:
+                heapq.heappush(self._expiries, (expires, key))
+            self._compact_expiries()
+
+        if one_shot:
+            if self.is_pattern(key):
+                raise ValueError('Patterns can not be one shot: {}'.format(pattern))
+            with self._lock:
+                self._one_shot[key] = route
+                self._one_shot.move_to_end(key)
+                while len(self._one_shot) > self.max_one_shot:
+                    self._one_shot.popitem(last=False)
+                    self.evicted += 1
+            return route
+
+        if not self.is_pattern(key):
+            self._exact[key] = route
+            return route
+
+        segments = self._segments(key)
+        if self.DEEP in segments[:-1]:
+            raise ValueError('"{}" may only be the last segment of a pattern: {}'.format(self.DEEP, pattern))
+
+        with self._lock:
+            node = self._trie
+            for segment in segments:
+                if segment == self.DEEP:
+                    break
+                if self.is_pattern(segment):
+                    child = next((n for p, n in node.globs if p == segment), None)
+                    if child is None:
+                        child = _Node()
+                        # Wildcards are tried after the more specific globs.
+                        globs = node.globs + [(segment, child)]
+                        globs.sort(key=lambda glob: glob[0] == self.WILDCARD)
+                        node.globs = globs
+                else:
+                    child = node.children.get(segment)
+                    if child is None:
+                        child = node.children[segment] = _Node()
+                node = child
+
+            if segments[-1] == self.DEEP:
+                node.deep = route
+            else:
+                node.route = route
+            self._patterns[key] = route
+
+        return route
+
+    def remove(self, pattern: str) -> Optional[Route[C]]:
+        """Remove a route.  Returns the removed route, or None if there was none.
+        """
+        route = self._discard(self.key(pattern))
+
+        if route is not None:
+            self.removed += 1
+            self._compact_expiries()
+
+        return route
+
+    def _compact_expiries(self):
+        """Drop the expiry entries of replaced, removed or evicted routes once they outnumber the live ones.
+        """
+        if len(self._expiries) <= 2 * len(self) + 64:
+            return
+
+        with self._lock:
+            routes = (self._exact, self._patterns, self._one_shot)
+            live = [
+                (expires, key) for expires, key in self._expiries
+                if any(key in r and r[key].expires == expires for r in routes)
+            ]
+            heapq.heapify(live)
+            self._expiries = live
+
+    def _discard(self, key: str, route: Optional[Route[C]] = None) -> Optional[Route[C]]:
+        """Remove the route stored under key, or only route if it is given and still stored under key.
+        """
+        if self.is_pattern(key):
+            with self._lock:
+                if route is not None and self._patterns.get(key) is not route:
+                    return None
+                route = self._patterns.pop(key, None)
+                if route is not None:
+                    self._remove(self._trie, self._segments(key), 0)
+            return route
+
+        with self._lock:
+            for routes in (self._exact, self._one_shot):
+                if route is None or routes.get(key) is route:
+                    found = routes.pop(key, None)
+                    if found is not None:
+                        return found
+
+        return None
+
+    def _remove(self, node: _Node, segments: List[str], i: int):
+        """Clear the route at the end of segments, and prune the nodes left empty.
+        """
+        segment = segments[i]
+
+        if segment == self.DEEP:
+            node.deep = None
+            return
+
+        if self.is_pattern(segment):
+            child = next((n for p, n in node.globs if p == segment), None)
+        else:
+            child = node.children.get(segment)
+        if child is None:
+            return
+
+        if i == len(segments) - 1:
+            child.route = None
+        else:
+            self._remove(child, segments, i + 1)
+
+        if child.empty():
+            if self.is_pattern(segment):
+                node.globs = [(p, n) for p, n in node.globs if p != segment]
+            else:
+                del node.children[segment]
+
+    def set_default(self, cb: Optional[C], mode: Any = None):
+        """Set the route of notifications that match no other route, or None to remove it.
+        """
+        self.default = None if cb is None else Route(None, cb, mode)
+
+    def get(self, pattern: str) -> Optional[Route[C]]:
+        """Return the route registered for pattern, without matching.
+        """
+        key = self.key(pattern)
+
+        if self.is_pattern(key):
+            return self._patterns.get(key)
+
+        return self._exact.get(key) or self._one_shot.get(key)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Remove the routes that have expired.  Returns the number removed.
+        """
+        now = time.time() if now is None else now
+        count = 0
+
+        while self._expiries and self._expiries[0][0] <= now:
+            with self._lock:
+                if not self._expiries or self._expiries[0][0] > now:
+                    break
+                expires, key = heapq.heappop(self._expiries)
+
+            route = self.get(key)
+            if route is not None and route.expired(now) and self._discard(key, route) is not None:
+                count += 1
+
+        self.expired += count
+
+        return count
+
+    def match(self, sur: str) -> Optional[Route[C]]:
+        """Return the route of a subscription reference, or the default route.
+        """
+        route = self._match_route(sur)
+
+        # The default route is the only one without a pattern.
+        if route is None or route.pattern is None:
+            return route
+
+        if route.expires is not None and route.expired(time.time()):
+            if self._discard(route.pattern, route) is not None:
+                self.expired += 1
+            return self.match(sur)
+
+        if route.one_shot:
+            self._discard(route.pattern, route)
+
+        return route
+
+    def _match_route(self, sur: str) -> Optional[Route[C]]:
+        exact = self._exact
+        route = exact.get(sur)
+        if route is not None:
+            return route
+
+        key = self.key(sur)
+        route = exact.get(key) or self._one_shot.get(key)
+        if route is not None:
+            return route
+
+        # Try the other form of the address.
+        path = None
+        if self.addresses is not None:
+            path = self.addresses.path(key)
+            ri = self.addresses.ri(key)
+            route = (path is not None and exact.get(path)) or (ri is not None and exact.get(ri)) or None
+            if route is not None:
+                return route
+
+        if self._patterns:
+            route = self._match(self._trie, self._segments(path or key), 0)
+            if route is not None:
+                return route
+
+        return self.default
+
+    def _match(self, node: _Node, segments: List[str], i: int) -> Optional[Route[C]]:
+        if i == len(segments):
+            # '**' also matches nothing.
+            return node.route or node.deep
+
+        segment = segments[i]
+
+        child = node.children.get(segment)
+        if child is not None:
+            route = self._match(child, segments, i + 1)
+            if route is not None:
+                return route
+
+        for pattern, child in node.globs:
+            if pattern == self.WILDCARD or fnmatchcase(segment, pattern):
+                route = self._match(child, segments, i + 1)
+                if route is not None:
+                    return route
+
+        return node.deep
+
+    @staticmethod
+    def _segments(key: str) -> List[str]:
+        return key.strip('/').split('/')
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the number of routes and the expiry and eviction counters.
+        """
+        return {
+            'exact': len(self._exact),
+            'patterns': len(self._patterns),
+            'one_shot': len(self._one_shot),
+            'pending_expiries': len(self._expiries),
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'removed': self.removed,
+        }
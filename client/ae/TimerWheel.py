@@ -0,0 +1,77 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import threading, time
+
+from typing import Any, Callable, List, Tuple
+
+
+class TimerWheel:
+    """Hashed timer wheel: tracks many deadlines at a constant cost per scheduled item and per tick.
+
+    Items are dropped into the slot of the tick they are due on, modulo the number of slots, and
+    advance() only visits the slots of the ticks that have passed since it last ran.  Items due more
+    than one rotation ahead stay in their slot until their own rotation comes.  Deadlines are
+    rounded up to the next tick.  Items are not cancelled; callers ignore those that are no longer
+    of interest when they expire.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 512, clock: Callable[[], float] = time.monotonic):
+        """Constructor.
+
+        Args:
+            tick: Resolution of the wheel, in seconds.
+            slots: Number of slots.  One rotation covers tick * slots seconds.
+            clock: Time source, in seconds.
+        """
+        self.tick = tick
+        self.clock = clock
+
+        # (deadline, item) per slot.
+        self._slots: List[List[Tuple[float, Any]]] = [[] for _ in range(slots)]
+        self._current = int(clock() // tick)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, delay: float, item: Any):
+        """Schedule item to expire in delay seconds.
+        """
+        deadline = self.clock() + delay
+
+        with self._lock:
+            # Never in the slot being advanced, so that an item is not missed until the next rotation.
+            index = max(int(-(-deadline // self.tick)), self._current + 1)
+            self._slots[index % len(self._slots)].append((deadline, item))
+            self._count += 1
+
+    def advance(self) -> List[Any]:
+        """Return the items that have expired since the last call, in no particular order.
+        """
+        now = self.clock()
+        target = int(now // self.tick)
+        expired = []
+
+        with self._lock:
+            # After a long pause every slot is visited once.
+            start = max(self._current + 1, target - len(self._slots) + 1)
+            for index in range(start, target + 1):
+                slot = self._slots[index % len(self._slots)]
+                if not slot:
+                    continue
+
+                keep = []
+                for deadline, item in slot:
+                    if deadline <= now:
+                        expired.append(item)
+                    else:
+                        keep.append((deadline, item))
+                self._slots[index % len(self._slots)] = keep
+
+            self._current = max(self._current, target)
+            self._count -= len(expired)
+
+        return expired
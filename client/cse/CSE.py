@@ -2,18 +2,23 @@
 
 #!/usr/bin/env python
 
-import json, random
+import json, random, requests
 
 from client.ae.AE import AE
+from client.cse.ExistenceIndex import ExistenceIndex
 from client.onem2m.OneM2MResource import OneM2MResource, OneM2MResourceContent
+from client.onem2m.UriList import UriList
+from client.onem2m.ResourceAddressIndex import ResourceAddressIndex
 from client.onem2m.OneM2MPrimitive import OneM2MPrimitive
 from client.onem2m.http.OneM2MRequest import OneM2MRequest
 from client.onem2m.OneM2MOperation import OneM2MOperation
+from client.onem2m.http.HttpStatusCode import HttpStatusCode
 from client.onem2m.resource.ContentInstance import ContentInstance as ContentInstance
+from client.onem2m.resource.EventNotificationCriteria import EventNotificationCriteria
 from client.onem2m.resource.Subscription import Subscription
 from client.exceptions.InvalidArgumentException import InvalidArgumentException
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 class CSE:
 
@@ -21,18 +26,32 @@ class CSE:
     CSE_RESOURCE = 'PN_CSE'
 
     ae: Optional[AE] = None
-    def __init__(self, host: str, port: int, rsc: str = None, transport_protocol = 'http'):
+    def __init__(
+        self, host: str, port: int, rsc: str = None, transport_protocol = 'http', prefer_unstructured: bool = False,
+        negative_ttl: float = 60.0, max_addresses: int = 100000, positive_ttl: Optional[float] = 300.0
+    ):
         """Constructor
 
         Args:
             host (str): CSE host
             port (int): CSE port
             rsc (str): Base resource
+            prefer_unstructured (bool): Address resources whose ri is known by ri rather than by their hierarchical path.
+            negative_ttl (float): Seconds to remember that a resource does not exist.
+            positive_ttl (float): Seconds to remember that a resource exists, or None to remember it until it is deleted.
+            max_addresses (int): Maximum number of resources in the ri <-> path index.  The least recently used are evicted.
         """
         self.transport_protocol = transport_protocol
         self.host = host
         self.port = port
         self.rsc = rsc or CSE.CSE_RESOURCE
+        self.prefer_unstructured = prefer_unstructured
+
+        # ri <-> hierarchical path index, filled from create and retrieve responses.
+        self.addresses = ResourceAddressIndex(max_addresses)
+
+        # Resources known to exist (or not), filled from discovery, create, delete and 404 responses.
+        self.existence = ExistenceIndex(negative_ttl, positive_ttl)
 
     def register_ae(self, ae: AE, rn=None):
         """Synchronously register an AE with a CSE.
@@ -62,10 +81,10 @@ class CSE:
         }
 
         if (rn is not None):
-            ae.__dict__['rn'] = rn
+            ae.rn = rn
 
-        # Remove AE-Credential-ID.
-        ae.__dict__.pop(OneM2MPrimitive.M2M_PARAM_AE_ID)
+        # Remove AE-Credential-ID.  Attribute access (rather than __dict__) keeps the AE's encoded body cache in sync.
+        delattr(ae, OneM2MPrimitive.M2M_PARAM_AE_ID)
 
         # Create a request object
         oneM2MRequest = OneM2MRequest()
@@ -77,6 +96,7 @@ class CSE:
         # @todo return error msg or object with error msg.
         if oneM2MResponse.rsc == OneM2MPrimitive.M2M_RSC_CREATED:
             self.ae = AE(oneM2MResponse.pc)
+            self.addresses.learn_response(oneM2MResponse.pc, parent=to)
 
         return oneM2MResponse
 
@@ -99,33 +119,38 @@ class CSE:
 
         if oneM2MResponse.rsc == OneM2MPrimitive.M2M_RSC_OK and oneM2MResponse.pc is not None:
             self.ae = AE(oneM2MResponse.pc)
+            self.addresses.learn_response(oneM2MResponse.pc, path=to)
 
         return oneM2MResponse
 
-    def discover_nodes(self, lvl: int=0):
+    def discover_nodes(self, lvl: int=0, compact: bool=False):
         """ Synchronously discover nodes registered with the CSE.
 
         Returns:
             list: A list of node URIs or None.
         """
 
-        return self.discover_resources(lvl, with_ae=False, ty=OneM2MPrimitive.M2M_RESOURCE_TYPES.Node.value)
+        return self.discover_resources(
+            lvl=lvl, with_ae=False, ty=OneM2MPrimitive.M2M_RESOURCE_TYPES.Node.value, compact=compact
+        )
 
-    def discover_containers(self, path: str=None, with_ae: bool=True, lvl: int=0):
+    def discover_containers(self, path: str=None, with_ae: bool=True, lvl: int=0, compact: bool=False):
         """ Synchronously discover containers registered with the CSE.
 
         Args:
             path: Final part of the path, not including the leading '/'
             with_ae [default: true]: Whether to search relative to the IN-AE's container
+            compact [default: false]: Whether to return the URI list as a UriList
 
         Returns:
             list: A list of container resource URIs or None.
         """
 
-        return self.discover_resources(path, with_ae, lvl, OneM2MPrimitive.M2M_RESOURCE_TYPES.Container.value)
+        return self.discover_resources(path, with_ae, lvl, OneM2MPrimitive.M2M_RESOURCE_TYPES.Container.value, compact)
 
     def discover_resources(
-        self, path: str=None, with_ae: bool=True, lvl: int=0, ty: int=OneM2MPrimitive.M2M_RESOURCE_TYPES.Container.value
+        self, path: str=None, with_ae: bool=True, lvl: int=0, ty: int=OneM2MPrimitive.M2M_RESOURCE_TYPES.Container.value,
+        compact: bool=False
     ):
         """ Synchronously discover resources registered with the CSE.
 
@@ -133,6 +158,8 @@ class CSE:
             path: Final part of the path, not including the leading '/'
             with_ae [default: true]: Whether to search relative to the IN-AE's container
             ty: Type of the resource, per OneM2MPrimitive.M2M_RESOURCE_TYPES
+            compact [default: false]: Whether to replace the response's 'm2m:uril' list with a
+                prefix compressed UriList.  Use for large discovery results that are kept in memory.
 
         Returns:
             list: A list of container resource URIs or None.
@@ -156,6 +183,13 @@ class CSE:
         # Returns a OneM2MResponse object.  Handle any response code logic here.
         oneM2MResponse = oneM2MRequest.retrieve(to)
 
+        if oneM2MResponse.pc is not None and UriList.SHORT_NAME in oneM2MResponse.pc:
+            for uri in oneM2MResponse.pc[UriList.SHORT_NAME]:
+                self.existence.mark_present(ResourceAddressIndex.normalize(uri))
+
+            if compact:
+                oneM2MResponse.pc[UriList.SHORT_NAME] = UriList(oneM2MResponse.pc[UriList.SHORT_NAME])
+
         return oneM2MResponse
 
     # @todo add possible rcn values to OneM2MResource class.
@@ -184,7 +218,14 @@ class CSE:
 
         oneM2MRequest = OneM2MRequest()
 
-        oneM2MResponse = oneM2MRequest.create(to, params, content_instance)
+        parent = self.addresses.resolve(to)
+        try:
+            oneM2MResponse = oneM2MRequest.create(to, params, content_instance)
+        except requests.exceptions.HTTPError as err:
+            self._record_not_found(parent, err)
+            raise
+
+        self._record_created(oneM2MResponse, parent, content_instance)
 
         return oneM2MResponse
 
@@ -208,11 +249,19 @@ class CSE:
 
         oneM2MRequest = OneM2MRequest(to, params)
 
-        oneM2MResponse = oneM2MRequest.retrieve()
+        path = self.addresses.resolve(to)
+        try:
+            oneM2MResponse = oneM2MRequest.retrieve()
+        except requests.exceptions.HTTPError as err:
+            self._record_not_found(path, err)
+            raise
+
+        self.addresses.learn_response(oneM2MResponse.pc, path=path)
+        self.existence.mark_present(path)
 
         return oneM2MResponse
 
-    def get_to(self, path: str=None, with_ae: bool=True, with_rsc: bool=True):
+    def get_to(self, path: Optional[str]=None, with_ae: bool=True, with_rsc: bool=True):
         """ Return the HTTP request URI.
 
         Args:
@@ -232,9 +281,79 @@ class CSE:
         if path is not None:
             full_path += "/" + path
 
-        to = '{}://{}:{}{}'.format(self.transport_protocol, self.host, self.port, full_path)
+        return self._url(full_path)
+
+    def _url(self, full_path: str):
+        """ Return the HTTP request URI of a path.
+
+        Args:
+            full_path: Path of the resource, ex. /PN_CSE/<AE-ID>/cnt-00001
 
-        return to
+        Returns:
+            to: The URI
+        """
+
+        # The CSE locates a resource addressed by ri without walking the resource tree.
+        if self.prefer_unstructured:
+            address = self.addresses.shortest(full_path)
+            full_path = address if address.startswith('/') else '/' + address
+
+        return '{}://{}:{}{}'.format(self.transport_protocol, self.host, self.port, full_path)
+
+    def _record_created(self, oneM2MResponse, parent: str, content):
+        """Index a resource created beneath parent.
+        """
+        self.addresses.learn_response(oneM2MResponse.pc, parent=parent)
+
+        # rcn=2 returns the hierarchical address of the new resource.
+        if isinstance(oneM2MResponse.pc, dict) and isinstance(oneM2MResponse.pc.get('m2m:uri'), str):
+            self.existence.mark_present(ResourceAddressIndex.normalize(oneM2MResponse.pc['m2m:uri']))
+        elif getattr(content, 'rn', None) is not None:
+            self.existence.mark_present(parent + '/' + content.rn)
+        else:
+            self.existence.mark_present(parent)
+
+    def _record_not_found(self, path: str, err: requests.exceptions.HTTPError):
+        """Remember a resource that the CSE reported as not found.
+        """
+        if err.response is not None and err.response.status_code == HttpStatusCode.NOT_FOUND:
+            self.existence.mark_absent(path)
+
+    def resource_exists(self, uri: str, with_ae: bool=True, with_rsc: bool=True):
+        """ Return whether a resource exists, answered locally when it is known.
+
+        Args:
+            uri: URI of a resource, as for get_to()
+
+        Returns:
+            bool: Whether the resource exists.
+        """
+
+        to = self.get_to(uri, with_ae, with_rsc)
+        path = self.addresses.resolve(to)
+
+        exists = self.existence.exists(path)
+        if exists is not None:
+            return exists
+
+        assert self.ae is not None
+        params = {
+            OneM2MPrimitive.M2M_PARAM_FROM: self.ae.ri,
+            OneM2MPrimitive.M2M_PARAM_RESULT_CONTENT: OneM2MRequest.M2M_RCN_ATTRIBUTES,
+        }
+
+        try:
+            oneM2MResponse = OneM2MRequest(to, params).retrieve()
+        except requests.exceptions.HTTPError as err:
+            self._record_not_found(path, err)
+            if err.response is not None and err.response.status_code == HttpStatusCode.NOT_FOUND:
+                return False
+            raise
+
+        self.addresses.learn_response(oneM2MResponse.pc, path=path)
+        self.existence.mark_present(path)
+
+        return True
 
     def check_existing_subscriptions(self, uri: str, subscription_name: str):
         """Retrieve all existing subscriptions on a resource
@@ -258,27 +377,48 @@ class CSE:
         return oneM2MRequest.retrieve()
 
     def create_subscription(
-        self, uri: str, sub_name: str, notification_uri: str = None, event_types: List[int] = [3], result_content=None, with_rsc: bool=True
+        self, uri: str, sub_name: str, notification_uri: str = None, event_types: List[int] = [3], result_content=None, with_rsc: bool=True,
+        batch_size: Optional[int] = None, batch_duration: Optional[float] = None,
+        nct: int = OneM2MPrimitive.M2M_NOTIFICATION_CONTENT_TYPES.AllAttributes.value,
+        enc: Optional[EventNotificationCriteria] = None
     ):
         """ Create a subscription to a resource.
 
         Args:
             uri: URI of a resource.
+            batch_size: Have the CSE batch notifications (batchNotify) and send them as one aggregated
+                notification (m2m:agn) of up to this many notifications.
+            batch_duration: Seconds after which the CSE sends a batch even if it is not full.  Only
+                sent along with batch_size.
+            nct: What notifications carry, one of OneM2MPrimitive.M2M_NOTIFICATION_CONTENT_TYPES: all the
+                attributes of the resource, only the modified attributes, or only the resource ID.  With the
+                latter two, Notification fetches the full resource when a callback reads a missing attribute.
+            enc: Criteria the CSE checks before sending a notification, ex. a size threshold or child
+                resource types.  The event types are taken from event_types unless enc sets them.
 
         Returns:
             OneM2MResponse: The request response.
         """
 
-        json_data = {
+        criteria = {'net': event_types}
+        if enc is not None:
+            criteria.update(enc.get_content())
+
+        json_data: Dict[str, Any] = {
             'rn': sub_name,
-            'enc': {'net': event_types},
-            'nct': 1,
+            'enc': criteria,
+            'nct': nct,
             'nec': 2,
         }
 
         if notification_uri:
             json_data['nu'] = [notification_uri]                # NOTE Must be an array, not a plain string
 
+        if batch_size:
+            json_data['bn'] = {'num': batch_size}
+            if batch_duration:
+                json_data['bn']['dur'] = OneM2MPrimitive.duration(batch_duration)
+
         return self.create_resource(
             uri,
             None,
@@ -288,12 +428,15 @@ class CSE:
         )
 
     def create_resource(
-        self, uri: str, name: str, content, result_content=None, with_rsc: bool=True
+        self, uri: str, name: str, content, result_content=None, with_rsc: bool=True, upsert: bool=False
     ):
         """ Create a resource.
 
         Args:
             uri: URI of a resource.
+            upsert [default: false]: Update the resource instead if it already exists.  The update is
+                sent first when the resource is known to exist, otherwise the create is sent and
+                retried as an update if the CSE reports a conflict.
 
         Returns:
             OneM2MResponse: The request response.
@@ -314,9 +457,23 @@ class CSE:
         if name is not None:
             content.name = name
 
+        parent = self.addresses.resolve(to)
+        rn = getattr(content, 'rn', None)
+        if upsert and rn is not None and self.existence.exists(parent + '/' + rn):
+            return self._update(parent + '/' + rn, content.copy(exclude=('rn',)))
+
         oneM2MRequest = OneM2MRequest()
 
-        oneM2MResponse = oneM2MRequest.create(to, params, content)
+        try:
+            oneM2MResponse = oneM2MRequest.create(to, params, content)
+        except requests.exceptions.HTTPError as err:
+            if upsert and rn is not None and err.response is not None and err.response.status_code == HttpStatusCode.CONFLICT:
+                self.existence.mark_present(parent + '/' + rn)
+                return self._update(parent + '/' + rn, content.copy(exclude=('rn',)))
+            self._record_not_found(parent, err)
+            raise
+
+        self._record_created(oneM2MResponse, parent, content)
 
         return oneM2MResponse
 
@@ -375,32 +532,117 @@ class CSE:
 
         oneM2MRequest = OneM2MRequest(to, params)
 
-        oneM2MReponse = oneM2MRequest.retrieve()
+        path = self.addresses.resolve(to)
+        try:
+            oneM2MReponse = oneM2MRequest.retrieve()
+        except requests.exceptions.HTTPError as err:
+            self._record_not_found(path, err)
+            raise
+
+        self.addresses.learn_response(oneM2MReponse.pc, path=path)
+        self.existence.mark_present(path)
 
         return oneM2MReponse
 
-    def update_resource(self, uri: str, resource: OneM2MResource):
+    def retrieve_address(self, address: str):
+        """ Synchronous retrieve of a resource by the address the CSE refers to it with, ex. in notifications.
+
+        Args:
+            address: The structured path of the resource, ex. /PN_CSE/<AE-ID>/cnt-00001, or its resource ID.
+
+        Returns:
+            OneM2MResponse: The request response.
+        """
+
+        assert self.ae is not None
+        to = self._url(address if address.startswith('/') else '/' + address)
+        params = {
+            OneM2MPrimitive.M2M_PARAM_FROM: self.ae.ri,
+        }
+
+        oneM2MRequest = OneM2MRequest(to, params)
+
+        path = self.addresses.resolve(to)
+        try:
+            oneM2MResponse = oneM2MRequest.retrieve()
+        except requests.exceptions.HTTPError as err:
+            self._record_not_found(path, err)
+            raise
+
+        self.addresses.learn_response(oneM2MResponse.pc, path=path)
+        self.existence.mark_present(path)
+
+        return oneM2MResponse
+
+    def update_resource(self, uri: Optional[str], resource: OneM2MResource, upsert: bool=False, with_ae: bool=True):
         """ Update a resource.
 
         Args:
-            uri: The URI of the resource to retrieve.
-            short_name:
-            key:
-            value:
+            uri: The URI of the resource to update, or None for the AE.
+            resource: The attributes to update.
+            upsert [default: false]: Create the resource instead if it does not exist.  The create is
+                sent first when the resource is known not to exist, otherwise the update is sent and
+                retried as a create if the CSE reports that the resource was not found.
+            with_ae [default: true]: Whether uri is relative to the AE rather than to the CSE.
 
         Returns:
             OneM2MResponse: The request response.
         """
 
+        path = self.addresses.resolve(self.get_to(uri, with_ae=with_ae))
+
+        if upsert and self.existence.exists(path) is False:
+            return self._create(path, resource)
+
+        try:
+            return self._update(path, resource)
+        except requests.exceptions.HTTPError as err:
+            if upsert and err.response is not None and err.response.status_code == HttpStatusCode.NOT_FOUND:
+                return self._create(path, resource)
+            raise
+
+    def _update(self, path: str, resource: OneM2MResource):
+        """ Update the resource at path, recording whether it exists.
+        """
+
         assert self.ae is not None
-        to = self.get_to(uri)
+        to = self._url(path)
         params = {
             OneM2MPrimitive.M2M_PARAM_FROM: self.ae.ri
         }
 
         oneM2MRequest = OneM2MRequest()
 
-        oneM2MResponse = oneM2MRequest.update(to, params, resource)
+        try:
+            oneM2MResponse = oneM2MRequest.update(to, params, resource)
+        except requests.exceptions.HTTPError as err:
+            self._record_not_found(path, err)
+            raise
+
+        self.addresses.learn_response(oneM2MResponse.pc, path=path)
+        self.existence.mark_present(path)
+
+        return oneM2MResponse
+
+    def _create(self, path: str, resource: OneM2MResource):
+        """ Create the resource at path, named after its final segment.
+        """
+
+        assert self.ae is not None
+        parent, _, rn = path.rpartition('/')
+        params = {
+            OneM2MPrimitive.M2M_PARAM_FROM: self.ae.ri,
+        }
+
+        content = resource.copy(rn=rn)
+
+        try:
+            oneM2MResponse = OneM2MRequest().create(self._url(parent), params, content)
+        except requests.exceptions.HTTPError as err:
+            self._record_not_found(parent, err)
+            raise
+
+        self._record_created(oneM2MResponse, parent, content)
 
         return oneM2MResponse
 
@@ -454,17 +696,24 @@ class CSE:
         # Returns a OneM2MResponse object.  Handle any response code logic here.
         oneM2MResponse = oneM2MRequest.delete(to, params)
 
+        self.existence.mark_absent(self.addresses.resolve(to))
+        self.addresses.remove(to)
+
         return oneM2MResponse
 
-    def delete_resource(self, uri: str):
+    def delete_resource(self, uri: str, with_ae: bool=True):
         """ Delete resource.
 
+        Args:
+            uri: The URI of the resource to delete.
+            with_ae [default: true]: Whether uri is relative to the AE rather than to the CSE.
+
         Returns:
             OneM2MResponse: The request response.
         """
 
         assert self.ae is not None
-        to = self.get_to(uri)
+        to = self.get_to(uri, with_ae=with_ae)
 
         # op is not required as it is implied by the function that the params will be passed to.
         params = {
@@ -476,4 +725,14 @@ class CSE:
         oneM2MRequest = OneM2MRequest()
 
         # Returns a OneM2MResponse object.  Handle any response code logic here.
-        return oneM2MRequest.delete(to, params)
+        path = self.addresses.resolve(to)
+        try:
+            oneM2MResponse = oneM2MRequest.delete(to, params)
+        except requests.exceptions.HTTPError as err:
+            self._record_not_found(path, err)
+            raise
+
+        self.existence.mark_absent(path)
+        self.addresses.remove(to)
+
+        return oneM2MResponse
@@ -0,0 +1,96 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import threading, time
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class ExistenceIndex:
+    """Remembers which resource paths are known to exist, or known not to, so that probes
+    (retrieve to see if a resource exists, update then create) can be answered without a
+    round trip.
+
+    Resources can be created, deleted or expire on the CSE without this client seeing it,
+    so answers are hints: absent entries expire after negative_ttl seconds, present entries
+    after positive_ttl seconds, and the least recently used entries are dropped beyond
+    max_entries.  A resource deleted by another AE is thus assumed to exist for at most
+    positive_ttl seconds, after which an upsert probes the CSE again.
+    """
+
+    def __init__(self, negative_ttl: float = 60.0, positive_ttl: Optional[float] = 300.0, max_entries: int = 100000):
+        """Constructor.
+
+        Args:
+            negative_ttl: Seconds to remember that a resource does not exist.
+            positive_ttl: Seconds to remember that a resource exists, or None for no expiry.
+            max_entries: Maximum number of paths to remember.
+        """
+        self.negative_ttl = negative_ttl
+        self.positive_ttl = positive_ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        # path -> (exists, expiry as time.monotonic() or None)
+        self._entries: 'OrderedDict[str, Tuple[bool, Optional[float]]]' = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _set(self, path: str, exists: bool, ttl: Optional[float]):
+        expiry = None if ttl is None else time.monotonic() + ttl
+
+        with self._lock:
+            self._entries[path] = (exists, expiry)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def mark_present(self, path: str):
+        """Record that a resource exists, along with its ancestors.
+        """
+        self._set(path, True, self.positive_ttl)
+
+        # A resource can only exist beneath existing parents.
+        parent = path.rpartition('/')[0]
+        while parent.count('/') > 1:
+            exists = self.exists(parent)
+            if exists is True:
+                break
+            self._set(parent, True, self.positive_ttl)
+            parent = parent.rpartition('/')[0]
+
+    def mark_absent(self, path: str):
+        """Record that a resource does not exist.  Anything beneath it does not exist either.
+        """
+        prefix = path + '/'
+
+        with self._lock:
+            for child in [p for p in self._entries if p.startswith(prefix)]:
+                del self._entries[child]
+
+        self._set(path, False, self.negative_ttl)
+
+    def forget(self, path: str):
+        """Drop what is known about a resource.
+        """
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def exists(self, path: str) -> Optional[bool]:
+        """Return True if the resource is known to exist, False if it is known not to exist
+        and None if it is not known.
+        """
+        entry = self._entries.get(path)
+
+        if entry is None:
+            return None
+
+        exists, expiry = entry
+        if expiry is not None and expiry <= time.monotonic():
+            self.forget(path)
+            return None
+
+        return exists
@@ -0,0 +1,245 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Tuple
+
+
+def _compile(*tables: Mapping) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Merge the per resource type tables into flat short -> long and long -> short lookups.
+
+    Raises:
+        ValueError: If two tables map the same name differently.
+    """
+    short_to_long: Dict[str, str] = {}
+    long_to_short: Dict[str, str] = {}
+
+    for table in tables:
+        for short, long in table.items():
+            if short_to_long.setdefault(short, long) != long or long_to_short.setdefault(long, short) != short:
+                raise ValueError('Conflicting name translation for "{}" / "{}"'.format(short, long))
+
+    return short_to_long, long_to_short
+
+
+class NameTranslator:
+    """Translates oneM2M payloads between short names (rn, ri, con...) and long names
+    (resourceName, resourceID, content...).
+
+    The tables below are defined per resource type and compiled into two flat dicts at
+    import, so translating a payload is a single pass with one dict lookup per key.
+    Keys that are not oneM2M names (ex. 'lco:lcoi' or application defined attributes)
+    are left unchanged.
+    """
+
+    # Resource and data type wrappers.  TS-0004 Table 8.2.2-1, 8.2.4-1.
+    RESOURCE_TYPES = {
+        'm2m:acp':  'm2m:accessControlPolicy',
+        'm2m:ae':   'm2m:AE',
+        'm2m:cnt':  'm2m:container',
+        'm2m:cin':  'm2m:contentInstance',
+        'm2m:cb':   'm2m:CSEBase',
+        'm2m:grp':  'm2m:group',
+        'm2m:nod':  'm2m:node',
+        'm2m:csr':  'm2m:remoteCSE',
+        'm2m:sub':  'm2m:subscription',
+        'm2m:fcnt': 'm2m:flexContainer',
+        'm2m:ts':   'm2m:timeSeries',
+        'm2m:tsi':  'm2m:timeSeriesInstance',
+        'm2m:sgn':  'm2m:notification',
+        'm2m:agn':  'm2m:aggregatedNotification',
+        'm2m:uri':  'm2m:URI',
+        'm2m:uril': 'm2m:URIList',
+        'm2m:dbg':  'm2m:debugInfo',
+    }
+
+    # Universal and common attributes.  TS-0004 Table 8.2.3-1.
+    COMMON = {
+        'ty':   'resourceType',
+        'ri':   'resourceID',
+        'rn':   'resourceName',
+        'pi':   'parentID',
+        'ct':   'creationTime',
+        'lt':   'lastModifiedTime',
+        'et':   'expirationTime',
+        'lbl':  'labels',
+        'acpi': 'accessControlPolicyIDs',
+        'at':   'announceTo',
+        'aa':   'announcedAttribute',
+        'st':   'stateTag',
+        'cr':   'creator',
+        'daci': 'dynamicAuthorizationConsultationIDs',
+        'cstn': 'custodian',
+    }
+
+    AE = {
+        'api':  'App-ID',
+        'aei':  'AE-ID',
+        'apn':  'appName',
+        'poa':  'pointOfAccess',
+        'or':   'ontologyRef',
+        'nl':   'nodeLink',
+        'rr':   'requestReachability',
+        'csz':  'contentSerialization',
+        'esi':  'e2eSecInfo',
+        'srv':  'supportedReleaseVersions',
+    }
+
+    CONTAINER = {
+        'mni':  'maxNrOfInstances',
+        'mbs':  'maxByteSize',
+        'mia':  'maxInstanceAge',
+        'cni':  'currentNrOfInstances',
+        'cbs':  'currentByteSize',
+        'li':   'locationID',
+        'or':   'ontologyRef',
+        'disr': 'disableRetrieval',
+        'la':   'latest',
+        'ol':   'oldest',
+    }
+
+    CONTENT_INSTANCE = {
+        'cnf':  'contentInfo',
+        'cs':   'contentSize',
+        'conr': 'contentRef',
+        'or':   'ontologyRef',
+        'con':  'content',
+    }
+
+    NODE = {
+        'ni':   'nodeID',
+        'hcl':  'hostedCSELink',
+        'hael': 'hostedAELinks',
+        'hsl':  'hostedServiceLinks',
+        'mgca': 'mgmtClientAddress',
+        'rms':  'roamingStatus',
+        'nid':  'networkID',
+    }
+
+    SUBSCRIPTION = {
+        'enc':  'eventNotificationCriteria',
+        'exc':  'expirationCounter',
+        'nu':   'notificationURI',
+        'gpi':  'groupID',
+        'nfu':  'notificationForwardingURI',
+        'bn':   'batchNotify',
+        'rl':   'rateLimit',
+        'psn':  'preSubscriptionNotify',
+        'pn':   'pendingNotification',
+        'nsp':  'notificationStoragePriority',
+        'ln':   'latestNotify',
+        'nct':  'notificationContentType',
+        'nec':  'notificationEventCat',
+        'su':   'subscriberURI',
+    }
+
+    # Complex data types used by subscriptions.  TS-0004 Table 8.2.3-2.
+    EVENT_NOTIFICATION_CRITERIA = {
+        'crb':  'createdBefore',
+        'cra':  'createdAfter',
+        'ms':   'modifiedSince',
+        'us':   'unmodifiedSince',
+        'sts':  'stateTagSmaller',
+        'stb':  'stateTagBigger',
+        'exb':  'expireBefore',
+        'exa':  'expireAfter',
+        'sza':  'sizeAbove',
+        'szb':  'sizeBelow',
+        'net':  'notificationEventType',
+        'om':   'operationMonitor',
+        'atr':  'attribute',
+        'chty': 'childResourceType',
+        'md':   'missingData',
+        'fo':   'filterOperation',
+    }
+
+    BATCH_NOTIFY = {
+        'num':  'number',
+        'dur':  'duration',
+        'mnn':  'maxNrOfNotify',
+        'tww':  'timeWindow',
+    }
+
+    NOTIFICATION = {
+        'nev':  'notificationEvent',
+        'rep':  'representation',
+        'vrq':  'verificationRequest',
+        'sud':  'subscriptionDeletion',
+        'sur':  'subscriptionReference',
+        'sgn':  'notification',
+    }
+
+    SHORT_TO_LONG, LONG_TO_SHORT = _compile(
+        RESOURCE_TYPES, COMMON, AE, CONTAINER, CONTENT_INSTANCE, NODE, SUBSCRIPTION,
+        EVENT_NOTIFICATION_CRITERIA, BATCH_NOTIFY, NOTIFICATION,
+    )
+
+    # Attributes whose values are application defined and must never be translated.
+    OPAQUE = frozenset(('con', 'content'))
+
+    @staticmethod
+    def _translate(value: Any, table: Dict[str, str]) -> Any:
+        if isinstance(value, dict):
+            opaque = NameTranslator.OPAQUE
+            translate = NameTranslator._translate
+            return {
+                table.get(k, k): v if k in opaque else translate(v, table)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [NameTranslator._translate(v, table) for v in value]
+        return value
+
+    @staticmethod
+    def to_long(payload: Any) -> Any:
+        """Return a copy of a short name payload, ex. {'m2m:cin': {'rn': ...}}, with long names.
+        """
+        return NameTranslator._translate(payload, NameTranslator.SHORT_TO_LONG)
+
+    @staticmethod
+    def to_short(payload: Any) -> Any:
+        """Return a copy of a long name payload with short names, ready to send to the CSE.
+        """
+        return NameTranslator._translate(payload, NameTranslator.LONG_TO_SHORT)
+
+    @staticmethod
+    def long_view(payload: Any) -> Any:
+        """Wrap a short name payload so that it can be read with long names.
+
+        Nothing is copied up front; only the values that are actually accessed are translated.
+        Use instead of to_long() when a consumer reads a few fields of a large payload.
+        """
+        if isinstance(payload, dict):
+            return LongNameView(payload)
+        if isinstance(payload, list):
+            return [NameTranslator.long_view(v) for v in payload]
+        return payload
+
+
+class LongNameView(Mapping):
+    """Read-only, long name view of a short name payload.  See NameTranslator.long_view().
+    """
+
+    __slots__ = ('_payload',)
+
+    def __init__(self, payload: Dict[str, Any]):
+        self._payload = payload
+
+    def __getitem__(self, key: str) -> Any:
+        short = NameTranslator.LONG_TO_SHORT.get(key, key)
+        value = self._payload[short]
+        if short in NameTranslator.OPAQUE:
+            return value
+        return NameTranslator.long_view(value)
+
+    def __iter__(self) -> Iterator[str]:
+        short_to_long = NameTranslator.SHORT_TO_LONG
+        for key in self._payload:
+            yield short_to_long.get(key, key)
+
+    def __len__(self) -> int:
+        return len(self._payload)
+
+    def __repr__(self):
+        return 'LongNameView({!r})'.format(self._payload)
@@ -0,0 +1,402 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, json, re
+
+from client.onem2m.OneM2MPrimitive import OneM2MPrimitive
+from client.onem2m.OneM2MResource import OneM2MResource
+from client.onem2m.resource.Container import Container
+from client.onem2m.resource.ContentInstance import ContentInstance
+from client.onem2m.resource.Subscription import Subscription
+
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from client.cse.CSE import CSE
+
+# {
+#     "m2m:sgn": {
+#         "nev": {
+#             "rep": {
+#                 "m2m:cin": { "con": ..., "cr": "C64bb89740006ed", "ri": "cin64bb897a0006ee", ... }
+#             },
+#             "net": 3
+#         },
+#         "sur": "/PN_CSE/sub64bb897b0006ef",
+#         "vrq": false,
+#         "cr": "C64bb89740006ed"
+#     }
+# }
+class Notification:
+    """A notification (m2m:sgn) received by the listener.
+
+    The body is decoded once, on first access, and the nested fields are only looked up or
+    converted when they are read: the representation becomes a typed OneM2MResource on the first
+    access to resource, and a JSON encoded content (con) is decoded on the first access to
+    content.  The undecoded body stays available as raw.
+
+    Subscriptions created with a notification content type (nct) of modified attributes or resource ID
+    only send part of the resource, or just its ID.  Given a CSE, the full resource is retrieved
+    once, when a missing attribute is read through get(), content or resource.  The retrieve blocks,
+    so it is never done implicitly on a thread running an event loop: reading a missing attribute there
+    raises RuntimeError until coroutines have awaited fetch_async(), as the listener does before calling
+    a coroutine callback with only a resource ID.
+
+    Aggregated notifications (m2m:agn), sent by the CSE for subscriptions with batchNotify (bn), are
+    split into one Notification per m2m:sgn by split().
+    """
+
+    M2M_NOTIFICATION = 'm2m:sgn'
+    M2M_AGGREGATED_NOTIFICATION = 'm2m:agn'
+    # Wrapper of the resource ID sent instead of the representation, by some CSEs, for nct 3.
+    M2M_URI = 'm2m:uri'
+
+    # Representation short name to resource class.  Others are returned as OneM2MResource.
+    RESOURCE_TYPES = {
+        'm2m:cin': ContentInstance,
+        'm2m:cnt': Container,
+        'm2m:sub': Subscription,
+    }
+
+    _UNSET = object()
+
+    # A body that opens with the notification, and its subscription reference as the first member of the
+    # notification or as its last string member followed only by scalar members.  See scan_sur().
+    _SGN_START = re.compile(rb'\s*\{\s*"m2m:sgn"\s*:\s*\{')
+    _SUR_KEY = b'"sur"'
+    _SUR_FIRST = re.compile(rb'\s*"sur"\s*:\s*"([^"\\]*)"\s*[,}]')
+    _SUR_LAST = re.compile(
+        rb'(?:(?<=[{,])|(?<=[{,]\s))"sur"\s*:\s*"([^"\\]*)"'
+        rb'(?:\s*,\s*"[^"\\]*"\s*:\s*(?:"[^"\\]*"|true|false|null|[-+.0-9eE]+))*'
+        rb'\s*\}\s*\}\s*\Z'
+    )
+    # Bytes at the end of the body searched for the last member.
+    _SCAN_TAIL = 512
+
+    # The aggregated notification key.  See is_aggregated().
+    _AGN_KEY = b'"m2m:agn"'
+    # The verification request key.  See may_be_verification().
+    _VRQ_KEY = b'"vrq"'
+
+    __slots__ = ('_raw', '_body', '_sur', '_resource', '_content', '_cse', '_fetched')
+
+    def __init__(
+        self, raw: Optional[bytes], body: Optional[Dict[str, Any]] = None, sur: Optional[str] = None, cse: Optional['CSE'] = None
+    ):
+        """Constructor.
+
+        Args:
+            raw: The request body, or None if only the decoded body is known.
+            body: The decoded body, if it has already been decoded.
+            sur: The subscription reference, if it is already known (see scan_sur()).
+            cse: The CSE to retrieve the full resource from when the representation lacks an attribute
+                that is read.  None to never retrieve it.
+        """
+        self._raw = raw
+        self._body = body
+        self._sur = sur
+        self._cse = cse
+        # _UNSET until first read.
+        self._resource: Any = self._UNSET
+        self._content: Any = self._UNSET
+        self._fetched: Any = self._UNSET
+
+    @classmethod
+    def scan_sur(cls, raw: bytes) -> Optional[str]:
+        """Find the subscription reference in an undecoded body without decoding it.
+
+        Only the start and the last _SCAN_TAIL bytes of the body are scanned.  The sur is found when the body
+        opens with the notification ({"m2m:sgn": {...}}) and the sur is either the notification's first member
+        or its last string member, followed only by scalar members such as vrq and cr, at the end of the body.
+        Otherwise, or when the value contains escapes, None is returned and the body must be decoded to find
+        it.  Quotes inside JSON strings are escaped, so "sur" appearing in the content does not match.
+        """
+        start = cls._SGN_START.match(raw)
+        if start is None:
+            return None
+
+        key = raw.rfind(cls._SUR_KEY, max(start.end(), len(raw) - cls._SCAN_TAIL))
+        match = cls._SUR_LAST.match(raw, key) if key != -1 else None
+        if match is None:
+            match = cls._SUR_FIRST.match(raw, start.end())
+            if match is None:
+                return None
+
+        try:
+            return match.group(1).decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+
+    @classmethod
+    def is_aggregated(cls, raw: bytes) -> bool:
+        """Whether an undecoded body may be an aggregated notification (m2m:agn), which must be split().
+        """
+        return cls._AGN_KEY in raw
+
+    @classmethod
+    def may_be_verification(cls, raw: bytes) -> bool:
+        """Whether an undecoded body may be a verification request, ie. whether vrq must be read to tell.
+        """
+        return cls._VRQ_KEY in raw
+
+    @classmethod
+    def split(cls, raw: bytes, cse: Optional['CSE'] = None) -> List['Notification']:
+        """Decode a body once and return its notifications: one for a notification (m2m:sgn), or one
+        per notification of an aggregated notification (m2m:agn), in the order they were sent.
+
+        Notifications split from an aggregated notification share its decoded attributes and have no
+        raw body of their own until raw is read.
+
+        Raises:
+            ValueError: If the body is not JSON.
+        """
+        body = json.loads(raw)
+
+        agn = body.get(cls.M2M_AGGREGATED_NOTIFICATION) if isinstance(body, dict) else None
+        if agn is None:
+            return [cls(raw, body, cse=cse)]
+
+        sgns = agn.get(cls.M2M_NOTIFICATION, []) if isinstance(agn, dict) else agn
+        if isinstance(sgns, dict):
+            sgns = [sgns]
+
+        notifications = []
+        for sgn in sgns:
+            # Accept both [{sgn attributes}, ...] and [{'m2m:sgn': {sgn attributes}}, ...].
+            if cls.M2M_NOTIFICATION not in sgn:
+                sgn = {cls.M2M_NOTIFICATION: sgn}
+            notifications.append(cls(None, sgn, cse=cse))
+
+        return notifications
+
+    def __reduce__(self):
+        # The CSE is not sent along, ex. to a callback in another process.
+        return (type(self), (self._raw, self._body, self._sur))
+
+    def __repr__(self):
+        return 'Notification(sur={!r}, net={!r})'.format(self.sur, self.net)
+
+    @property
+    def raw(self) -> bytes:
+        """The undecoded body.  Notifications split from an aggregated notification are encoded on first access.
+        """
+        if self._raw is None:
+            self._raw = json.dumps(self._body).encode('utf-8')
+
+        return self._raw
+
+    @property
+    def body(self) -> Dict[str, Any]:
+        """The decoded body.
+
+        Raises:
+            ValueError: If the body is not JSON.
+        """
+        if self._body is None:
+            self._body = json.loads(self.raw)
+
+        return self._body
+
+    @property
+    def sgn(self) -> Dict[str, Any]:
+        """The notification attributes.
+
+        Raises:
+            KeyError: If the body is not a notification.
+        """
+        return self.body[self.M2M_NOTIFICATION]
+
+    @property
+    def sur(self) -> str:
+        """The subscription reference.
+        """
+        if self._sur is None:
+            self._sur = self.sgn['sur']
+
+        return self._sur
+
+    @property
+    def net(self) -> Optional[int]:
+        """The notification event type, ex. 3 for the creation of a child resource.
+        """
+        return self.sgn.get('nev', {}).get('net')
+
+    @property
+    def vrq(self) -> bool:
+        """Whether this is a verification request, sent by the CSE when a subscription is created.
+        """
+        return bool(self.sgn.get('vrq', False))
+
+    @property
+    def sud(self) -> bool:
+        """Whether this notifies the deletion of the subscription.
+        """
+        return bool(self.sgn.get('sud', False))
+
+    @property
+    def rep(self) -> Any:
+        """The representation, ex. {'m2m:cin': {...}}, the resource ID for nct 3 (ex. 'cin64bb897a0006ee'
+        or {'m2m:uri': 'cin64bb897a0006ee'}), or None.
+        """
+        return self.sgn.get('nev', {}).get('rep')
+
+    @property
+    def address(self) -> Optional[str]:
+        """The address of the notified resource: the resource ID sent instead of the representation
+        (nct 3), the ri of the representation, or the subscribed-to resource for an update of it.  None
+        if it is not known.
+        """
+        rep = self.rep
+        if isinstance(rep, dict) and self.M2M_URI in rep:
+            rep = rep[self.M2M_URI]
+        if isinstance(rep, str):
+            return rep
+
+        ri = self.attributes.get('ri')
+        if ri is not None:
+            return ri
+
+        # The subscription is a child of the subscribed-to resource.
+        sur = self.sur
+        if self.net == OneM2MPrimitive.M2M_NOTIFICATION_EVENT_TYPES.UpdateOfResource.value and '/' in sur.strip('/'):
+            return sur.rstrip('/').rsplit('/', 1)[0]
+
+        return None
+
+    def fetch(self) -> Optional[Dict[str, Any]]:
+        """Retrieve the full representation of the notified resource through the CSE, once.  The retrieve
+        is a blocking request, as are the CSE's others.
+
+        Returns:
+            The representation, ex. {'m2m:cin': {...}}, or None without a CSE or a known address.
+
+        Raises:
+            requests.exceptions.HTTPError: If the CSE refuses the retrieve.
+        """
+        if self._fetched is self._UNSET:
+            address = self.address
+            if self._cse is None or address is None:
+                return None
+
+            self._fetched = self._cse.retrieve_address(address).pc
+
+        return self._fetched
+
+    async def fetch_async(self) -> Optional[Dict[str, Any]]:
+        """fetch() on the event loop's default executor, so that the retrieve does not block the loop.
+        """
+        if self._fetched is not self._UNSET:
+            return self._fetched
+
+        return await asyncio.get_running_loop().run_in_executor(None, self.fetch)
+
+    @property
+    def fetch_needed(self) -> bool:
+        """Whether only the resource ID was sent (nct 3) and the resource can be, but has not been, fetched.
+        """
+        return not self.attributes and self._fetchable()
+
+    def _fetchable(self) -> bool:
+        return self._fetched is self._UNSET and self._cse is not None and self.address is not None
+
+    def _check_fetch(self, attribute: str):
+        """Raise if fetch() would retrieve the resource but must not, as this runs on an event loop.
+        """
+        if not self._fetchable():
+            return
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        raise RuntimeError(
+            '{} of {} was not sent, await fetch_async() before reading it on an event loop'.format(attribute, self.address)
+        )
+
+    def get(self, attribute: str, default: Any = None) -> Any:
+        """Return an attribute of the notified resource, ex. 'con' or 'lbl'.  Attributes missing from the
+        representation, ex. with nct 2 or 3, are read from the full resource, see fetch().
+
+        Raises:
+            RuntimeError: If the attribute is missing on an event loop and the resource has not been fetched,
+                see fetch_async().
+        """
+        attributes = self.attributes
+        if attribute in attributes:
+            return attributes[attribute]
+
+        self._check_fetch(attribute)
+
+        return self._attributes(self.fetch()).get(attribute, default)
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        """The attributes of the representation as sent, ex. the content of {'m2m:cin': {...}}, or {}.
+        Missing attributes are not retrieved.
+        """
+        return self._attributes(self.rep)
+
+    @staticmethod
+    def _attributes(rep: Any) -> Dict[str, Any]:
+        """Return the attributes of a representation, ex. the content of {'m2m:cin': {...}}, or {}.
+        """
+        if isinstance(rep, dict):
+            for content in rep.values():
+                if isinstance(content, dict):
+                    return content
+
+        return {}
+
+    @property
+    def resource(self) -> Optional[OneM2MResource]:
+        """The representation as a resource, ex. a ContentInstance, or None.  A resource ID sent instead
+        of the representation (nct 3) is retrieved, see fetch().  On an event loop it must have been fetched
+        first, see get().
+        """
+        if self._resource is self._UNSET:
+            rep = self.rep
+            if not self._attributes(rep):
+                self._check_fetch('The representation')
+                rep = self.fetch()
+            self._resource = None
+            if isinstance(rep, dict):
+                for short_name, content in rep.items():
+                    if isinstance(content, dict):
+                        # Copy, as resources adopt the attribute dict they are given.
+                        if short_name in self.RESOURCE_TYPES:
+                            self._resource = self.RESOURCE_TYPES[short_name](dict(content))
+                        else:
+                            self._resource = OneM2MResource(short_name, dict(content))
+                        break
+
+        return self._resource
+
+    @property
+    def content(self) -> Any:
+        """The content (con) of the representation.  Content sent as a JSON string is decoded.  Content
+        missing from the representation is retrieved, see get().
+        """
+        if self._content is self._UNSET:
+            con = self.get('con')
+
+            if isinstance(con, str) and con[:1] in ('{', '['):
+                try:
+                    con = json.loads(con)
+                except ValueError:
+                    pass
+
+            self._content = con
+
+        return self._content
+
+    @property
+    def creator(self) -> Optional[str]:
+        """The creator (cr) of the notification or, if it has none, of the represented resource.
+        """
+        cr = self.sgn.get('cr')
+        if cr is None:
+            return self.attributes.get('cr')
+
+        return cr
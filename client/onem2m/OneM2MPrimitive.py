@@ -7,6 +7,7 @@ from client.onem2m.http.HttpHeader import HttpHeader
 from client.onem2m.http.HttpStatusCode import HttpStatusCode
 
 import json
+from decimal import Decimal
 from enum import Enum, unique
 
 class OneM2MPrimitive:
@@ -218,6 +219,24 @@ class OneM2MPrimitive:
         RetrieveOfContainerResourceWithNoChildResource = 5
 
 
+    @unique
+    class M2M_NOTIFICATION_CONTENT_TYPES(Enum):
+        AllAttributes                         = 1
+        ModifiedAttributes                    = 2
+        ResourceID                            = 3
+
+
+    @staticmethod
+    def duration(seconds: float) -> str:
+        """Return a number of seconds as an xs:duration, ex. 'PT600S' or 'PT1234567.5S'.  Written in fixed
+        point, as xs:duration has no exponent.
+        """
+        text = format(Decimal(repr(float(seconds))), 'f')
+        if '.' in text:
+            text = text.rstrip('0').rstrip('.')
+
+        return 'PT{}S'.format(text)
+
     def __str__(self):
         return json.dumps(self.__dict__)
 
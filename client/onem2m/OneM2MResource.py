@@ -4,7 +4,7 @@
 
 import json
 
-from typing import Dict, Any
+from typing import Callable, Dict, Any
 
 OneM2MResourceContent = Dict[str, Any]
 
@@ -14,19 +14,94 @@ class OneM2MResource:
 
     M2M_TYPE_CONTAINER = '3'
 
+    # Serialization codecs.  Only JSON is currently supported by the http binding.
+    CODEC_JSON = 'json'
+
+    # Codec to encoder map.  Encoders take the wrapped resource, ex. {'m2m:cin': {...}}, and return bytes.
+    ENCODERS: Dict[str, Callable[[OneM2MResourceContent], bytes]] = {
+        CODEC_JSON: lambda data: json.dumps(data).encode('utf-8'),
+    }
+
+    # The encoded body cache lives in a slot so that it never shows up in the resource attributes (__dict__).
+    __slots__ = ('__dict__', '_encoded')
+
+    _encoded: Dict[str, bytes]
+
     ri = None
 
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls)
+        # Derived classes may set attributes before calling the base constructor.
+        object.__setattr__(instance, '_encoded', {})
+        return instance
+
     def __init__(self, short_name: str, dict: OneM2MResourceContent = None):
         # Resource short name will be set in derived class constructor.
         if dict is not None:
             self.__dict__ = dict
         self.short_name = short_name
 
+    def __getstate__(self):
+        # Copies and unpickled resources get an empty cache of their own from __new__, never the original's.
+        return self.__dict__
+
+    def __setstate__(self, state: OneM2MResourceContent):
+        object.__setattr__(self, '__dict__', dict(state))
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        self.invalidate()
+
+    def __delattr__(self, name: str):
+        super().__delattr__(name)
+        self.invalidate()
+
     def __str__(self):
         return json.dumps(self.__dict__)
 
     def get_content(self):
         return {i:self.__dict__[i] for i in self.__dict__ if i != 'short_name'}
 
+    def encode(self, codec: str = CODEC_JSON) -> bytes:
+        """Return the serialized request body for the resource, ex. b'{"m2m:cin": {...}}'.
+
+        The result is cached per codec and reused until an attribute of the resource is set or
+        deleted, so resending an unchanged resource does not serialize it again.
+
+        @note changes made to nested values (ex. resource.con['key'] = value) or directly to
+        __dict__ are not tracked.  Call invalidate() after making them.
+
+        Args:
+            codec: One of the ENCODERS keys.
+
+        Returns:
+            The encoded resource.
+        """
+        encoded = self._encoded.get(codec)
+
+        if encoded is None:
+            encoded = self.ENCODERS[codec]({self.short_name: self.get_content()})
+            self._encoded[codec] = encoded
+
+        return encoded
+
+    def copy(self, exclude=(), **attributes):
+        """Return a shallow copy of the resource, ex. to send it with a different operation.
+
+        Args:
+            exclude: Names of attributes to leave out of the copy, ex. ('rn',) for an update.
+            attributes: Attributes to set on the copy.
+        """
+        clone = type(self).__new__(type(self))
+        content = {k: v for k, v in self.__dict__.items() if k not in exclude}
+        content.update(attributes)
+        clone.__dict__ = content
+        return clone
+
+    def invalidate(self):
+        """Discard any cached serialized bodies.
+        """
+        self._encoded.clear()
+
 
-# @todo add resouce short name not set exception for OneM2MRequest class to raise.
\ No newline at end of file
+# @todo add resouce short name not set exception for OneM2MRequest class to raise.
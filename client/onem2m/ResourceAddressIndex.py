@@ -0,0 +1,199 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import threading
+
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+
+class ResourceAddressIndex:
+    """Bidirectional index between resource IDs (ri) and hierarchical (structured) paths.
+
+    The CSE, notifications and discovery hand back a mix of address forms:
+
+        cin64bb897a0006ee                       CSE-relative unstructured (ri)
+        /PN_CSE/cin64bb897a0006ee               SP-relative unstructured
+        /PN_CSE/C5def67ad000190/cnt-00001       structured
+        ~/355808100064390/metersvc/reads        SP-relative, addressed to another CSE
+        http://host:port/PN_CSE/...             any of the above as a URL
+
+    Addresses are normalized to their path, ex. '/PN_CSE/C5def67ad000190/cnt-00001', or to a
+    bare ri.  The index is filled from create and retrieve responses (see learn_response) and is
+    safe to share between the listener thread and the main thread.  It holds at most max_entries
+    resources; the least recently added or looked up are evicted.
+    """
+
+    # Resource wrappers that do not contain a resource.
+    M2M_URI                 = 'm2m:uri'
+    M2M_RESOURCE_CONTAINING = 'm2m:rce'
+
+    def __init__(self, max_entries: int = 100000):
+        """Constructor.
+
+        Args:
+            max_entries: Maximum number of resources indexed.
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Least recently used first.
+        self._path_by_ri: 'OrderedDict[str, str]' = OrderedDict()
+        self._ri_by_path: Dict[str, str] = {}
+
+        # Counters.
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._path_by_ri)
+
+    @staticmethod
+    def normalize(address: str) -> str:
+        """Return the path component of an address without scheme, host, query or trailing '/'.
+
+        SP-relative addresses are returned with a leading '/' (ex. '/~/355808100064390/metersvc')
+        and a bare ri is returned unchanged.
+        """
+        if '://' in address:
+            address = urlsplit(address).path
+        else:
+            address = address.split('?', 1)[0]
+
+        if address.startswith('~/'):
+            address = '/' + address
+
+        if len(address) > 1:
+            address = address.rstrip('/')
+
+        return address
+
+    @staticmethod
+    def is_unstructured(address: str) -> bool:
+        """Whether a normalized address is a bare resource ID.
+        """
+        return '/' not in address
+
+    def add(self, ri: str, path: str):
+        """Record that the resource ri lives at path.
+        """
+        path = self.normalize(path)
+
+        with self._lock:
+            old_path = self._path_by_ri.pop(ri, None)
+            if old_path is not None:
+                self._ri_by_path.pop(old_path, None)
+            old_ri = self._ri_by_path.pop(path, None)
+            if old_ri is not None:
+                self._path_by_ri.pop(old_ri, None)
+
+            self._path_by_ri[ri] = path
+            self._ri_by_path[path] = ri
+
+            while len(self._path_by_ri) > self.max_entries:
+                _, evicted = self._path_by_ri.popitem(last=False)
+                self._ri_by_path.pop(evicted, None)
+                self.evicted += 1
+
+    def remove(self, address: str):
+        """Forget a resource and every resource beneath it, ex. after a delete.
+        """
+        path = self.path(address)
+        if path is None:
+            return
+
+        with self._lock:
+            prefix = path + '/'
+            for child in [p for p in self._ri_by_path if p == path or p.startswith(prefix)]:
+                self._path_by_ri.pop(self._ri_by_path.pop(child), None)
+
+    def path(self, address: str) -> Optional[str]:
+        """Return the hierarchical path of an address, or None if it is not known.
+        """
+        address = self.normalize(address)
+
+        with self._lock:
+            ri = self._ri_by_path.get(address)
+            if ri is not None:
+                self._path_by_ri.move_to_end(ri)
+                return address
+
+            # Unstructured: <ri>, /<ri> or SP-relative /PN_CSE/<ri>.
+            segments = address.lstrip('/').split('/')
+            if len(segments) <= 2:
+                path = self._path_by_ri.get(segments[-1])
+                if path is not None:
+                    self._path_by_ri.move_to_end(segments[-1])
+                return path
+
+        return None
+
+    def ri(self, address: str) -> Optional[str]:
+        """Return the resource ID of an address, or None if it is not known.
+        """
+        path = self.path(address)
+
+        return None if path is None else self._ri_by_path.get(path)
+
+    def resolve(self, address: str) -> str:
+        """Return the hierarchical path of an address if it is known, otherwise the normalized
+        address.  Use to compare notification 'sur' values with subscription URIs.
+        """
+        return self.path(address) or self.normalize(address)
+
+    def shortest(self, address: str) -> str:
+        """Return the shortest known form of an address, ie. the ri when one is known, as the
+        CSE can then locate the resource without walking the resource tree.
+        """
+        address = self.normalize(address)
+        ri = self.ri(address)
+
+        return ri if ri is not None and len(ri) < len(address) else address
+
+    def learn(self, resource: Mapping[str, Any], path: Optional[str] = None, parent: Optional[str] = None):
+        """Index a resource representation, ex. the content of {'m2m:cin': {...}}.
+
+        Args:
+            resource: The resource attributes.  Must contain 'ri'.
+            path: The resource's own path, if known (ex. the target of a retrieve).
+            parent: The parent's path, if known (ex. the target of a create).  Otherwise the
+                resource's 'pi' is looked up in the index.
+        """
+        ri = resource.get('ri')
+        rn = resource.get('rn')
+
+        if not isinstance(ri, str):
+            return
+
+        # A target such as /PN_CSE/<ri> addressed the resource by ID rather than by name.
+        if path is not None and rn is not None and rn != ri and self.normalize(path).rsplit('/', 1)[-1] == ri:
+            path = None
+
+        if path is None and rn is not None:
+            if parent is None and resource.get('pi') is not None:
+                parent = self.path(resource['pi'])
+            if parent is not None and not self.is_unstructured(self.normalize(parent)):
+                path = self.normalize(parent) + '/' + rn
+
+        if path is not None and not self.is_unstructured(self.normalize(path)):
+            self.add(ri, path)
+
+    def learn_response(self, pc: Any, path: Optional[str] = None, parent: Optional[str] = None):
+        """Index the resource returned in a response's primitive content.
+
+        Args:
+            pc: The response content, ex. {'m2m:cnt': {...}} or {'m2m:rce': {'uri': ..., 'm2m:cnt': {...}}}.
+            path: The target of the request when it addressed the resource itself (retrieve, update).
+            parent: The target of the request when it addressed the parent (create).
+        """
+        if not isinstance(pc, dict):
+            return
+
+        if self.M2M_RESOURCE_CONTAINING in pc and isinstance(pc[self.M2M_RESOURCE_CONTAINING], dict):
+            pc = pc[self.M2M_RESOURCE_CONTAINING]
+            path = pc.get('uri', path)
+
+        for name, resource in pc.items():
+            # Resource wrappers are namespaced, ex. 'm2m:cin' or 'lco:lcocs'.
+            if ':' in name and name != self.M2M_URI and isinstance(resource, dict):
+                self.learn(resource, path, parent)
@@ -0,0 +1,131 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import sys, struct
+
+from array import array
+from collections.abc import Sequence
+from typing import Iterable, Iterator
+
+
+class UriList(Sequence):
+    """Compact, read-only store for a list of URIs (m2m:uril), ex. discovery results.
+
+    URIs returned by discovery share long prefixes (/PN_CSE/nod-015322009906000/...), so
+    each entry is front coded: only the length of the prefix it shares with the previous
+    entry and the remaining suffix are stored, in a single bytes buffer.  Every
+    RESTART_INTERVAL entries the full URI is stored so that random access only decodes
+    a handful of entries.  Order is preserved and the list behaves like any other sequence
+    of str.
+    """
+
+    SHORT_NAME = 'm2m:uril'
+
+    # Number of entries between fully stored URIs.
+    RESTART_INTERVAL = 16
+
+    # Each entry is the shared prefix length followed by the suffix bytes.
+    _PREFIX = struct.Struct('<H')
+
+    def __init__(self, uris: Iterable[str] = ()):
+        """Constructor.
+
+        Args:
+            uris: The URIs to store, ex. response.pc['m2m:uril'].
+        """
+        data = bytearray()
+        # Offset of each entry in data, plus a trailing offset marking the end of the last entry.
+        offsets = array('I')
+        previous = b''
+
+        for i, uri in enumerate(uris):
+            encoded = uri.encode('utf-8')
+
+            if i % self.RESTART_INTERVAL == 0:
+                shared = 0
+            else:
+                shared = min(self._shared_prefix(previous, encoded), 0xffff)
+
+            offsets.append(len(data))
+            data += self._PREFIX.pack(shared)
+            data += encoded[shared:]
+            previous = encoded
+
+        offsets.append(len(data))
+
+        self._data = bytes(data)
+        self._offsets = offsets
+
+    @staticmethod
+    def _shared_prefix(a: bytes, b: bytes) -> int:
+        """Return the length of the common prefix of a and b.  Binary search on slices keeps
+        the comparisons in C rather than looping over each byte.
+        """
+        low, high = 0, min(len(a), len(b))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if a[low:middle] == b[low:middle]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _decode(self, start: int, stop: int) -> Iterator[bytes]:
+        """Yield the encoded URIs of entries start..stop-1.  start must be a restart point.
+        """
+        data = self._data
+        offsets = self._offsets
+        size = self._PREFIX.size
+        value = b''
+
+        for i in range(start, stop):
+            offset = offsets[i]
+            shared = self._PREFIX.unpack_from(data, offset)[0]
+            value = value[:shared] + data[offset + size:offsets[i + 1]]
+            yield value
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        length = len(self)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError('UriList index out of range')
+
+        restart = index - index % self.RESTART_INTERVAL
+        for value in self._decode(restart, index + 1):
+            pass
+
+        return value.decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for value in self._decode(0, len(self)):
+            yield value.decode('utf-8')
+
+    def __eq__(self, other):
+        if isinstance(other, (UriList, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return 'UriList({} URIs, {} bytes)'.format(len(self), self.nbytes)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the encoded URIs and their offsets.
+        """
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+    def rn(self, index: int) -> str:
+        """Return the final path segment of a URI, ex. 'nod-015322009906000'.
+
+        Segments are interned, so per-node maps built from several lists share a single
+        copy of each key.
+        """
+        return sys.intern(self[index].rsplit('/', 1)[-1])
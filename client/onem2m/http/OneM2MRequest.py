@@ -382,17 +382,14 @@ class OneM2MRequest(OneM2MPrimitive):
 
         # Extract entity members as dict.
         if isinstance(content, OneM2MResource):
-            # Wrap the entity in a container json object
-            # entity_name = content.__class__.__name__.lower()
+            # Wrap the entity in a container json object and serialize it.  Unchanged resources
+            # reuse the previously encoded body.
             # @todo raise an ShortNameNotSet (OneM2MResource) expection.
-            entity_name = content.short_name
-            data = {entity_name: content.get_content()}
-
-            # Serialize dict. @todo data serialization must be dictated by content-type
-            json_data = json.dumps(data)
+            # @todo data serialization must be dictated by content-type
+            data = content.encode(OneM2MResource.CODEC_JSON)
 
             # HTTP POST implied by OneM2M Create Operation (function signature).
-            http_response = requests.post(to, headers = headers, data=json_data, verify=False)
+            http_response = requests.post(to, headers = headers, data=data, verify=False)
         else:
             # HTTP POST implied by OneM2M Create Operation (function signature).
             http_response = requests.post(to, headers = headers, verify=False)
@@ -427,18 +424,15 @@ class OneM2MRequest(OneM2MPrimitive):
 
         # Set the content type for the request.
         # @todo move this to member with setter function.
-        headers[HttpHeader.CONTENT_TYPE] = OneM2MPrimitive.CONTENT_TYPE_JSON + '; ty=' + str(params['ty'])
+        headers[HttpHeader.CONTENT_TYPE] = self._get_content_type(params)
 
         # Extract entity members as dict.
         if isinstance(content, OneM2MResource):
-            entity_name = content.short_name
-            data = {entity_name: content.get_content()}
-
-            # Serialize dict. @todo data serialization must be dictated by content-type
-            json_data = json.dumps(data)
+            # Serialize the wrapped entity.  @todo data serialization must be dictated by content-type
+            data = content.encode(OneM2MResource.CODEC_JSON)
 
             # HTTP POST implied by OneM2M Create Operation (function signature).
-            http_response = requests.put(to, headers=headers, data=json_data)
+            http_response = requests.put(to, headers=headers, data=data)
 
             # Return a OneM2MResponse instance.
             return OneM2MResponse(http_response)
@@ -472,7 +466,7 @@ class OneM2MRequest(OneM2MPrimitive):
 
         # Set the content type for the request.
         # @todo move this to member with setter function.
-        headers[HttpHeader.CONTENT_TYPE] = OneM2MPrimitive.CONTENT_TYPE_JSON + '; ty=' + str(params['ty'])
+        headers[HttpHeader.CONTENT_TYPE] = self._get_content_type(params)
 
         # HTTP GET implied by OneM2M retrieve Operation (function signature).
         http_response = requests.get(to, headers=headers, verify=False)
@@ -503,7 +497,7 @@ class OneM2MRequest(OneM2MPrimitive):
 
         # Set the content type for the request.
         # @todo move this to member with setter function.
-        headers[HttpHeader.CONTENT_TYPE] = OneM2MPrimitive.CONTENT_TYPE_JSON + '; ty=' + str(params['ty'])
+        headers[HttpHeader.CONTENT_TYPE] = self._get_content_type(params)
 
         # HTTP POST implied by OneM2M Create Operation (function signature).
         http_response = requests.delete(to, headers=headers)
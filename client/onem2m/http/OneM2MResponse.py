@@ -126,5 +126,6 @@ class OneM2MResponse(OneM2MPrimitive):
             print('{} Request ID: {}'.format(name, self.rqi))
 
         if self.pc:
-            print('{} Response body:\n{}'.format(name, json.dumps(self.pc, indent=2)))
+            # Compact containers (ex. UriList) are dumped as plain lists.
+            print('{} Response body:\n{}'.format(name, json.dumps(self.pc, indent=2, default=list)))
 
@@ -1,6 +1,124 @@
 from client.onem2m.OneM2MResource import OneM2MResource, OneM2MResourceContent
+from client.onem2m.OneM2MPrimitive import OneM2MPrimitive
+from client.exceptions.InvalidArgumentException import InvalidArgumentException
 
+from enum import Enum
+from typing import Optional, Union
 
+# {
+#     "enc": {
+#         "net": [3],
+#         "chty": [4],
+#         "sza": 1024,
+#         "md": {"num": 5, "dur": "PT600S"}
+#     }
+# }
 class EventNotificationCriteria(OneM2MResource):
-    def __init__(self, enc: OneM2MResourceContent):
-        super().__init__('enc', enc)
+    """The eventNotificationCriteria (enc) of a subscription, ie. the conditions the CSE checks before
+    sending a notification, so that notifications the AE would discard are never sent.
+
+    Criteria are set with chainable methods, ex.
+
+        EventNotificationCriteria().event_types(3).child_types(4).size_above(1024).missing_data(5, 600)
+
+    The CSE sends a notification only when every criterion set is met.
+    """
+
+    # Criteria attributes, TS-0004 6.3.5.8.
+    M2M_ATTR_CREATED_BEFORE     = 'crb'
+    M2M_ATTR_CREATED_AFTER      = 'cra'
+    M2M_ATTR_MODIFIED_SINCE     = 'ms'
+    M2M_ATTR_UNMODIFIED_SINCE   = 'us'
+    M2M_ATTR_SIZE_ABOVE         = 'sza'
+    M2M_ATTR_SIZE_BELOW         = 'szb'
+    M2M_ATTR_EVENT_TYPE         = 'net'
+    M2M_ATTR_ATTRIBUTE          = 'atr'
+    M2M_ATTR_CHILD_TYPE         = 'chty'
+    M2M_ATTR_MISSING_DATA       = 'md'
+
+    def __init__(self, enc: Optional[OneM2MResourceContent] = None):
+        super().__init__('enc', enc if enc is not None else {})
+
+    @staticmethod
+    def _values(values) -> list:
+        # Enum members, ex. M2M_NOTIFICATION_EVENT_TYPES, are sent as their value.
+        return [value.value if isinstance(value, Enum) else value for value in values]
+
+    def event_types(self, *net: Union[int, OneM2MPrimitive.M2M_NOTIFICATION_EVENT_TYPES]) -> 'EventNotificationCriteria':
+        """Notify only these events, ex. 3 (M2M_NOTIFICATION_EVENT_TYPES.CreateOfDirectChildResource).
+        """
+        self.net = self._values(net)
+        return self
+
+    def attributes(self, *atr: str) -> 'EventNotificationCriteria':
+        """Notify updates of the subscribed-to resource only when one of these attributes changes, ex. 'mni'.
+        """
+        self.atr = list(atr)
+        return self
+
+    def child_types(self, *chty: Union[int, OneM2MPrimitive.M2M_RESOURCE_TYPES]) -> 'EventNotificationCriteria':
+        """Notify the creation or deletion of child resources only for these resource types, ex. 4
+        (M2M_RESOURCE_TYPES.ContentInstance).
+        """
+        self.chty = self._values(chty)
+        return self
+
+    def size_above(self, size: int) -> 'EventNotificationCriteria':
+        """Notify only resources whose content size (cs) is at least size bytes.
+
+        Raises:
+            InvalidArgumentException: If size is negative or not below a size_below() threshold.
+        """
+        if size < 0 or size >= self.__dict__.get(self.M2M_ATTR_SIZE_BELOW, size + 1):
+            raise InvalidArgumentException('Invalid size_above {}'.format(size))
+
+        self.sza = size
+        return self
+
+    def size_below(self, size: int) -> 'EventNotificationCriteria':
+        """Notify only resources whose content size (cs) is below size bytes.
+
+        Raises:
+            InvalidArgumentException: If size is not positive or not above a size_above() threshold.
+        """
+        if size <= 0 or size <= self.__dict__.get(self.M2M_ATTR_SIZE_ABOVE, -1):
+            raise InvalidArgumentException('Invalid size_below {}'.format(size))
+
+        self.szb = size
+        return self
+
+    def created_before(self, timestamp: str) -> 'EventNotificationCriteria':
+        """Notify only resources created before timestamp, ex. '20211106T014934'.
+        """
+        self.crb = timestamp
+        return self
+
+    def created_after(self, timestamp: str) -> 'EventNotificationCriteria':
+        """Notify only resources created after timestamp, ex. '20211106T014934'.
+        """
+        self.cra = timestamp
+        return self
+
+    def modified_since(self, timestamp: str) -> 'EventNotificationCriteria':
+        """Notify only resources modified since timestamp, ex. '20211106T014934'.
+        """
+        self.ms = timestamp
+        return self
+
+    def unmodified_since(self, timestamp: str) -> 'EventNotificationCriteria':
+        """Notify only resources not modified since timestamp, ex. '20211106T014934'.
+        """
+        self.us = timestamp
+        return self
+
+    def missing_data(self, num: int, duration: float) -> 'EventNotificationCriteria':
+        """Notify when num expected contentInstances of a time series are missing within duration seconds.
+
+        Raises:
+            InvalidArgumentException: If num or duration is not positive.
+        """
+        if num <= 0 or duration <= 0:
+            raise InvalidArgumentException('Invalid missing_data num {} duration {}'.format(num, duration))
+
+        self.md = {'num': num, 'dur': OneM2MPrimitive.duration(duration)}
+        return self
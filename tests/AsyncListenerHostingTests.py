@@ -0,0 +1,86 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import json, unittest
+import requests
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+from tests.ListenerTestCase import ListenerTestCase
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+
+class AsyncListenerHostingTests(ListenerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.received = []
+
+    def _receiver(self, name: str):
+        async def receive(notification, res):
+            self.received.append((name, notification.sur))
+
+        return receive
+
+    def _notify(self, url: str, sur: str = SUR) -> int:
+        body = json.dumps({'m2m:sgn': {'sur': sur}})
+        return requests.post(url, data=body, headers={'Content-Type': 'application/json'}).status_code
+
+    def _hosting(self, backend: str):
+        self.start_listener(backend=backend)
+
+        meterread = self.listener.host_ae('meterread')
+        summary = self.listener.host_ae('metersummary')
+        self.assertEqual(meterread, 'http://127.0.0.1:{}/notify/meterread'.format(self.port))
+
+        # The same subscription reference is routed by the AE whose poa it was sent to.
+        self.listener.set_rqi_cb('/PN_CSE/nod-*/metersvc/**', self._receiver('meterread'), CallbackMode.NOTIFICATION, ae='meterread')
+        self.listener.set_rqi_cb(SUR, self._receiver('metersummary'), CallbackMode.NOTIFICATION, ae='metersummary')
+        self.listener.set_rqi_cb(SUR, self._receiver('listener'), CallbackMode.NOTIFICATION)
+
+        self.assertEqual(self._notify(meterread), 200)
+        self.assertEqual(self._notify(summary), 200)
+        self.assertEqual(self._notify('http://127.0.0.1:{}/notify'.format(self.port)), 200)
+        self.assertEqual(self._notify(summary, '/PN_CSE/other/sub-00001'), 404)
+        self.assertEqual(self._notify('http://127.0.0.1:{}/notify/standingdata'.format(self.port)), 404)
+
+        self.assertEqual([('meterread', SUR), ('metersummary', SUR), ('listener', SUR)], self.received)
+        self.assertEqual(set(self.listener.metrics()['hosted']), {'meterread', 'metersummary'})
+
+        self.listener.unhost_ae('meterread')
+        self.assertEqual(self._notify(meterread), 404)
+
+    def test_hosting_aiohttp(self):
+        """host_ae(): Each hosted AE has its own poa and callbacks, on the aiohttp backend."""
+        print(self.shortDescription())
+
+        self._hosting(AsyncResponseListenerFactory.BACKEND_AIOHTTP)
+
+    def test_hosting_asyncio(self):
+        """host_ae(): Each hosted AE has its own poa and callbacks, on the asyncio backend."""
+        print(self.shortDescription())
+
+        self._hosting(AsyncResponseListenerFactory.BACKEND_ASYNCIO)
+
+    def test_invalid_ae(self):
+        """host_ae(), set_rqi_cb(): AEs must be hosted under a single path segment before callbacks are set."""
+        print(self.shortDescription())
+
+        self.start_listener()
+
+        with self.assertRaises(ValueError):
+            self.listener.host_ae('meter/read')
+        with self.assertRaises(ValueError):
+            self.listener.set_rqi_cb(SUR, self._receiver('meterread'), ae='meterread')
+
+        self.listener.host_ae('meterread')
+        self.listener.set_rqi_cb(SUR, self._receiver('meterread'), ae='meterread')
+        self.assertIsNotNone(self.listener.get_rqi_cb(SUR, ae='meterread'))
+        self.assertIsNone(self.listener.get_rqi_cb(SUR))
+
+        self.listener.remove_rqi_cb(SUR, ae='meterread')
+        self.assertIsNone(self.listener.get_rqi_cb(SUR, ae='meterread'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,528 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, json, os, tempfile, threading, time, unittest
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from unittest import mock
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+from client.ae.NotificationQueue import NotificationQueue
+from tests.ListenerTestCase import ListenerTestCase
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+PRIORITY = '/PN_CSE/nod-015322009906000/metersvc/alarms/sub-00001'
+
+
+def write_pid(notification):
+    # Run on the listener's process pool.
+    with open(notification.content, 'w') as f:
+        f.write(str(os.getpid()))
+
+
+class AsyncListenerQueueTests(ListenerTestCase):
+    def _start(self, ack_first: bool = True, **options):
+        return self.start_listener(ack_first=ack_first, **options)
+
+    def _notify(self, i: int = 0, sur: str = SUR) -> requests.Response:
+        body = json.dumps({'m2m:sgn': {'sur': sur, 'nev': {'rep': {'m2m:cin': {'con': i}}}}})
+        headers = {'Content-Type': 'application/json', 'X-M2M-RI': 'rqi-{}'.format(i)}
+        return requests.post(self.url, data=body, headers=headers)
+
+    def test_ack_before_callback(self):
+        """_handler(): In ack_first mode notifications are acknowledged before slow callbacks finish."""
+        print(self.shortDescription())
+
+        handled = []
+
+        async def slow(req, res):
+            await asyncio.sleep(0.5)
+            body = await req.json()
+            handled.append(body['m2m:sgn']['nev']['rep']['m2m:cin']['con'])
+            return res
+
+        self._start()
+        self.listener.set_rqi_cb(SUR, slow)
+
+        start = time.monotonic()
+        response = self._notify(7)
+
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-M2M-RSC'], '2000')
+        self.assertEqual(response.headers['X-M2M-RI'], 'rqi-7')
+
+        time.sleep(0.8)
+        self.assertEqual(handled, [7])
+        self.assertEqual(self.listener.metrics()['queue']['processed'], 1)
+
+    def _fill(self, overflow: str) -> List[int]:
+        """Send 4 notifications to a listener that queues 1 while its worker is blocked.  Returns the statuses.
+        """
+        release = []
+
+        async def blocked(req, res):
+            while not release:
+                await asyncio.sleep(0.01)
+
+        self._start(queue_size=1, queue_workers=1, overflow=overflow)
+        self.listener.set_rqi_cb(SUR, blocked)
+
+        statuses = [self._notify(i).status_code for i in range(4)]
+        release.append(True)
+        return statuses
+
+    def test_reject_when_full(self):
+        """_handler(): Notifications that do not fit in the queue are answered with 503."""
+        print(self.shortDescription())
+
+        # One in the worker, one queued.
+        self.assertEqual(self._fill(NotificationQueue.OVERFLOW_REJECT), [200, 200, 503, 503])
+        self.assertEqual(self.listener.metrics()['queue']['rejected'], 2)
+
+    def test_drop_newest_when_full(self):
+        """_handler(): Notifications dropped by the drop_newest policy are answered with 503, not acknowledged."""
+        print(self.shortDescription())
+
+        self.assertEqual(self._fill(NotificationQueue.OVERFLOW_DROP_NEWEST), [200, 200, 503, 503])
+        self.assertEqual(self.listener.metrics()['queue']['dropped'], 2)
+
+    def test_shed_above_high_watermark(self):
+        """_handler(): Above the high watermark notifications are answered with 503 and Retry-After."""
+        print(self.shortDescription())
+
+        release = []
+
+        async def blocked(req, res):
+            while not release:
+                await asyncio.sleep(0.01)
+
+        self._start(queue_workers=1, high_watermark=3, retry_after=7, priority_surs=[PRIORITY])
+        self.listener.set_rqi_cb(SUR, blocked)
+        self.listener.set_rqi_cb(PRIORITY, blocked)
+
+        responses = [self._notify(i) for i in range(5)]
+        priority = self._notify(5, PRIORITY)
+        release.append(True)
+
+        self.assertEqual([r.status_code for r in responses], [200, 200, 200, 503, 503])
+        self.assertEqual(responses[3].headers['Retry-After'], '7')
+        self.assertEqual(priority.status_code, 200)
+
+        metrics = self.listener.metrics()['backpressure']
+        self.assertEqual(metrics['shed'], 2)
+        self.assertEqual(metrics['priority_admitted'], 1)
+
+    def test_ordered_lanes(self):
+        """_handler(): With lanes, callbacks for one subscription run in arrival order."""
+        print(self.shortDescription())
+
+        handled = []
+
+        async def handle(req, res):
+            body = await req.json()
+            i = body['m2m:sgn']['nev']['rep']['m2m:cin']['con']
+            # Later notifications finish faster, so unordered handling would reverse them.
+            await asyncio.sleep((10 - i) / 100)
+            handled.append(i)
+
+        self._start(queue_workers=4, lanes=4)
+        self.listener.set_rqi_cb(SUR, handle)
+
+        for i in range(10):
+            self.assertEqual(self._notify(i).status_code, 200)
+
+        for _ in range(100):
+            if len(handled) == 10:
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(handled, list(range(10)))
+        lanes = self.listener.metrics()['lanes']
+        self.assertEqual(sum(lane['processed'] for lane in lanes), 10)
+
+    def test_notification_callbacks(self):
+        """_handler(): Notification callbacks get the decoded notification and are acknowledged."""
+        print(self.shortDescription())
+
+        handled = []
+
+        async def handle(notification, res):
+            handled.append((notification.sur, notification.content))
+
+        self._start(ack_first=False)
+        self.listener.set_rqi_cb(SUR, handle, CallbackMode.NOTIFICATION)
+
+        response = self._notify(3)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-M2M-RSC'], '2000')
+        self.assertEqual(response.headers['X-M2M-RI'], 'rqi-3')
+        self.assertEqual(handled, [(SUR, 3)])
+
+    def test_prefetch_resource_id_only(self):
+        """_handler(): Resources sent only by ID are fetched off the event loop before a coroutine callback."""
+        print(self.shortDescription())
+
+        handled = []
+        fetched_on = []
+        rep = {'m2m:cin': {'ri': 'cin123', 'con': 5}}
+
+        def retrieve_address(address):
+            fetched_on.append(threading.current_thread().name)
+            return mock.Mock(pc=rep)
+
+        async def handle(notification, res):
+            handled.append(notification.content)
+
+        cse = mock.Mock(addresses=None, retrieve_address=retrieve_address)
+        self._start(ack_first=False, cse=cse)
+        self.listener.set_rqi_cb(SUR, handle, CallbackMode.NOTIFICATION)
+
+        body = json.dumps({'m2m:sgn': {'sur': SUR, 'nev': {'rep': 'cin123', 'net': 3}}})
+        response = requests.post(self.url, data=body, headers={'Content-Type': 'application/json'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(handled, [5])
+        self.assertEqual(len(fetched_on), 1)
+        self.assertNotEqual(fetched_on[0], self.listener.name)
+
+    def test_raw_callbacks(self):
+        """_handler(): Raw callbacks get the undecoded body."""
+        print(self.shortDescription())
+
+        handled = []
+
+        async def handle(raw, res):
+            handled.append(raw)
+
+        self._start(ack_first=False)
+        self.listener.set_rqi_cb(SUR, handle, CallbackMode.RAW)
+
+        response = self._notify(4)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(handled[0])['m2m:sgn']['sur'], SUR)
+        self.assertEqual(self.listener.metrics()['sur_scanned'], 1)
+
+    def test_callback_registry(self):
+        """set_rqi_cb(), remove_rqi_cb(): Callbacks belong to the instance and can be removed or one shot."""
+        print(self.shortDescription())
+
+        async def handle(raw, res):
+            pass
+
+        self._start(ack_first=False)
+        self.listener.set_rqi_cb(SUR, handle, CallbackMode.RAW, one_shot=True)
+        self.listener.set_rqi_cb(PRIORITY, handle, CallbackMode.RAW, et='20991231T235959')
+
+        other = AsyncResponseListenerFactory._AsyncResponseListenerFactory__AsyncResponseListener('127.0.0.1', 0)
+        self.assertEqual(len(other.routes), 0)
+
+        self.assertEqual(self._notify(0).status_code, 200)
+        self.assertEqual(self._notify(1).headers['X-M2M-RSC'], '4004')
+
+        self.listener.remove_rqi_cb(PRIORITY)
+        self.assertEqual(self._notify(2, PRIORITY).status_code, 404)
+
+        metrics = self.listener.metrics()['routes']
+        self.assertEqual(metrics['removed'], 1)
+        self.assertEqual(len(self.listener.routes), 0)
+
+    def _notify_batch(self, items: list, rqi: str = 'rqi-agn') -> requests.Response:
+        sgns = [{'sur': sur, 'nev': {'rep': {'m2m:cin': {'con': i}}}} for i, sur in items]
+        body = json.dumps({'m2m:agn': {'m2m:sgn': sgns}})
+        headers = {'Content-Type': 'application/json', 'X-M2M-RI': rqi}
+        return requests.post(self.url, data=body, headers=headers)
+
+    def test_aggregated_notifications(self):
+        """_handler(): Aggregated notifications are split and dispatched singly or as a batch."""
+        print(self.shortDescription())
+
+        singles = []
+        batches = []
+
+        async def single(notification, res):
+            singles.append(notification.content)
+
+        async def batch(notifications, res):
+            batches.append([n.content for n in notifications])
+
+        self._start(ack_first=False)
+        self.listener.set_rqi_cb(SUR, single, CallbackMode.NOTIFICATION)
+        self.listener.set_rqi_cb(PRIORITY, batch, CallbackMode.BATCH)
+
+        response = self._notify_batch([(0, SUR), (1, PRIORITY), (2, SUR), (3, PRIORITY), (4, '/PN_CSE/unknown')])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-M2M-RSC'], '2000')
+        self.assertEqual(response.headers['X-M2M-RI'], 'rqi-agn')
+        self.assertEqual(singles, [0, 2])
+        self.assertEqual(batches, [[1, 3]])
+
+        metrics = self.listener.metrics()
+        self.assertEqual(metrics['aggregated'], 1)
+        self.assertEqual(metrics['split'], 5)
+        self.assertEqual(metrics['unrouted'], 1)
+
+    def test_aggregated_notifications_queued(self):
+        """_handler(): In ack_first mode an aggregated notification is queued once and keeps its order on the lanes."""
+        print(self.shortDescription())
+
+        handled = []
+
+        async def handle(req, res):
+            handled.append(req['notification'].content)
+
+        self._start(lanes=2)
+        self.listener.set_rqi_cb(SUR, handle)
+
+        self.assertEqual(self._notify_batch([(i, SUR) for i in range(5)]).status_code, 200)
+
+        for _ in range(100):
+            if len(handled) == 5:
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(handled, list(range(5)))
+        self.assertEqual(self.listener.metrics()['queue']['enqueued'], 1)
+
+    def test_dedupe(self):
+        """_handler(): Resent notifications are acknowledged without calling the callback again, unless refused."""
+        print(self.shortDescription())
+
+        handled = []
+        release = []
+
+        async def handle(notification, res):
+            while not release:
+                await asyncio.sleep(0.01)
+            handled.append(notification.attributes['ri'])
+
+        self._start(ack_first=False, dedupe_window=60, high_watermark=1)
+        self.listener.set_rqi_cb(SUR, handle, CallbackMode.NOTIFICATION)
+
+        def notify(ri):
+            body = json.dumps({'m2m:sgn': {'sur': SUR, 'nev': {'net': 3, 'rep': {'m2m:cin': {'ri': ri, 'ct': '20211106T014934'}}}}})
+            return requests.post(self.url, data=body, headers={'Content-Type': 'application/json'}, timeout=5)
+
+        release.append(True)
+        self.assertEqual(notify('cin1').status_code, 200)
+        self.assertEqual(notify('cin1').headers['X-M2M-RSC'], '2000')
+        self.assertEqual(handled, ['cin1'])
+
+        # A notification shed while another is handled is not remembered, so its resend is handled.
+        release.clear()
+        with ThreadPoolExecutor(1) as pool:
+            blocked = pool.submit(notify, 'cin2')
+            time.sleep(0.2)
+            self.assertEqual(notify('cin3').status_code, 503)
+            release.append(True)
+            blocked.result()
+
+        self.assertEqual(notify('cin3').status_code, 200)
+        self.assertEqual(handled, ['cin1', 'cin2', 'cin3'])
+        self.assertEqual(self.listener.metrics()['dedupe']['suppressed'], 1)
+
+    def test_expected_verification(self):
+        """_handler(): Pre-registered verification requests are answered without calling a callback."""
+        print(self.shortDescription())
+
+        handled = []
+
+        async def handle(notification, res):
+            handled.append(notification.sur)
+
+        self._start(ack_first=False)
+        self.listener.set_default_cb(handle, CallbackMode.NOTIFICATION)
+        self.listener.expect_verification(SUR)
+        self.listener.expect_verification('/PN_CSE/nod-*/metersvc/alarms/sub-*')
+        self.listener.accept_verifications_from('C5def67ad000190')
+
+        def verify(sur, cr='C0000'):
+            body = json.dumps({'m2m:sgn': {'vrq': True, 'sur': sur, 'cr': cr}})
+            return requests.post(self.url, data=body, headers={'Content-Type': 'application/json', 'X-M2M-RI': 'vrq'})
+
+        response = verify(SUR)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-M2M-RSC'], '2000')
+        self.assertEqual(response.headers['X-M2M-RI'], 'vrq')
+        self.assertEqual(verify(PRIORITY).status_code, 200)
+        self.assertEqual(verify('/PN_CSE/sub-other', 'C5def67ad000190').status_code, 200)
+        self.assertEqual(handled, [])
+
+        # An address is answered once; other verification requests and notifications reach the callbacks.
+        verify(SUR)
+        self._notify(0, PRIORITY)
+        self.assertEqual(handled, [SUR, PRIORITY])
+        self.assertEqual(self.listener.metrics()['verified'], 3)
+
+    def test_sync_callbacks(self):
+        """_handler(): Plain function callbacks run on the thread pool without blocking the event loop."""
+        print(self.shortDescription())
+
+        threads = set()
+
+        def blocking(notification, res):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.3)
+
+        self._start(ack_first=False, lag_interval=0.02)
+        self.listener.set_rqi_cb(SUR, blocking, CallbackMode.NOTIFICATION)
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(4) as pool:
+            responses = list(pool.map(self._notify, range(4)))
+
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual([r.headers['X-M2M-RSC'] for r in responses], ['2000'] * 4)
+        self.assertTrue(all(name.startswith('listener-callback') for name in threads))
+
+        metrics = self.listener.metrics()
+        self.assertEqual(metrics['sync_calls'], 4)
+        self.assertLess(metrics['max_loop_lag'], 0.2)
+
+    def test_cpu_bound_callbacks(self):
+        """_handler(): cpu_bound callbacks run on the process pool."""
+        print(self.shortDescription())
+
+        self._start(ack_first=False, process_workers=1)
+        with self.assertRaises(ValueError):
+            self.listener.set_rqi_cb(SUR, write_pid, cpu_bound=True)
+        self.listener.set_rqi_cb(SUR, write_pid, CallbackMode.NOTIFICATION, cpu_bound=True)
+        self.assertIs(self.listener.get_rqi_cb(SUR), write_pid)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pid')
+            response = self._notify(path)
+
+            self.assertEqual(response.headers['X-M2M-RSC'], '2000')
+            with open(path) as f:
+                self.assertNotEqual(int(f.read()), os.getpid())
+
+    def test_cpu_bound_not_forked(self):
+        """_handler(): The process pool of cpu_bound callbacks does not fork the listener's threads."""
+        print(self.shortDescription())
+
+        self._start(ack_first=False, process_workers=1)
+        self.assertIn(self.listener.process_context.get_start_method(), ('forkserver', 'spawn'))
+        self.listener.set_rqi_cb(SUR, write_pid, CallbackMode.NOTIFICATION, cpu_bound=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pid')
+            response = self._notify(path)
+
+            self.assertEqual(response.headers['X-M2M-RSC'], '2000')
+            with open(path) as f:
+                self.assertNotEqual(int(f.read()), os.getpid())
+
+    def test_expect(self):
+        """expect(): Waits for a notification by sur or predicate, from sync or async code."""
+        print(self.shortDescription())
+
+        handled = []
+
+        async def handle(notification, res):
+            handled.append(notification.content)
+
+        self._start(ack_first=False, expect_tick=0.05)
+        self.listener.set_default_cb(handle, CallbackMode.NOTIFICATION)
+
+        first = self.listener.expect(SUR, timeout=5)
+        second = self.listener.expect(SUR, timeout=5)
+        alarm = self.listener.expect(lambda n: n.content == 42, timeout=5)
+
+        self.assertEqual(self._notify(1).headers['X-M2M-RSC'], '2000')
+        self.assertEqual(first.result(1).content, 1)
+        self.assertFalse(second.done())
+
+        self._notify(2)
+        self._notify(42, PRIORITY)
+        self._notify(3)
+
+        async def wait():
+            return (await second).content, (await alarm).sur
+
+        self.assertEqual(asyncio.run(wait()), (2, PRIORITY))
+        self.assertEqual(handled, [3])
+
+    def test_expect_cancelled(self):
+        """expect(): Expectations cancelled by their caller stop matching and are removed."""
+        print(self.shortDescription())
+
+        self._start(ack_first=False)
+
+        predicate = self.listener.expect(lambda n: n.content == 42, timeout=None)
+        reference = self.listener.expect(SUR, timeout=None)
+        self.assertTrue(predicate.cancel())
+        self.assertTrue(reference.cancel())
+
+        self.assertEqual(self.listener._predicates, [])
+        self.assertEqual(len(self.listener.expectations), 0)
+        self.assertEqual(self._notify(42).headers['X-M2M-RSC'], '4004')
+
+    def test_expect_timeout(self):
+        """expect(): Expectations fail with TimeoutError and stop matching."""
+        print(self.shortDescription())
+
+        handled = []
+
+        async def handle(notification, res):
+            handled.append(notification.content)
+
+        self._start(ack_first=False, expect_tick=0.05)
+        self.listener.set_default_cb(handle, CallbackMode.NOTIFICATION)
+
+        expectations = [self.listener.expect('/PN_CSE/nod-{:06}/config/sub-00001'.format(i), timeout=0.2) for i in range(1000)]
+        with self.assertRaises(TimeoutError):
+            expectations[0].result(2)
+
+        time.sleep(0.2)
+        self.assertTrue(all(e.done() for e in expectations))
+        self.assertEqual(len(self.listener.expectations), 0)
+        self.assertEqual(self.listener.metrics()['expect_timeouts'], 1000)
+
+        self._notify(0, '/PN_CSE/nod-000000/config/sub-00001')
+        self.assertEqual(handled, [0])
+
+    def test_throughput_profile(self):
+        """AsyncResponseListenerFactory(profile): The throughput profile sets the server options and caps bodies."""
+        print(self.shortDescription())
+
+        with self.assertRaises(ValueError):
+            AsyncResponseListenerFactory('127.0.0.1', 0, profile='fastest')
+
+        async def handle(raw, res):
+            pass
+
+        self._start(ack_first=False, profile=AsyncResponseListenerFactory.PROFILE_THROUGHPUT, max_body_size=1024)
+        self.listener.set_rqi_cb(SUR, handle, CallbackMode.RAW)
+
+        self.assertEqual(self.listener.backlog, 4096)
+        self.assertFalse(self.listener.access_log)
+
+        self.assertEqual(self._notify(0).status_code, 200)
+        self.assertEqual(self._notify('x' * 2048).status_code, 413)
+
+    def test_stop(self):
+        """stop(): Closes the server and its event loop, and the listener thread exits, with either backend."""
+        print(self.shortDescription())
+
+        for backend in (AsyncResponseListenerFactory.BACKEND_AIOHTTP, AsyncResponseListenerFactory.BACKEND_ASYNCIO):
+            AsyncResponseListenerFactory.instance = None
+            self.listener = None
+            listener = self._start(ack_first=False, backend=backend)
+            self.assertEqual(self._notify().status_code, 404)
+
+            listener.stop()
+            self.assertFalse(listener.is_alive())
+            self.assertTrue(listener.loop.is_closed())
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self._notify()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import json, unittest
+import requests
+
+from client.ae.AsyncResponseListener import InvalidAsyncResponseHandlerArgument
+from tests.ListenerTestCase import ListenerTestCase
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+
+async def ack(req, res):
+    return res
+
+
+class AsyncListenerWorkersTests(ListenerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.build_listener(workers=2)
+
+    def _notify(self, sur: str) -> int:
+        body = json.dumps({'m2m:sgn': {'sur': sur}})
+        return requests.post(self.url, data=body, headers={'Content-Type': 'application/json'}).status_code
+
+    def test_callbacks_replicated_to_workers(self):
+        """set_rqi_cb(): Callbacks set before and after the workers start are served by every worker once it returns."""
+        print(self.shortDescription())
+
+        self.listener.set_rqi_cb('before', ack)
+        self.start_listener()
+        self.listener.set_rqi_cb(SUR, ack)
+
+        # New connections are spread across both workers.
+        for _ in range(10):
+            self.assertEqual(self._notify('before'), 200)
+            self.assertEqual(self._notify(SUR), 200)
+
+    def test_hosted_ae_replicated_to_workers(self):
+        """host_ae(): AEs hosted after the workers start are served by every worker."""
+        print(self.shortDescription())
+
+        self.start_listener()
+        self.url = self.listener.host_ae('meterread', '127.0.0.1')
+        self.listener.set_rqi_cb(SUR, ack, ae='meterread')
+
+        for _ in range(10):
+            self.assertEqual(self._notify(SUR), 200)
+            self.assertEqual(self._notify('other'), 404)
+
+    def test_workers_forked_by_start(self):
+        """start(): Forks the workers from the calling thread, before the listener has an event loop."""
+        print(self.shortDescription())
+
+        self.listener.start()
+        self.assertEqual(len(self.listener._processes), 2)
+        self.assertIsNone(self.listener.loop)
+        self.assertTrue(all(process.is_alive() for process in self.listener._processes))
+
+    def test_stop(self):
+        """stop(): Stops the workers, and the listener thread exits."""
+        print(self.shortDescription())
+
+        self.start_listener()
+        self.assertEqual(self._notify(SUR), 404)
+
+        self.listener.stop()
+        self.assertFalse(self.listener.is_alive())
+        self.assertFalse(any(process.is_alive() for process in self.listener._processes))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self._notify(SUR)
+
+    def test_unpicklable_callback_after_start(self):
+        """set_rqi_cb(): Closures can not be replicated once the workers have started."""
+        print(self.shortDescription())
+
+        self.start_listener()
+
+        async def closure(req, res):
+            return res
+
+        with self.assertRaises(InvalidAsyncResponseHandlerArgument):
+            self.listener.set_rqi_cb(SUR, closure)
+
+
+if __name__ == '__main__':
+    unittest.main()
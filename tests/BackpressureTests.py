@@ -0,0 +1,63 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest
+
+from client.ae.Backpressure import Backpressure
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+PRIORITY = '/PN_CSE/nod-015322009906000/metersvc/alarms/sub-00001'
+
+
+class BackpressureTests(unittest.TestCase):
+    def test_watermarks(self):
+        """should_shed(): Sheds from the high watermark until the load falls to the low watermark."""
+        print(self.shortDescription())
+
+        backpressure = Backpressure(high_watermark=10, low_watermark=5)
+
+        self.assertFalse(backpressure.should_shed(9, SUR))
+        self.assertTrue(backpressure.should_shed(10, SUR))
+        self.assertTrue(backpressure.should_shed(6, SUR))
+        self.assertFalse(backpressure.should_shed(5, SUR))
+        self.assertFalse(backpressure.should_shed(9, SUR))
+
+        self.assertEqual(backpressure.shed, 2)
+        self.assertEqual(backpressure.episodes, 1)
+
+    def test_priority(self):
+        """should_shed(): Priority subscriptions are never shed."""
+        print(self.shortDescription())
+
+        backpressure = Backpressure(high_watermark=1, priority=[PRIORITY])
+
+        self.assertTrue(backpressure.should_shed(1, SUR))
+        self.assertFalse(backpressure.should_shed(1, PRIORITY))
+        self.assertTrue(backpressure.metrics()['shedding'])
+        self.assertEqual(backpressure.priority_admitted, 1)
+
+    def test_priority_normalized(self):
+        """should_shed(): Priority subscriptions are matched whatever form their sur is given or sent in."""
+        print(self.shortDescription())
+
+        backpressure = Backpressure(high_watermark=1, priority=['http://localhost:8100' + PRIORITY + '/', '/PN_CSE/sub-00002'])
+
+        self.assertFalse(backpressure.should_shed(1, PRIORITY))
+        self.assertFalse(backpressure.should_shed(1, PRIORITY + '?rcn=1'))
+        self.assertFalse(backpressure.should_shed(1, 'sub-00002'))
+        self.assertTrue(backpressure.should_shed(1, SUR))
+        self.assertTrue(backpressure.should_shed(1, None))
+
+    def test_default_low_watermark(self):
+        """Backpressure(): The low watermark defaults to 3/4 of the high watermark."""
+        print(self.shortDescription())
+
+        self.assertEqual(Backpressure(100).low_watermark, 75)
+
+        with self.assertRaises(ValueError):
+            Backpressure(10, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,13 +2,18 @@
 
 #!/usr/bin/env python
 
-import unittest
+import unittest, requests
+
+from unittest import mock
 
 # import sys, os
 # sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from client.cse.CSE import CSE
 from client.ae.AE import AE
+from client.onem2m.OneM2MPrimitive import OneM2MPrimitive
+from client.onem2m.http.OneM2MRequest import OneM2MRequest
+from client.onem2m.resource.Container import Container
 from client.exceptions.InvalidArgumentException import InvalidArgumentException
 
 
@@ -22,4 +27,143 @@ class CSETests(unittest.TestCase):
         try:
             self.CSE.register_ae('blah')
         except InvalidArgumentException as err:
-            self.assertTrue(True)
\ No newline at end of file
+            self.assertTrue(True)
+
+    def test_get_to_prefers_known_ri(self):
+        """get_to(path): Addresses a resource by ri when prefer_unstructured is set and its ri is known."""
+        print(self.shortDescription())
+
+        cse = CSE('localhost', 8100, prefer_unstructured=True)
+        cse.addresses.add('cnt1636064176x000016', '/PN_CSE/meterread/cnt-00001')
+
+        self.assertEqual('http://localhost:8100/cnt1636064176x000016', cse.get_to('meterread/cnt-00001', with_ae=False))
+        self.assertEqual('http://localhost:8100/PN_CSE/meterread/other', cse.get_to('meterread/other', with_ae=False))
+
+
+    def _registered_cse(self):
+        cse = CSE('localhost', 8100)
+        cse.ae = AE({'api': 'Nmeterread', 'aei': 'C5def67ad000190', 'poa': [], 'ri': 'C5def67ad000190'})
+        return cse
+
+    def test_upsert_updates_known_resource(self):
+        """create_resource(upsert=True): Sends an update without rn when the resource is known to exist."""
+        print(self.shortDescription())
+
+        cse = self._registered_cse()
+        cse.existence.mark_present('/PN_CSE/meterread/map')
+
+        response = mock.Mock(pc=None)
+        with mock.patch.object(OneM2MRequest, 'update', return_value=response) as update, \
+             mock.patch.object(OneM2MRequest, 'create') as create:
+            res = cse.create_resource('meterread', None, Container({'rn': 'map', 'mia': 900}), upsert=True)
+
+        self.assertIs(response, res)
+        create.assert_not_called()
+        to, params, content = update.call_args[0]
+        self.assertEqual('http://localhost:8100/PN_CSE/meterread/map', to)
+        self.assertEqual({'mia': 900}, content.get_content())
+
+    def test_update_content_type(self):
+        """update_resource(): Sends a Content-Type without the ty parameter."""
+        print(self.shortDescription())
+
+        cse = self._registered_cse()
+
+        with mock.patch('client.onem2m.http.OneM2MRequest.requests.put') as put, \
+             mock.patch('client.onem2m.http.OneM2MRequest.OneM2MResponse'):
+            cse.update_resource('meterread/map', Container({'mia': 900}))
+
+        self.assertNotIn('ty=', put.call_args[1]['headers']['Content-Type'])
+
+    def test_upsert_creates_known_absent_resource(self):
+        """update_resource(upsert=True): Sends a create named after the path when the resource is known not to exist."""
+        print(self.shortDescription())
+
+        cse = self._registered_cse()
+        cse.existence.mark_absent('/PN_CSE/C5def67ad000190/map')
+
+        response = mock.Mock(pc={'m2m:cnt': {'ri': 'cnt123', 'rn': 'map'}})
+        with mock.patch.object(OneM2MRequest, 'create', return_value=response) as create, \
+             mock.patch.object(OneM2MRequest, 'update') as update:
+            cse.update_resource('map', Container({'mia': 900}), upsert=True)
+
+        update.assert_not_called()
+        to, params, content = create.call_args[0]
+        self.assertEqual('http://localhost:8100/PN_CSE/C5def67ad000190', to)
+        self.assertEqual({'mia': 900, 'rn': 'map'}, content.get_content())
+        self.assertTrue(cse.resource_exists('map'))
+        self.assertEqual('cnt123', cse.addresses.ri('/PN_CSE/C5def67ad000190/map'))
+
+    def test_not_found_is_remembered(self):
+        """resource_exists(uri): A 404 is answered locally on the next probe."""
+        print(self.shortDescription())
+
+        cse = self._registered_cse()
+
+        not_found = requests.Response()
+        not_found.status_code = 404
+        error = requests.exceptions.HTTPError(response=not_found)
+
+        with mock.patch.object(OneM2MRequest, 'retrieve', side_effect=error) as retrieve:
+            self.assertFalse(cse.resource_exists('map/LG012345678'))
+            self.assertFalse(cse.resource_exists('map/LG012345678'))
+
+        self.assertEqual(1, retrieve.call_count)
+
+    def test_subscription_batch_notify(self):
+        """create_subscription(batch_size): Asks the CSE to batch notifications with bn."""
+        print(self.shortDescription())
+
+        cse = self._registered_cse()
+
+        response = mock.Mock(pc={'m2m:sub': {'ri': 'sub123', 'rn': 'reads'}})
+        with mock.patch.object(OneM2MRequest, 'create', return_value=response) as create:
+            cse.create_subscription('meterread', 'reads', 'http://10.0.0.1:8080/notify', batch_size=50, batch_duration=10)
+
+        to, params, content = create.call_args[0]
+        self.assertEqual({'num': 50, 'dur': 'PT10S'}, content.get_content()['bn'])
+
+    def test_subscription_batch_duration(self):
+        """create_subscription(batch_duration): Large and fractional durations are sent as fixed point xs:duration."""
+        print(self.shortDescription())
+
+        cse = self._registered_cse()
+
+        response = mock.Mock(pc={'m2m:sub': {'ri': 'sub123', 'rn': 'reads'}})
+        for duration, dur in ((1000000, 'PT1000000S'), (1234567.5, 'PT1234567.5S'), (0.25, 'PT0.25S')):
+            with mock.patch.object(OneM2MRequest, 'create', return_value=response) as create:
+                cse.create_subscription('meterread', 'reads', batch_size=50, batch_duration=duration)
+
+            to, params, content = create.call_args[0]
+            self.assertEqual(dur, content.get_content()['bn']['dur'])
+
+    def test_subscription_content_type(self):
+        """create_subscription(nct): Sends the notification content type."""
+        print(self.shortDescription())
+
+        cse = self._registered_cse()
+
+        response = mock.Mock(pc={'m2m:sub': {'ri': 'sub123', 'rn': 'reads'}})
+        with mock.patch.object(OneM2MRequest, 'create', return_value=response) as create:
+            cse.create_subscription('meterread', 'reads', nct=OneM2MPrimitive.M2M_NOTIFICATION_CONTENT_TYPES.ResourceID.value)
+
+        to, params, content = create.call_args[0]
+        self.assertEqual(3, content.get_content()['nct'])
+
+    def test_retrieve_address(self):
+        """retrieve_address(address): Retrieves a resource by resource ID or structured path."""
+        print(self.shortDescription())
+
+        cse = self._registered_cse()
+
+        response = mock.Mock(pc={'m2m:cin': {'ri': 'cin123', 'rn': 'cin-00001', 'pi': 'cnt123'}})
+        with mock.patch('client.cse.CSE.OneM2MRequest') as request:
+            request.return_value.retrieve.return_value = response
+            self.assertIs(response, cse.retrieve_address('cin123'))
+            self.assertEqual('http://localhost:8100/cin123', request.call_args[0][0])
+
+            cse.retrieve_address('/PN_CSE/C5def67ad000190/reads')
+            self.assertEqual('http://localhost:8100/PN_CSE/C5def67ad000190/reads', request.call_args[0][0])
+
+            cse.retrieve_address('')
+            self.assertEqual('http://localhost:8100/', request.call_args[0][0])
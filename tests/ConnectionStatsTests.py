@@ -0,0 +1,149 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import json, os, shutil, socket, ssl, subprocess, tempfile, time, unittest
+import requests
+
+from http.client import HTTPSConnection
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+from tests.ListenerTestCase import ListenerTestCase
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+BODY = json.dumps({'m2m:sgn': {'sur': SUR, 'nev': {'rep': {'m2m:cin': {'con': 1}}}}})
+
+
+@unittest.skipUnless(shutil.which('openssl'), 'openssl is needed to create a test certificate')
+class ConnectionStatsTests(ListenerTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.certfile = os.path.join(cls.directory.name, 'cert.pem')
+        cls.keyfile = os.path.join(cls.directory.name, 'key.pem')
+        subprocess.run(
+            [
+                'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                '-addext', 'subjectAltName=DNS:localhost',
+                '-keyout', cls.keyfile, '-out', cls.certfile,
+            ],
+            check=True,
+            capture_output=True,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        super().setUp()
+        self.client = ssl.create_default_context(cafile=self.certfile)
+        self.handled = 0
+
+    def _start(self, backend: str, **options):
+        async def handle(notification, res):
+            self.handled += 1
+
+        self.build_listener(
+            backend=backend,
+            ssl_context=AsyncResponseListenerFactory.ssl_context(self.certfile, self.keyfile, **options),
+        )
+        self.listener.set_rqi_cb(SUR, handle, CallbackMode.NOTIFICATION)
+        self.start_listener()
+
+    def _connect(self, session: ssl.SSLSession = None) -> HTTPSConnection:
+        connection = HTTPSConnection('localhost', self.port, context=self.client)
+        if session is None:
+            connection.connect()
+        else:
+            # Offer the earlier session.
+            connection.sock = self.client.wrap_socket(
+                socket.create_connection(('localhost', self.port)), server_hostname='localhost', session=session
+            )
+        return connection
+
+    def _post(self, connection: HTTPSConnection) -> int:
+        connection.request('POST', '/notify', BODY, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def _resumption(self, backend: str):
+        self._start(backend)
+        base = self.listener.metrics()['connections']
+
+        # A CSE that keeps its connection alive, then reconnects with its session twice.
+        connection = self._connect()
+        for _ in range(3):
+            self.assertEqual(self._post(connection), 200)
+        session = connection.sock.session
+        connection.close()
+
+        for _ in range(2):
+            connection = self._connect(session)
+            self.assertTrue(connection.sock.session_reused)
+            self.assertEqual(self._post(connection), 200)
+            connection.close()
+
+        time.sleep(0.1)
+        connections = self.listener.metrics()['connections']
+        self.assertEqual(connections['tls'] - base['tls'], 3)
+        self.assertEqual(connections['resumed'] - base['resumed'], 2)
+        self.assertEqual(connections['requests'], 5)
+        self.assertEqual(connections['full_handshakes'] - base['full_handshakes'], 1)
+        self.assertEqual(connections['open'], 0)
+        self.assertGreaterEqual(connections['session_stats']['hits'], 2)
+        self.assertEqual(self.handled, 5)
+
+    def test_resumption_aiohttp(self):
+        """ssl_context(): CSE reconnections resume their TLS session on the aiohttp backend, and are counted."""
+        print(self.shortDescription())
+
+        self._resumption(AsyncResponseListenerFactory.BACKEND_AIOHTTP)
+
+    def test_resumption_asyncio(self):
+        """ssl_context(): CSE reconnections resume their TLS session on the asyncio backend, and are counted."""
+        print(self.shortDescription())
+
+        self._resumption(AsyncResponseListenerFactory.BACKEND_ASYNCIO)
+
+    def test_keep_alive(self):
+        """metrics(): Counts the requests served per connection."""
+        print(self.shortDescription())
+
+        self._start(AsyncResponseListenerFactory.BACKEND_AIOHTTP)
+        accepted = self.listener.metrics()['connections']['accepted']
+
+        with requests.Session() as session:
+            for _ in range(4):
+                response = session.post('https://localhost:{}/notify'.format(self.port), data=BODY, verify=self.certfile)
+                self.assertEqual(response.status_code, 200)
+
+        connections = self.listener.metrics()['connections']
+        self.assertEqual(connections['accepted'] - accepted, 1)
+        self.assertEqual(connections['requests'], 4)
+
+    def test_no_session_tickets(self):
+        """ssl_context(session_tickets=0): Sessions are still resumed from the session cache."""
+        print(self.shortDescription())
+
+        self._start(AsyncResponseListenerFactory.BACKEND_ASYNCIO, session_tickets=0)
+        self.assertTrue(self.listener.ssl_context.options & ssl.OP_NO_TICKET)
+
+        # TLS 1.3 resumes only from tickets.  Sessions are cached once the connection is closed cleanly.
+        self.client.maximum_version = ssl.TLSVersion.TLSv1_2
+        connection = self._connect()
+        self.assertEqual(self._post(connection), 200)
+        session = connection.sock.session
+        connection.sock = connection.sock.unwrap()
+        connection.close()
+
+        connection = self._connect(session)
+        self.assertTrue(connection.sock.session_reused)
+        self.assertEqual(self._post(connection), 200)
+        connection.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import json, unittest
+
+from unittest import mock
+
+from client.ae.AE import AE
+from client.cse.CSE import CSE
+from client.exceptions.InvalidArgumentException import InvalidArgumentException
+from client.onem2m.OneM2MPrimitive import OneM2MPrimitive
+from client.onem2m.http.OneM2MRequest import OneM2MRequest
+from client.onem2m.resource.EventNotificationCriteria import EventNotificationCriteria
+
+
+class EventNotificationCriteriaTests(unittest.TestCase):
+    def test_builder(self):
+        """EventNotificationCriteria(): Chained criteria are sent as enc attributes."""
+        print(self.shortDescription())
+
+        enc = (
+            EventNotificationCriteria()
+            .event_types(OneM2MPrimitive.M2M_NOTIFICATION_EVENT_TYPES.CreateOfDirectChildResource)
+            .child_types(OneM2MPrimitive.M2M_RESOURCE_TYPES.ContentInstance)
+            .attributes('mni')
+            .size_above(1024)
+            .size_below(4096)
+            .missing_data(5, 1234567.5)
+        )
+
+        self.assertEqual({
+            'net': [3],
+            'chty': [4],
+            'atr': ['mni'],
+            'sza': 1024,
+            'szb': 4096,
+            'md': {'num': 5, 'dur': 'PT1234567.5S'},
+        }, enc.get_content())
+        self.assertEqual(4096, json.loads(enc.encode())['enc']['szb'])
+
+    def test_invalid_criteria(self):
+        """size_above(), missing_data(): Inconsistent criteria are refused."""
+        print(self.shortDescription())
+
+        with self.assertRaises(InvalidArgumentException):
+            EventNotificationCriteria().size_below(100).size_above(100)
+        with self.assertRaises(InvalidArgumentException):
+            EventNotificationCriteria().missing_data(0, 600)
+
+    def test_create_subscription(self):
+        """create_subscription(enc): Sends the criteria, with event_types unless enc sets them."""
+        print(self.shortDescription())
+
+        cse = CSE('localhost', 8100)
+        cse.ae = AE({'api': 'Nmeterread', 'aei': 'C5def67ad000190', 'poa': [], 'ri': 'C5def67ad000190'})
+
+        response = mock.Mock(pc={'m2m:sub': {'ri': 'sub123', 'rn': 'large'}})
+        with mock.patch.object(OneM2MRequest, 'create', return_value=response) as create:
+            cse.create_subscription('meterread', 'large', enc=EventNotificationCriteria().size_above(1024))
+            cse.create_subscription('meterread', 'updates', enc=EventNotificationCriteria().event_types(1).attributes('lbl'))
+
+        (_, _, large), (_, _, updates) = (call[0] for call in create.call_args_list)
+        self.assertEqual({'net': [3], 'sza': 1024}, large.get_content()['enc'])
+        self.assertEqual({'net': [1], 'atr': ['lbl']}, updates.get_content()['enc'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest, time
+
+from client.cse.ExistenceIndex import ExistenceIndex
+
+
+class ExistenceIndexTests(unittest.TestCase):
+    def test_unknown_by_default(self):
+        """exists(path): Returns None for a path that has not been seen.
+        """
+        print(self.shortDescription())
+
+        self.assertIsNone(ExistenceIndex().exists('/PN_CSE/meterread'))
+
+    def test_present_implies_parents(self):
+        """mark_present(path): Marks the resource and its ancestors as present.
+        """
+        print(self.shortDescription())
+
+        index = ExistenceIndex()
+        index.mark_present('/PN_CSE/meterread/map/LG012345678')
+
+        self.assertTrue(index.exists('/PN_CSE/meterread/map/LG012345678'))
+        self.assertTrue(index.exists('/PN_CSE/meterread/map'))
+        self.assertTrue(index.exists('/PN_CSE/meterread'))
+
+    def test_absent_implies_children_absent(self):
+        """mark_absent(path): Forgets what was known about the resource's children.
+        """
+        print(self.shortDescription())
+
+        index = ExistenceIndex()
+        index.mark_present('/PN_CSE/meterread/map/LG012345678')
+        index.mark_absent('/PN_CSE/meterread/map')
+
+        self.assertFalse(index.exists('/PN_CSE/meterread/map'))
+        self.assertIsNone(index.exists('/PN_CSE/meterread/map/LG012345678'))
+        self.assertTrue(index.exists('/PN_CSE/meterread'))
+
+    def test_negative_ttl(self):
+        """exists(path): Absent entries expire after negative_ttl seconds.
+        """
+        print(self.shortDescription())
+
+        index = ExistenceIndex(negative_ttl=0.01)
+        index.mark_absent('/PN_CSE/meterread/map')
+        self.assertFalse(index.exists('/PN_CSE/meterread/map'))
+
+        time.sleep(0.02)
+        self.assertIsNone(index.exists('/PN_CSE/meterread/map'))
+        self.assertEqual(0, len(index))
+
+    def test_positive_ttl(self):
+        """exists(path): Present entries expire after positive_ttl seconds, so deletions by other AEs are noticed.
+        """
+        print(self.shortDescription())
+
+        self.assertEqual(300.0, ExistenceIndex().positive_ttl)
+
+        index = ExistenceIndex(positive_ttl=0.01)
+        index.mark_present('/PN_CSE/meterread/map')
+        self.assertTrue(index.exists('/PN_CSE/meterread/map'))
+
+        time.sleep(0.02)
+        self.assertIsNone(index.exists('/PN_CSE/meterread/map'))
+
+    def test_max_entries(self):
+        """mark_present(path): Drops the least recently marked paths beyond max_entries.
+        """
+        print(self.shortDescription())
+
+        index = ExistenceIndex(max_entries=2)
+        for i in range(3):
+            index.mark_absent('/PN_CSE/cnt-{}'.format(i))
+
+        self.assertEqual(2, len(index))
+        self.assertIsNone(index.exists('/PN_CSE/cnt-0'))
+        self.assertFalse(index.exists('/PN_CSE/cnt-2'))
@@ -0,0 +1,109 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, random, time, unittest
+
+from client.ae.KeyedExecutor import KeyedExecutor
+
+
+class KeyedExecutorTests(unittest.TestCase):
+    def test_order_within_key(self):
+        """submit(): Work for one key runs in submission order."""
+        print(self.shortDescription())
+
+        handled = {}
+
+        async def handle(key, i):
+            await asyncio.sleep(random.random() / 1000)
+            handled.setdefault(key, []).append(i)
+
+        async def scenario():
+            executor = KeyedExecutor(lanes=4)
+            executor.start()
+            futures = [await executor.submit(key, handle, key, i) for i in range(50) for key in 'abcdefgh']
+            await asyncio.gather(*futures)
+            await executor.stop()
+
+            return executor
+
+        executor = asyncio.run(scenario())
+
+        for key in 'abcdefgh':
+            self.assertEqual(handled[key], list(range(50)))
+        self.assertEqual(sum(executor.processed), 400)
+
+    def test_parallel_across_keys(self):
+        """submit(): Work for keys on different lanes runs concurrently."""
+        print(self.shortDescription())
+
+        async def sleep(i):
+            await asyncio.sleep(0.1)
+            return i
+
+        async def scenario():
+            executor = KeyedExecutor(lanes=8)
+            executor.start()
+
+            keys = {}
+            for key in range(100):
+                keys.setdefault(executor.lane(key), key)
+
+            start = time.monotonic()
+            futures = [await executor.submit(key, sleep, key) for key in keys.values()]
+            results = await asyncio.gather(*futures)
+            elapsed = time.monotonic() - start
+            await executor.stop()
+
+            return sorted(results) == sorted(keys.values()), elapsed
+
+        ok, elapsed = asyncio.run(scenario())
+
+        self.assertTrue(ok)
+        self.assertLess(elapsed, 0.5)
+
+    def test_lane_is_stable(self):
+        """lane(): A key always maps to the same lane."""
+        print(self.shortDescription())
+
+        executor = KeyedExecutor(lanes=8)
+
+        sur = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+        self.assertIn(executor.lane(sur), range(8))
+        self.assertEqual(executor.lane(sur), executor.lane(''.join(sur)))
+        self.assertEqual(executor.lane('C1636064176x000015'), executor.lane('C1636064176x000015'))
+
+    def test_failures(self):
+        """submit(), post(): Exceptions are set on the future or counted, and the lane keeps running."""
+        print(self.shortDescription())
+
+        async def fail(i):
+            raise ValueError(i)
+
+        async def ok(i):
+            return i
+
+        async def scenario():
+            executor = KeyedExecutor(lanes=1)
+            executor.start()
+            failed = await executor.submit('a', fail, 1)
+            await executor.post('a', fail, 2)
+            succeeded = await executor.submit('a', ok, 3)
+            result = await succeeded
+            with self.assertRaises(ValueError):
+                await failed
+            metrics = executor.metrics()
+            await executor.stop()
+
+            return result, metrics
+
+        result, metrics = asyncio.run(scenario())
+
+        self.assertEqual(result, 3)
+        self.assertEqual(metrics['lanes'][0]['failed'], 2)
+        self.assertEqual(metrics['lanes'][0]['processed'], 1)
+        self.assertEqual(metrics['lanes'][0]['depth'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest, requests
+
+from unittest import mock
+
+from client.ae.AE import AE
+from client.ae.ListenerPool import ListenerPool
+from client.cse.CSE import CSE
+from client.onem2m.http.OneM2MRequest import OneM2MRequest
+
+ENDPOINTS = ['http://10.0.0.{}:8080/notify'.format(i) for i in range(1, 4)]
+
+
+class ListenerPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.cse = CSE('localhost', 8100)
+        self.cse.ae = AE({'api': 'Nmeterread', 'aei': 'C5def67ad000190', 'poa': [], 'ri': 'C5def67ad000190'})
+        self.pool = ListenerPool(self.cse, ENDPOINTS)
+
+        self.created = []
+        self.updated = []
+
+        self.patches = [
+            mock.patch.object(OneM2MRequest, 'create', side_effect=self._create),
+            mock.patch.object(OneM2MRequest, 'update', side_effect=self._update),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def _create(self, to, params, content):
+        self.created.append((to, content.get_content()))
+        return mock.Mock(pc=None)
+
+    def _update(self, to, params, content):
+        self.updated.append((to, content.get_content()))
+        return mock.Mock(pc=None)
+
+    def _subscribe(self, count: int):
+        for i in range(count):
+            self.pool.subscribe('meterread', 'sub-{:05}'.format(i))
+
+    def test_spread(self):
+        """subscribe(): Subscriptions are spread across the endpoints, each with one endpoint in nu."""
+        print(self.shortDescription())
+
+        self._subscribe(300)
+
+        for to, sub in self.created:
+            self.assertEqual(to, 'http://localhost:8100/PN_CSE/meterread')
+            self.assertEqual(len(sub['nu']), 1)
+            self.assertIn(sub['nu'][0], ENDPOINTS)
+
+        assigned = self.pool.metrics()['subscriptions']
+        self.assertEqual(set(assigned), set(ENDPOINTS))
+        for count in assigned.values():
+            self.assertGreater(count, 60)
+
+    def test_add(self):
+        """add(): Registers the endpoint as a poa and moves only the subscriptions now assigned to it."""
+        print(self.shortDescription())
+
+        self._subscribe(300)
+        before = dict(self.pool.subscriptions)
+
+        endpoint = 'http://10.0.0.4:8080/notify'
+        moved = self.pool.add(endpoint)
+
+        # The AE's poa is updated, then the moved subscriptions' nu.
+        to, ae = self.updated[0]
+        self.assertEqual(to, 'http://localhost:8100/PN_CSE/C5def67ad000190')
+        self.assertEqual(ae, {'poa': ENDPOINTS + [endpoint]})
+        self.assertEqual(self.cse.ae.poa, ENDPOINTS + [endpoint])
+
+        self.assertEqual(len(moved), len(self.updated) - 1)
+        self.assertGreater(len(moved), 40)
+        self.assertLess(len(moved), 110)
+        for path in moved:
+            self.assertEqual(self.pool.subscriptions[path], endpoint)
+        for path, current in self.pool.subscriptions.items():
+            if path not in moved:
+                self.assertEqual(current, before[path])
+
+        self.assertEqual(self.updated[1], ('http://localhost:8100/PN_CSE/' + moved[0], {'nu': [endpoint]}))
+
+    def test_remove(self):
+        """remove(): Moves only the removed endpoint's subscriptions, then updates the poa."""
+        print(self.shortDescription())
+
+        self._subscribe(300)
+        before = dict(self.pool.subscriptions)
+
+        moved = self.pool.remove(ENDPOINTS[0])
+
+        self.assertEqual(sorted(moved), sorted(path for path, endpoint in before.items() if endpoint == ENDPOINTS[0]))
+        self.assertNotIn(ENDPOINTS[0], self.pool.subscriptions.values())
+        self.assertEqual(self.updated[-1][1], {'poa': ENDPOINTS[1:]})
+
+        self.pool.remove(ENDPOINTS[1])
+        with self.assertRaises(ValueError):
+            self.pool.remove(ENDPOINTS[2])
+
+    def test_failed_move(self):
+        """rebalance(): Subscriptions whose update fails keep their endpoint until the next rebalance."""
+        print(self.shortDescription())
+
+        self._subscribe(30)
+        moving = [path for path, endpoint in self.pool.subscriptions.items() if endpoint == ENDPOINTS[0]]
+
+        def update_resource(path, resource, upsert=False, with_ae=True):
+            # The AE's poa is updated, its subscriptions are not.
+            if path is not None:
+                raise requests.exceptions.ConnectionError('CSE unreachable')
+
+        with mock.patch.object(self.cse, 'update_resource', side_effect=update_resource):
+            self.assertEqual(self.pool.remove(ENDPOINTS[0]), [])
+
+        self.assertEqual(self.pool.failed, len(moving))
+        self.assertEqual(sorted(self.pool.rebalance()), sorted(moving))
+        self.assertEqual(self.pool.moved, len(moving))
+
+    def test_failed_poa(self):
+        """add(), remove(): The endpoints are unchanged when the AE's poa can not be updated."""
+        print(self.shortDescription())
+
+        self._subscribe(30)
+
+        def update_resource(path, resource, upsert=False, with_ae=True):
+            if path is None:
+                raise requests.exceptions.ConnectionError('CSE unreachable')
+
+        with mock.patch.object(self.cse, 'update_resource', side_effect=update_resource):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.pool.add('http://10.0.0.4:8080/notify')
+            self.assertEqual(self.pool.endpoints, ENDPOINTS)
+            self.assertEqual(self.pool.moved, 0)
+
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.pool.remove(ENDPOINTS[0])
+            self.assertEqual(self.pool.endpoints, ENDPOINTS)
+
+        self.assertEqual(self.cse.ae.poa, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
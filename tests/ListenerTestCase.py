@@ -0,0 +1,41 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory
+
+
+class ListenerTestCase(unittest.TestCase):
+    """Base class of the tests that run a listener of their own on a free port, rather than the singleton.
+    """
+
+    def setUp(self):
+        self.singleton = AsyncResponseListenerFactory.instance
+        AsyncResponseListenerFactory.instance = None
+        self.listener = None
+
+    def tearDown(self):
+        if self.listener is not None:
+            self.listener.stop()
+        AsyncResponseListenerFactory.instance = self.singleton
+
+    def build_listener(self, **options):
+        """Build a listener on a free port of 127.0.0.1, without starting it.
+        """
+        self.listener = AsyncResponseListenerFactory('127.0.0.1', 0, **options).get_instance()
+        return self.listener
+
+    def start_listener(self, **options):
+        """Start the listener, building it first with options if it has not been, and wait until it accepts
+        connections.  Sets port and url, the listener's notification URL.
+        """
+        if self.listener is None:
+            self.build_listener(**options)
+
+        self.listener.start()
+        self.assertTrue(self.listener.wait_ready(10), 'The listener did not start')
+        self.port = self.listener.port
+        self.url = '{}://127.0.0.1:{}/notify'.format('https' if self.listener.ssl_context else 'http', self.port)
+        return self.listener
@@ -0,0 +1,72 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest
+
+from client.onem2m.NameTranslator import NameTranslator
+
+
+class NameTranslatorTests(unittest.TestCase):
+    NOTIFICATION = {
+        'm2m:sgn': {
+            'nev': {
+                'net': 3,
+                'rep': {
+                    'm2m:cin': {
+                        'cnf': 'application/json',
+                        'con': {'rn': 'not an attribute', 'read': [1, 2]},
+                        'cs': 42,
+                        'ri': 'cin64bb897a0006ee',
+                        'rn': 'cin-1',
+                        'lbl': ['a'],
+                    }
+                },
+            },
+            'sur': '/PN_CSE/sub-00001',
+            'lco:custom': {'rn': 1},
+        }
+    }
+
+    def test_to_long(self):
+        """to_long(payload): Translates every oneM2M name and leaves content untouched.
+        """
+        print(self.shortDescription())
+
+        long = NameTranslator.to_long(self.NOTIFICATION)
+        cin = long['m2m:notification']['notificationEvent']['representation']['m2m:contentInstance']
+
+        self.assertEqual(3, long['m2m:notification']['notificationEvent']['notificationEventType'])
+        self.assertEqual('/PN_CSE/sub-00001', long['m2m:notification']['subscriptionReference'])
+        self.assertEqual({'rn': 'not an attribute', 'read': [1, 2]}, cin['content'])
+        self.assertEqual('cin-1', cin['resourceName'])
+        self.assertEqual(['a'], cin['labels'])
+        self.assertEqual({'resourceName': 1}, long['m2m:notification']['lco:custom'])
+
+    def test_round_trip(self):
+        """to_short(to_long(payload)): Returns the original payload.
+        """
+        print(self.shortDescription())
+
+        self.assertEqual(self.NOTIFICATION, NameTranslator.to_short(NameTranslator.to_long(self.NOTIFICATION)))
+
+    def test_long_view_matches_to_long(self):
+        """long_view(payload): Reads the same values as to_long without copying the payload.
+        """
+        print(self.shortDescription())
+
+        view = NameTranslator.long_view(self.NOTIFICATION)
+        sgn = view['m2m:notification']
+
+        self.assertEqual('cin64bb897a0006ee', sgn['notificationEvent']['representation']['m2m:contentInstance']['resourceID'])
+        self.assertEqual(set(NameTranslator.to_long(self.NOTIFICATION)['m2m:notification']), set(sgn))
+        self.assertEqual(NameTranslator.to_long(self.NOTIFICATION), NameTranslator.to_long(dict(view)))
+
+    def test_tables_are_consistent(self):
+        """SHORT_TO_LONG, LONG_TO_SHORT: Compiled lookups are inverses of each other.
+        """
+        print(self.shortDescription())
+
+        self.assertEqual(len(NameTranslator.SHORT_TO_LONG), len(NameTranslator.LONG_TO_SHORT))
+        for short, long in NameTranslator.SHORT_TO_LONG.items():
+            self.assertEqual(short, NameTranslator.LONG_TO_SHORT[long])
@@ -0,0 +1,101 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest
+
+from client.ae.NotificationDeduplicator import NotificationDeduplicator
+from client.onem2m.Notification import Notification
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+
+def notification(ri: str, ct: str = '20211106T014934', sur: str = SUR) -> Notification:
+    return Notification(None, {'m2m:sgn': {'nev': {'rep': {'m2m:cin': {'ri': ri, 'ct': ct}}, 'net': 3}, 'sur': sur}})
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class NotificationDeduplicatorTests(unittest.TestCase):
+    def test_suppresses_duplicates(self):
+        """add(): A notification is only accepted once within the window."""
+        print(self.shortDescription())
+
+        dedupe = NotificationDeduplicator()
+
+        self.assertTrue(dedupe.add(dedupe.fingerprint(notification('cin1'))))
+        self.assertFalse(dedupe.add(dedupe.fingerprint(notification('cin1'))))
+        self.assertTrue(dedupe.add(dedupe.fingerprint(notification('cin1', sur='/PN_CSE/sub2'))))
+        self.assertTrue(dedupe.add(dedupe.fingerprint(notification('cin1', ct='20211106T014935'))))
+        self.assertTrue(dedupe.add(dedupe.fingerprint(notification('cin2'))))
+
+        self.assertEqual(dedupe.suppressed, 1)
+        self.assertEqual(len(dedupe), 4)
+
+    def test_unidentified(self):
+        """fingerprint(): Notifications without an ri are not identified."""
+        print(self.shortDescription())
+
+        dedupe = NotificationDeduplicator()
+        verification = Notification(None, {'m2m:sgn': {'vrq': True, 'sur': SUR}})
+
+        self.assertIsNone(dedupe.fingerprint(verification))
+
+    def test_window(self):
+        """add(): Notifications are forgotten once the window has passed."""
+        print(self.shortDescription())
+
+        clock = Clock()
+        dedupe = NotificationDeduplicator(window=10, buckets=10, clock=clock)
+        fingerprint = dedupe.fingerprint(notification('cin1'))
+
+        self.assertTrue(dedupe.add(fingerprint))
+        clock.now += 9
+        self.assertFalse(dedupe.add(fingerprint))
+        clock.now += 1
+        self.assertTrue(dedupe.add(fingerprint))
+
+    def test_bounded(self):
+        """add(): The oldest slice is dropped when max_entries is reached."""
+        print(self.shortDescription())
+
+        clock = Clock()
+        dedupe = NotificationDeduplicator(window=10, buckets=10, max_entries=4, clock=clock)
+
+        for i in range(6):
+            dedupe.add(dedupe.fingerprint(notification('cin{}'.format(i))))
+            clock.now += 1
+
+        self.assertLessEqual(len(dedupe), 4)
+        self.assertEqual(dedupe.evicted, 2)
+        self.assertTrue(dedupe.add(dedupe.fingerprint(notification('cin0'))))
+
+    def test_fingerprint_width(self):
+        """NotificationDeduplicator(): The fingerprint is sized for the false positive rate."""
+        print(self.shortDescription())
+
+        self.assertEqual(NotificationDeduplicator(max_entries=100000, false_positive_rate=1e-9).digest_size, 6)
+        self.assertEqual(NotificationDeduplicator(max_entries=100000, false_positive_rate=1e-15).digest_size, 9)
+
+    def test_discard(self):
+        """discard(): Forgotten notifications are accepted again."""
+        print(self.shortDescription())
+
+        dedupe = NotificationDeduplicator()
+        fingerprint = dedupe.fingerprint(notification('cin1'))
+
+        dedupe.add(fingerprint)
+        dedupe.discard([fingerprint])
+
+        self.assertEqual(len(dedupe), 0)
+        self.assertTrue(dedupe.add(fingerprint))
+
+
+if __name__ == '__main__':
+    unittest.main()
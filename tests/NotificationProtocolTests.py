@@ -0,0 +1,148 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, json, socket, unittest
+import requests
+
+from client.ae.AsyncResponseListener import AsyncResponseListenerFactory, CallbackMode
+from client.onem2m.OneM2MPrimitive import OneM2MPrimitive
+from tests.ListenerTestCase import ListenerTestCase
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+
+def notification(i: int) -> bytes:
+    return json.dumps({'m2m:sgn': {'sur': SUR, 'nev': {'rep': {'m2m:cin': {'con': i}}}}}).encode('utf-8')
+
+
+class NotificationProtocolTests(ListenerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.handled = []
+
+        async def handle(notification, res):
+            self.handled.append(notification.content)
+
+        self.build_listener(backend=AsyncResponseListenerFactory.BACKEND_ASYNCIO, max_body_size=1024)
+        self.listener.set_rqi_cb(SUR, handle, CallbackMode.NOTIFICATION)
+        self.start_listener()
+
+    def _exchange(self, data: bytes) -> bytes:
+        with socket.create_connection(('127.0.0.1', self.port)) as s:
+            s.sendall(data)
+            s.shutdown(socket.SHUT_WR)
+            received = b''
+            while True:
+                chunk = s.recv(65536)
+                if not chunk:
+                    return received
+                received += chunk
+
+    def test_keep_alive(self):
+        """NotificationProtocol: Notifications are acknowledged on a kept alive connection."""
+        print(self.shortDescription())
+
+        accepted = self.listener.metrics()['connections']['accepted']
+        with requests.Session() as session:
+            for i in range(3):
+                response = session.post(self.url, data=notification(i), headers={'X-M2M-RI': 'rqi-{}'.format(i)})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers['X-M2M-RSC'], '2000')
+                self.assertEqual(response.headers['X-M2M-RI'], 'rqi-{}'.format(i))
+
+        self.assertEqual(self.handled, [0, 1, 2])
+        connections = self.listener.metrics()['connections']
+        self.assertEqual(connections['accepted'], accepted + 1)
+        self.assertEqual(connections['requests'], 3)
+
+    def test_pipelining(self):
+        """NotificationProtocol: Pipelined requests are answered in order, and the connection closed on request."""
+        print(self.shortDescription())
+
+        requests_ = b''
+        for i in range(3):
+            body = notification(i)
+            close = b'Connection: close\r\n' if i == 2 else b''
+            requests_ += b'POST /notify HTTP/1.1\r\nHost: x\r\nContent-Length: ' + str(len(body)).encode() + b'\r\n' + close + b'\r\n' + body
+
+        received = self._exchange(requests_)
+
+        self.assertEqual(received.count(b'HTTP/1.1 200 OK'), 3)
+        self.assertTrue(received.rstrip().endswith(b'Content-Length: 0\r\nConnection: close'))
+        self.assertEqual(self.handled, [0, 1, 2])
+
+    def test_errors(self):
+        """NotificationProtocol: Unsupported requests are refused."""
+        print(self.shortDescription())
+
+        self.assertEqual(requests.post('http://127.0.0.1:{}/other'.format(self.port), data=notification(0)).status_code, 404)
+        self.assertEqual(requests.get(self.url).status_code, 405)
+        self.assertEqual(requests.post(self.url, data=b'x' * 2048).status_code, 413)
+        self.assertEqual(requests.post(self.url, data=iter([notification(0)])).status_code, 501)
+        self.assertTrue(self._exchange(b'POST /notify HTTP/1.1\r\n\r\n').startswith(b'HTTP/1.1 411 '))
+        self.assertTrue(self._exchange(b'garbage\r\n\r\n').startswith(b'HTTP/1.1 400 '))
+        self.assertTrue(self._exchange(b'POST /notify HTTP/1.1\r\nX: ' + b'x' * 20000).startswith(b'HTTP/1.1 431 '))
+        self.assertEqual(self.handled, [])
+
+    def test_malformed_headers(self):
+        """NotificationProtocol: Repeated or negative Content-Length and header lines without a colon are refused."""
+        print(self.shortDescription())
+
+        body = notification(0)
+        length = b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+        for head in (length + length, b'Content-Length: -5\r\n', b'Content-Length: +5\r\n', length + b'X-M2M-RI\r\n'):
+            received = self._exchange(b'POST /notify HTTP/1.1\r\n' + head + b'\r\n' + body)
+            self.assertTrue(received.startswith(b'HTTP/1.1 400 Bad Request\r\n'), received)
+        self.assertEqual(self.handled, [])
+
+    def test_response_splitting(self):
+        """NotificationProtocol: Request data never reaches the reason phrase, and CR, LF or non latin-1 headers are refused."""
+        print(self.shortDescription())
+
+        sur = 'unknown\r\nSet-Cookie: x=1'
+        response = requests.post(self.url, data=json.dumps({'m2m:sgn': {'sur': sur}}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.reason, 'Not Found')
+        self.assertNotIn('Set-Cookie', response.headers)
+        self.assertIn(sur, response.json()['m2m:dbg'])
+
+        async def handle(req, res):
+            res.headers['X-Echo'] = req.headers['X-M2M-RI'] + '\r\nSet-Cookie: x=1'
+            return res
+
+        self.listener.set_rqi_cb(SUR, handle)
+        response = requests.post(self.url, data=notification(0), headers={'X-M2M-RI': 'rqi-0'})
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('Set-Cookie', response.headers)
+        self.assertNotIn('X-Echo', response.headers)
+
+        async def handle(req, res):
+            res.headers['Content-Location'] = '/PN_CSE/C5def67ad000190/měřič'
+            return res
+
+        self.listener.set_rqi_cb(SUR, handle)
+        response = requests.post(self.url, data=notification(0), timeout=5)
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('Content-Location', response.headers)
+
+    def test_request_callbacks(self):
+        """NotificationProtocol: Request callbacks get a request and response with the aiohttp interface."""
+        print(self.shortDescription())
+
+        async def handle(req, res):
+            body = await req.json()
+            res.text = json.dumps({'con': body['m2m:sgn']['nev']['rep']['m2m:cin']['con'], 'ri': req.headers['x-m2m-ri']})
+            res.set_status(201)
+            return res
+
+        self.listener.set_rqi_cb(SUR, handle)
+        response = requests.post(self.url, data=notification(5), headers={'X-M2M-RI': 'rqi-5'})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'con': 5, 'ri': 'rqi-5'})
+        self.assertEqual(response.headers['Content-Type'], OneM2MPrimitive.CONTENT_TYPE_JSON)
+
+
+if __name__ == '__main__':
+    unittest.main()
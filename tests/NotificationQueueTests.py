@@ -0,0 +1,140 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, unittest
+
+from client.ae.NotificationQueue import NotificationQueue
+
+
+class NotificationQueueTests(unittest.TestCase):
+    def _run(self, overflow, items, maxsize=2):
+        """Queue items while the single worker is blocked, then release it and return what was handled.
+        """
+        handled = []
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def handler(item):
+                await release.wait()
+                handled.append(item)
+
+            queue = NotificationQueue(handler, maxsize=maxsize, workers=1, overflow=overflow)
+            queue.start()
+
+            # Let the worker take the first item so that it blocks.
+            await queue.put(items[0])
+            await asyncio.sleep(0)
+
+            results = []
+            for item in items[1:]:
+                try:
+                    results.append(await queue.put(item))
+                except asyncio.QueueFull:
+                    results.append('full')
+
+            metrics = queue.metrics()
+            release.set()
+            while len(queue) or queue.processed + queue.failed < queue.enqueued - queue.dropped:
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+            return results, metrics, queue
+
+        results, metrics, queue = asyncio.run(scenario())
+        return handled, results, metrics, queue
+
+    def test_reject(self):
+        """put(): Raises QueueFull when the queue is full and the policy is reject."""
+        print(self.shortDescription())
+
+        handled, results, metrics, queue = self._run(NotificationQueue.OVERFLOW_REJECT, [0, 1, 2, 3])
+
+        self.assertEqual(results, [True, True, 'full'])
+        self.assertEqual(handled, [0, 1, 2])
+        self.assertEqual(queue.rejected, 1)
+        self.assertEqual(metrics['depth'], 2)
+
+    def test_drop_oldest(self):
+        """put(): Discards the oldest queued item when the queue is full and the policy is drop_oldest."""
+        print(self.shortDescription())
+
+        handled, results, metrics, queue = self._run(NotificationQueue.OVERFLOW_DROP_OLDEST, [0, 1, 2, 3])
+
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(handled, [0, 2, 3])
+        self.assertEqual(queue.dropped, 1)
+
+    def test_drop_newest(self):
+        """put(): Discards the new item when the queue is full and the policy is drop_newest."""
+        print(self.shortDescription())
+
+        handled, results, metrics, queue = self._run(NotificationQueue.OVERFLOW_DROP_NEWEST, [0, 1, 2, 3])
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(handled, [0, 1, 2])
+        self.assertEqual(queue.dropped, 1)
+
+    def test_block(self):
+        """put(): Waits for room when the queue is full and the policy is block."""
+        print(self.shortDescription())
+
+        async def scenario():
+            handled = []
+
+            async def handler(item):
+                await asyncio.sleep(0.01)
+                handled.append(item)
+
+            queue = NotificationQueue(handler, maxsize=1, workers=1, overflow=NotificationQueue.OVERFLOW_BLOCK)
+            queue.start()
+            for i in range(5):
+                await queue.put(i)
+            while queue.processed < 5:
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+            return handled, queue
+
+        handled, queue = asyncio.run(scenario())
+
+        self.assertEqual(handled, [0, 1, 2, 3, 4])
+        self.assertEqual(queue.max_depth, 1)
+        self.assertGreater(queue.max_wait, 0)
+
+    def test_failed_handler(self):
+        """metrics(): Handler exceptions are counted and do not stop the worker."""
+        print(self.shortDescription())
+
+        async def scenario():
+            async def handler(item):
+                if item % 2:
+                    raise ValueError(item)
+
+            queue = NotificationQueue(handler, workers=1)
+            queue.start()
+            for i in range(4):
+                await queue.put(i)
+            while queue.processed + queue.failed < 4:
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+            return queue.metrics()
+
+        metrics = asyncio.run(scenario())
+
+        self.assertEqual(metrics['processed'], 2)
+        self.assertEqual(metrics['failed'], 2)
+        self.assertEqual(metrics['depth'], 0)
+
+    def test_unknown_overflow(self):
+        """NotificationQueue(): Unknown overflow policies raise ValueError."""
+        print(self.shortDescription())
+
+        with self.assertRaises(ValueError):
+            NotificationQueue(None, overflow='spill')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import time, unittest
+
+from client.ae.NotificationRouter import NotificationRouter
+from client.onem2m.ResourceAddressIndex import ResourceAddressIndex
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+
+def cb():
+    pass
+
+
+class NotificationRouterTests(unittest.TestCase):
+    def test_exact(self):
+        """match(): Exact routes match every form of the address."""
+        print(self.shortDescription())
+
+        router = NotificationRouter()
+        route = router.add(SUR, cb)
+        ri_route = router.add('sub64bb897b0006ef', cb)
+
+        self.assertIs(router.match(SUR), route)
+        self.assertIs(router.match('http://localhost:8080' + SUR + '/'), route)
+        self.assertIs(router.match('/PN_CSE/sub64bb897b0006ef'), ri_route)
+        self.assertIs(router.match('sub64bb897b0006ef'), ri_route)
+        self.assertIsNone(router.match('/PN_CSE/nod-015322009906000/metersvc/reads/sub-00002'))
+
+    def test_address_index(self):
+        """match(): With an address index, resource ID and structured references match each other's routes."""
+        print(self.shortDescription())
+
+        addresses = ResourceAddressIndex()
+        addresses.add('sub64bb897b0006ef', SUR)
+        router = NotificationRouter(addresses)
+
+        by_path = router.add(SUR, cb)
+        self.assertIs(router.match('/PN_CSE/sub64bb897b0006ef'), by_path)
+
+        router.remove(SUR)
+        by_ri = router.add('sub64bb897b0006ef', cb)
+        self.assertIs(router.match(SUR), by_ri)
+
+    def test_patterns(self):
+        """match(): Patterns match by segment and the most specific route wins."""
+        print(self.shortDescription())
+
+        router = NotificationRouter()
+        deep = router.add('/PN_CSE/**', cb)
+        meters = router.add('/PN_CSE/nod-*/metersvc/**', cb)
+        reads = router.add('/PN_CSE/*/metersvc/reads/*', cb)
+        exact = router.add(SUR, cb)
+
+        self.assertIs(router.match(SUR), exact)
+        self.assertIs(router.match('/PN_CSE/rhub-1/metersvc/reads/sub-00002'), reads)
+        # Segments are compared from the left: nod-* is more specific than *.
+        self.assertIs(router.match('/PN_CSE/nod-015322009906000/metersvc/reads/sub-00002'), meters)
+        self.assertIs(router.match('/PN_CSE/nod-015322009906000/metersvc/summaries/sub-00001'), meters)
+        self.assertIs(router.match('/PN_CSE/nod-015322009906000/metersvc'), meters)
+        self.assertIs(router.match('/PN_CSE/rhub-1/config/sub-00001'), deep)
+
+        router.remove('/PN_CSE/**')
+        self.assertIsNone(router.match('/PN_CSE/rhub-1/config/sub-00001'))
+        self.assertEqual(len(router), 3)
+
+    def test_default(self):
+        """match(): Unmatched references go to the default route."""
+        print(self.shortDescription())
+
+        router = NotificationRouter()
+        router.set_default(cb)
+
+        self.assertIs(router.match(SUR), router.default)
+        self.assertIsNone(router.match(SUR).pattern)
+
+    def test_remove_prunes(self):
+        """remove(): Removing patterns prunes the trie."""
+        print(self.shortDescription())
+
+        router = NotificationRouter()
+        router.add('/PN_CSE/nod-*/metersvc/**', cb)
+        router.add('/PN_CSE/nod-*/lco/*', cb)
+
+        router.remove('/PN_CSE/nod-*/metersvc/**')
+        router.remove('/PN_CSE/nod-*/lco/*')
+
+        self.assertTrue(router._trie.empty())
+        self.assertEqual(list(router), [])
+
+    def test_invalid_pattern(self):
+        """add(): '**' must be the last segment."""
+        print(self.shortDescription())
+
+        with self.assertRaises(ValueError):
+            NotificationRouter().add('/PN_CSE/**/reads', cb)
+
+    def test_expiry(self):
+        """match(), expire(): Routes are dropped once their et or ttl has passed."""
+        print(self.shortDescription())
+
+        router = NotificationRouter()
+        router.add(SUR, cb, expires='20200921T205114')
+        router.add('/PN_CSE/nod-*/lco/**', cb, ttl=60)
+        router.add('sub64bb897b0006ef', cb, expires='20991231T235959,000')
+
+        self.assertIsNone(router.match(SUR))
+        self.assertEqual(router.metrics()['expired'], 1)
+
+        self.assertEqual(router.expire(time.time() + 120), 1)
+        self.assertIsNone(router.match('/PN_CSE/nod-1/lco/sub-1'))
+        self.assertIsNotNone(router.match('sub64bb897b0006ef'))
+        self.assertEqual(len(router), 1)
+
+        with self.assertRaises(ValueError):
+            router.add(SUR, cb, expires='tomorrow')
+
+    def test_one_shot(self):
+        """match(): One shot routes are removed once matched and the oldest are evicted beyond the cap."""
+        print(self.shortDescription())
+
+        router = NotificationRouter(max_one_shot=2)
+        for i in range(3):
+            router.add('rqi-{}'.format(i), cb, one_shot=True)
+
+        self.assertIsNone(router.match('rqi-0'))
+        self.assertIsNotNone(router.match('rqi-1'))
+        self.assertIsNone(router.match('rqi-1'))
+
+        metrics = router.metrics()
+        self.assertEqual(metrics['evicted'], 1)
+        self.assertEqual(metrics['one_shot'], 1)
+
+        with self.assertRaises(ValueError):
+            router.add('/PN_CSE/**', cb, one_shot=True)
+
+    def test_expiry_entries_bounded(self):
+        """remove(): Expiry entries of removed routes do not accumulate."""
+        print(self.shortDescription())
+
+        router = NotificationRouter()
+        for i in range(1000):
+            router.add('sub-{}'.format(i), cb, ttl=3600)
+            router.remove('sub-{}'.format(i))
+
+        self.assertEqual(len(router), 0)
+        self.assertLessEqual(router.metrics()['pending_expiries'], 64)
+        self.assertEqual(router.metrics()['removed'], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
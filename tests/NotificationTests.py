@@ -0,0 +1,263 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import asyncio, json, unittest
+
+from unittest import mock
+
+from client.onem2m.Notification import Notification
+from client.onem2m.OneM2MResource import OneM2MResource
+from client.onem2m.resource.ContentInstance import ContentInstance
+
+SUR = '/PN_CSE/nod-015322009906000/metersvc/reads/sub-00001'
+
+BODY = {
+    'm2m:sgn': {
+        'nev': {
+            'net': 3,
+            'rep': {
+                'm2m:cin': {
+                    'con': '{"ts": 1636064176, "te": 1636064236}',
+                    'cr': 'C1636064176x000015',
+                    'ri': 'cin64bb897a0006ee',
+                    'rn': 'cin-00001',
+                    'ty': 4,
+                }
+            },
+        },
+        'sur': SUR,
+    }
+}
+
+
+class NotificationTests(unittest.TestCase):
+    def test_fields(self):
+        """Notification(): Exposes sur, net, vrq, sud and creator."""
+        print(self.shortDescription())
+
+        notification = Notification(json.dumps(BODY).encode('utf-8'))
+
+        self.assertEqual(notification.sur, SUR)
+        self.assertEqual(notification.net, 3)
+        self.assertFalse(notification.vrq)
+        self.assertFalse(notification.sud)
+        self.assertEqual(notification.creator, 'C1636064176x000015')
+
+    def test_decoded_once(self):
+        """body: The raw body is decoded once and reused."""
+        print(self.shortDescription())
+
+        notification = Notification(json.dumps(BODY).encode('utf-8'))
+
+        self.assertIs(notification.body, notification.body)
+        self.assertEqual(notification.body, BODY)
+
+        # A body decoded elsewhere is used as is.
+        self.assertIs(Notification(b'', BODY).body, BODY)
+
+    def test_typed_resource(self):
+        """resource: The representation is a typed resource that does not alter the body."""
+        print(self.shortDescription())
+
+        notification = Notification(b'', json.loads(json.dumps(BODY)))
+        resource = notification.resource
+
+        self.assertIsInstance(resource, ContentInstance)
+        self.assertEqual(resource.ri, 'cin64bb897a0006ee')
+        self.assertIs(notification.resource, resource)
+        self.assertEqual(notification.body, BODY)
+
+        other = Notification(b'', {'m2m:sgn': {'sur': SUR, 'nev': {'rep': {'lco:lcoi': {'ri': 'lcoi1'}}}}})
+        self.assertIsInstance(other.resource, OneM2MResource)
+        self.assertEqual(other.resource.short_name, 'lco:lcoi')
+
+    def test_content(self):
+        """content: JSON encoded content is decoded, other content is returned as is."""
+        print(self.shortDescription())
+
+        self.assertEqual(Notification(b'', BODY).content, {'ts': 1636064176, 'te': 1636064236})
+
+        plain = {'m2m:sgn': {'sur': SUR, 'nev': {'rep': {'m2m:cin': {'con': 'on'}}}}}
+        self.assertEqual(Notification(b'', plain).content, 'on')
+
+    def test_verification_request(self):
+        """vrq: Verification requests have no representation."""
+        print(self.shortDescription())
+
+        notification = Notification(b'{"m2m:sgn": {"vrq": true, "sur": "/PN_CSE/sub1", "cr": "C1"}}')
+
+        self.assertTrue(notification.vrq)
+        self.assertIsNone(notification.rep)
+        self.assertIsNone(notification.resource)
+        self.assertIsNone(notification.content)
+        self.assertEqual(notification.creator, 'C1')
+
+    def test_scan_sur(self):
+        """scan_sur(): Finds the sur in the undecoded body."""
+        print(self.shortDescription())
+
+        self.assertEqual(Notification.scan_sur(json.dumps(BODY).encode('utf-8')), SUR)
+        self.assertEqual(Notification.scan_sur(b'{"m2m:sgn": {"sur" :\n "/PN_CSE/sub1"}}'), '/PN_CSE/sub1')
+
+        # "sur" inside a string value is escaped and ignored.
+        body = {'m2m:sgn': {'nev': {'rep': {'m2m:cin': {'con': json.dumps({'sur': 1})}}}, 'sur': SUR}}
+        self.assertEqual(Notification.scan_sur(json.dumps(body).encode('utf-8')), SUR)
+
+        # The sur of the notification, rather than one in the representation, followed by scalar members or first.
+        body = {'m2m:sgn': {'nev': {'rep': {'m2m:cnt': {'sur': 'a'}}}, 'sur': SUR, 'vrq': False, 'cr': 'C1', 'net': 3}}
+        self.assertEqual(Notification.scan_sur(json.dumps(body).encode('utf-8')), SUR)
+        body = {'m2m:sgn': {'sur': SUR, 'nev': {'rep': {'m2m:cnt': {'sur': 'a'}}}}}
+        self.assertEqual(Notification.scan_sur(json.dumps(body).encode('utf-8')), SUR)
+
+    def test_scan_sur_ambiguous(self):
+        """scan_sur(): Returns None when the body has to be decoded to find the sur."""
+        print(self.shortDescription())
+
+        # A sur only in the representation, escapes in the value, "sur" as a value, no sur at all, a body that
+        # is not a notification and a sur in the middle of the notification.
+        self.assertIsNone(Notification.scan_sur(b'{"m2m:sgn": {"nev": {"rep": {"m2m:cnt": {"sur": "a"}}}}}'))
+        self.assertIsNone(Notification.scan_sur(b'{"m2m:sgn": {"sur": "\\u002fPN_CSE"}}'))
+        self.assertIsNone(Notification.scan_sur(b'{"m2m:sgn": {"lbl": ["sur"]}}'))
+        self.assertIsNone(Notification.scan_sur(b'{"m2m:sgn": {}}'))
+        self.assertIsNone(Notification.scan_sur(b'{"m2m:rsp": {"sur": "a"}}'))
+        self.assertIsNone(Notification.scan_sur(b'{"m2m:sgn": {"nev": {"net": 1}, "sur": "a", "nfu": {"x": 1}}}'))
+
+        # Only the start and end of the body are scanned.
+        body = {'m2m:sgn': {'nev': {'rep': {'m2m:cin': {'con': 'x' * 4096}}}, 'sur': SUR, 'cr': 'C' * 1024}}
+        self.assertIsNone(Notification.scan_sur(json.dumps(body).encode('utf-8')))
+
+        notification = Notification(b'{"m2m:sgn": {"sur": "\\u002fPN_CSE"}}', sur=None)
+        self.assertEqual(notification.sur, '/PN_CSE')
+
+    def test_split_aggregated(self):
+        """split(): Splits an aggregated notification into its notifications with one decode."""
+        print(self.shortDescription())
+
+        sgns = [{'sur': SUR, 'nev': {'rep': {'m2m:cin': {'con': i}}, 'net': 3}} for i in range(3)]
+        raw = json.dumps({'m2m:agn': {'m2m:sgn': sgns}}).encode('utf-8')
+
+        self.assertTrue(Notification.is_aggregated(raw))
+        notifications = Notification.split(raw)
+
+        self.assertEqual([n.content for n in notifications], [0, 1, 2])
+        self.assertEqual({n.sur for n in notifications}, {SUR})
+        # Each notification can still be passed on as a body of its own.
+        self.assertEqual(json.loads(notifications[1].raw), {'m2m:sgn': sgns[1]})
+
+    def test_split_single(self):
+        """split(): A notification that is not aggregated is returned as is."""
+        print(self.shortDescription())
+
+        raw = json.dumps(BODY).encode('utf-8')
+
+        self.assertFalse(Notification.is_aggregated(raw))
+        notifications = Notification.split(raw)
+
+        self.assertEqual(len(notifications), 1)
+        self.assertIs(notifications[0].raw, raw)
+        self.assertEqual(notifications[0].sur, SUR)
+
+    def _resource_id_only(self, cse) -> Notification:
+        body = {'m2m:sgn': {'nev': {'rep': 'cin64bb897a0006ee', 'net': 3}, 'sur': SUR}}
+        return Notification(json.dumps(body).encode('utf-8'), cse=cse)
+
+    def test_fetch_resource_id_only(self):
+        """resource: With nct 3 the resource is retrieved once, when it is first read."""
+        print(self.shortDescription())
+
+        cse = mock.Mock()
+        cse.retrieve_address.return_value = mock.Mock(pc=BODY['m2m:sgn']['nev']['rep'])
+
+        notification = self._resource_id_only(cse)
+        self.assertEqual(notification.sur, SUR)
+        cse.retrieve_address.assert_not_called()
+
+        self.assertIsInstance(notification.resource, ContentInstance)
+        self.assertEqual(notification.content, {'ts': 1636064176, 'te': 1636064236})
+        cse.retrieve_address.assert_called_once_with('cin64bb897a0006ee')
+
+    def test_fetch_missing_attributes(self):
+        """get(): With nct 2 only attributes missing from the representation are retrieved."""
+        print(self.shortDescription())
+
+        full = {'m2m:cnt': {'ri': 'cnt123', 'rn': 'reads', 'mni': 10, 'lbl': ['meter']}}
+        cse = mock.Mock()
+        cse.retrieve_address.return_value = mock.Mock(pc=full)
+
+        sur = '/PN_CSE/C5def67ad000190/reads/sub-00001'
+        body = {'m2m:sgn': {'nev': {'rep': {'m2m:cnt': {'mni': 10}}, 'net': 1}, 'sur': sur}}
+        notification = Notification(json.dumps(body).encode('utf-8'), cse=cse)
+
+        self.assertEqual(notification.get('mni'), 10)
+        cse.retrieve_address.assert_not_called()
+
+        # The subscribed-to resource is the parent of the subscription.
+        self.assertEqual(notification.get('lbl'), ['meter'])
+        self.assertIsNone(notification.get('con'))
+        cse.retrieve_address.assert_called_once_with('/PN_CSE/C5def67ad000190/reads')
+
+    def test_fetch_on_event_loop(self):
+        """fetch_async(): On an event loop the resource is only read once it has been fetched off the loop."""
+        print(self.shortDescription())
+
+        cse = mock.Mock()
+        cse.retrieve_address.return_value = mock.Mock(pc=BODY['m2m:sgn']['nev']['rep'])
+        notification = self._resource_id_only(cse)
+
+        async def read():
+            self.assertTrue(notification.fetch_needed)
+            with self.assertRaises(RuntimeError):
+                notification.resource
+            with self.assertRaises(RuntimeError):
+                notification.content
+            with self.assertRaises(RuntimeError):
+                notification.get('rn')
+            cse.retrieve_address.assert_not_called()
+
+            await notification.fetch_async()
+            self.assertFalse(notification.fetch_needed)
+            self.assertIsInstance(notification.resource, ContentInstance)
+            self.assertEqual(notification.content, {'ts': 1636064176, 'te': 1636064236})
+            self.assertEqual(notification.get('rn'), 'cin-00001')
+
+        asyncio.run(read())
+        cse.retrieve_address.assert_called_once_with('cin64bb897a0006ee')
+
+    def test_fetch_modified_attributes(self):
+        """get(): With nct 2, reading a missing attribute on an event loop raises until the resource is fetched."""
+        print(self.shortDescription())
+
+        cse = mock.Mock()
+        cse.retrieve_address.return_value = mock.Mock(pc=BODY['m2m:sgn']['nev']['rep'])
+        body = {'m2m:sgn': {'nev': {'rep': {'m2m:cin': {'ri': 'cin64bb897a0006ee', 'lt': '20211104T222256'}}, 'net': 1}, 'sur': SUR}}
+        notification = Notification(json.dumps(body).encode('utf-8'), cse=cse)
+
+        async def read():
+            self.assertFalse(notification.fetch_needed)
+            self.assertEqual(notification.get('lt'), '20211104T222256')
+            with self.assertRaises(RuntimeError):
+                notification.get('con')
+            cse.retrieve_address.assert_not_called()
+
+            await notification.fetch_async()
+            self.assertEqual(notification.get('rn'), 'cin-00001')
+            self.assertEqual(notification.content, {'ts': 1636064176, 'te': 1636064236})
+
+        asyncio.run(read())
+        cse.retrieve_address.assert_called_once_with('cin64bb897a0006ee')
+
+    def test_fetch_without_cse(self):
+        """fetch(): Without a CSE missing attributes are None."""
+        print(self.shortDescription())
+
+        notification = self._resource_id_only(None)
+
+        self.assertEqual(notification.address, 'cin64bb897a0006ee')
+        self.assertIsNone(notification.fetch())
+        self.assertIsNone(notification.resource)
+        self.assertIsNone(notification.content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import copy, json, pickle, unittest
+
+from client.onem2m.OneM2MResource import OneM2MResource
+from client.onem2m.resource.ContentInstance import ContentInstance
+
+
+class OneM2MResourceTests(unittest.TestCase):
+    def test_encode_wraps_content_in_short_name(self):
+        """encode(): Serializes the resource wrapped in its short name.
+        """
+        print(self.shortDescription())
+
+        cin = ContentInstance({'rn': 'reportInterval', 'con': {'recper': 1}})
+
+        self.assertEqual({'m2m:cin': {'rn': 'reportInterval', 'con': {'recper': 1}}}, json.loads(cin.encode()))
+
+    def test_encode_reuses_cached_body(self):
+        """encode(): Returns the cached body while the resource is unchanged.
+        """
+        print(self.shortDescription())
+
+        cin = ContentInstance({'con': [282763500453888] * 42})
+
+        self.assertIs(cin.encode(), cin.encode())
+
+    def test_attribute_mutation_invalidates_cache(self):
+        """encode(): Setting or deleting an attribute discards the cached body.
+        """
+        print(self.shortDescription())
+
+        cin = ContentInstance({'rn': 'cin-1', 'con': 'a'})
+        first = cin.encode()
+
+        cin.con = 'b'
+        self.assertEqual('b', json.loads(cin.encode())['m2m:cin']['con'])
+
+        del cin.rn
+        self.assertNotIn('rn', json.loads(cin.encode())['m2m:cin'])
+        self.assertNotEqual(first, cin.encode())
+
+    def test_invalidate_after_nested_mutation(self):
+        """invalidate(): Discards the cached body after an untracked nested change.
+        """
+        print(self.shortDescription())
+
+        cin = ContentInstance({'con': {'recper': 1}})
+        cin.encode()
+
+        cin.con['recper'] = 5
+        cin.invalidate()
+
+        self.assertEqual(5, json.loads(cin.encode())['m2m:cin']['con']['recper'])
+
+    def test_copies_do_not_share_the_cache(self):
+        """copy.copy(), pickle: A copy and its original encode their own attributes.
+        """
+        print(self.shortDescription())
+
+        for duplicate in (copy.copy, copy.deepcopy, lambda cin: pickle.loads(pickle.dumps(cin))):
+            cin = ContentInstance({'rn': 'cin-1', 'con': 'a'})
+            cin.encode()
+
+            clone = duplicate(cin)
+            clone.con = 'b'
+
+            self.assertEqual('b', json.loads(clone.encode())['m2m:cin']['con'])
+            self.assertEqual('a', json.loads(cin.encode())['m2m:cin']['con'])
+
+            cin.con = 'c'
+            self.assertEqual('c', json.loads(cin.encode())['m2m:cin']['con'])
+            self.assertEqual('b', json.loads(clone.encode())['m2m:cin']['con'])
+            self.assertEqual({'rn': 'cin-1', 'con': 'b'}, clone.get_content())
@@ -0,0 +1,91 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest
+
+from client.onem2m.ResourceAddressIndex import ResourceAddressIndex
+
+
+class ResourceAddressIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = ResourceAddressIndex()
+
+        # AE registration, container creation and a content instance retrieved by path.
+        self.index.learn_response(
+            {'m2m:ae': {'ri': 'C5def67ad000190', 'rn': 'meterread', 'pi': 'PN_CSE'}},
+            parent='http://localhost:21300/PN_CSE'
+        )
+        self.index.learn_response(
+            {'m2m:cnt': {'ri': 'cnt1636064176x000016', 'rn': 'cnt-00001', 'pi': 'C5def67ad000190'}},
+            parent='/PN_CSE/meterread'
+        )
+
+    def test_normalize(self):
+        """normalize(address): Strips scheme, host, query string and trailing '/'.
+        """
+        print(self.shortDescription())
+
+        self.assertEqual('/PN_CSE/meterread', ResourceAddressIndex.normalize('http://localhost:21300/PN_CSE/meterread/?fu=1'))
+        self.assertEqual('/~/355808100064390/metersvc/reads', ResourceAddressIndex.normalize('~/355808100064390/metersvc/reads'))
+        self.assertEqual('cin64bb897a0006ee', ResourceAddressIndex.normalize('cin64bb897a0006ee'))
+
+    def test_resolves_every_address_form(self):
+        """path(address): Resolves unstructured, SP-relative and structured forms to the same path.
+        """
+        print(self.shortDescription())
+
+        for address in ('cnt1636064176x000016', '/cnt1636064176x000016', '/PN_CSE/cnt1636064176x000016',
+                        '/PN_CSE/meterread/cnt-00001', 'https://cse:443/PN_CSE/meterread/cnt-00001'):
+            self.assertEqual('/PN_CSE/meterread/cnt-00001', self.index.path(address), address)
+            self.assertEqual('cnt1636064176x000016', self.index.ri(address), address)
+
+        self.assertIsNone(self.index.path('/PN_CSE/unknown/cnt-00001'))
+        self.assertEqual('/PN_CSE/unknown/cnt-00001', self.index.resolve('/PN_CSE/unknown/cnt-00001'))
+
+    def test_learns_child_from_parent_id(self):
+        """learn(resource): Derives the path of a resource addressed by ri from its known parent.
+        """
+        print(self.shortDescription())
+
+        self.index.learn_response(
+            {'m2m:cin': {'ri': 'cin64bb897a0006ee', 'rn': 'cin-1', 'pi': 'cnt1636064176x000016'}},
+            path='/PN_CSE/cin64bb897a0006ee'
+        )
+
+        self.assertEqual('/PN_CSE/meterread/cnt-00001/cin-1', self.index.path('cin64bb897a0006ee'))
+
+    def test_shortest(self):
+        """shortest(address): Prefers the ri when it is known.
+        """
+        print(self.shortDescription())
+
+        self.assertEqual('cnt1636064176x000016', self.index.shortest('/PN_CSE/meterread/cnt-00001'))
+        self.assertEqual('/PN_CSE/other', self.index.shortest('/PN_CSE/other'))
+
+    def test_remove_forgets_children(self):
+        """remove(address): Forgets the resource and its children.
+        """
+        print(self.shortDescription())
+
+        self.index.remove('/PN_CSE/C5def67ad000190')
+
+        self.assertEqual(0, len(self.index))
+        self.assertIsNone(self.index.ri('/PN_CSE/meterread/cnt-00001'))
+
+    def test_evicts_least_recently_used(self):
+        """add(ri, path): Evicts the least recently added or looked up resource above max_entries.
+        """
+        print(self.shortDescription())
+
+        index = ResourceAddressIndex(max_entries=2)
+        index.add('cnt1', '/PN_CSE/meterread/cnt-1')
+        index.add('cnt2', '/PN_CSE/meterread/cnt-2')
+        index.path('cnt1')
+        index.add('cnt3', '/PN_CSE/meterread/cnt-3')
+
+        self.assertEqual(2, len(index))
+        self.assertEqual(1, index.evicted)
+        self.assertEqual('/PN_CSE/meterread/cnt-1', index.path('cnt1'))
+        self.assertIsNone(index.path('cnt2'))
+        self.assertIsNone(index.ri('/PN_CSE/meterread/cnt-2'))
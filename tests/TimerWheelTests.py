@@ -0,0 +1,66 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest
+
+from client.ae.TimerWheel import TimerWheel
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TimerWheelTests(unittest.TestCase):
+    def test_expiry(self):
+        """advance(): Returns the items whose deadline has passed, rounded up to the tick."""
+        print(self.shortDescription())
+
+        clock = Clock()
+        wheel = TimerWheel(tick=0.1, slots=16, clock=clock)
+        wheel.schedule(0.25, 'a')
+        wheel.schedule(0.5, 'b')
+
+        clock.now += 0.2
+        self.assertEqual(wheel.advance(), [])
+        clock.now += 0.1
+        self.assertEqual(wheel.advance(), ['a'])
+        clock.now += 0.3
+        self.assertEqual(wheel.advance(), ['b'])
+        self.assertEqual(len(wheel), 0)
+
+    def test_rotations(self):
+        """advance(): Items due more than one rotation ahead wait for their own rotation."""
+        print(self.shortDescription())
+
+        clock = Clock()
+        wheel = TimerWheel(tick=1, slots=4, clock=clock)
+        wheel.schedule(2, 'near')
+        wheel.schedule(6, 'far')
+
+        expired = []
+        for _ in range(7):
+            clock.now += 1
+            expired.append(wheel.advance())
+
+        self.assertEqual(expired, [[], ['near'], [], [], [], ['far'], []])
+
+    def test_long_pause(self):
+        """advance(): Every item due is returned after a pause longer than a rotation."""
+        print(self.shortDescription())
+
+        clock = Clock()
+        wheel = TimerWheel(tick=1, slots=4, clock=clock)
+        for i in range(10):
+            wheel.schedule(i + 1, i)
+
+        clock.now += 100
+        self.assertEqual(sorted(wheel.advance()), list(range(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
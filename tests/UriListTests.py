@@ -0,0 +1,62 @@
+# Copyright (c) Aetheros, Inc.  See COPYRIGHT
+
+#!/usr/bin/env python
+
+import unittest, json
+
+from client.onem2m.UriList import UriList
+
+
+class UriListTests(unittest.TestCase):
+    URIS = ['/PN_CSE/nod-0153220099{:05d}/metersvc/reads'.format(i) for i in range(100)] + [
+        '/PN_CSE/C5def67ad000190',
+        '/PN_CSE/C5def67ad000190/cnt-00001',
+        '',
+        '/PN_CSE/nod-é',
+    ]
+
+    def test_behaves_like_original_list(self):
+        """UriList(uris): Preserves length, order, indexing and slicing of the original list.
+        """
+        print(self.shortDescription())
+
+        uril = UriList(self.URIS)
+
+        self.assertEqual(len(self.URIS), len(uril))
+        self.assertEqual(self.URIS, list(uril))
+        self.assertEqual(self.URIS, uril)
+        for i in range(-len(self.URIS), len(self.URIS)):
+            self.assertEqual(self.URIS[i], uril[i])
+        self.assertEqual(self.URIS[3:40:7], uril[3:40:7])
+        self.assertIn('/PN_CSE/C5def67ad000190/cnt-00001', uril)
+        self.assertEqual(self.URIS.index('/PN_CSE/C5def67ad000190'), uril.index('/PN_CSE/C5def67ad000190'))
+
+        with self.assertRaises(IndexError):
+            uril[len(self.URIS)]
+
+    def test_smaller_than_source(self):
+        """UriList(uris): Stores URIs with shared prefixes in fewer bytes than their text.
+        """
+        print(self.shortDescription())
+
+        uril = UriList(self.URIS[:100])
+
+        self.assertLess(uril.nbytes, sum(len(uri) for uri in self.URIS[:100]) * 0.6)
+
+    def test_rn_is_interned(self):
+        """rn(index): Returns the interned final path segment.
+        """
+        print(self.shortDescription())
+
+        first = UriList(['/PN_CSE/nod-015322009906000'])
+        second = UriList(['/PN_CSE/x', '/PN_CSE/nod-015322009906000'])
+
+        self.assertEqual('nod-015322009906000', first.rn(0))
+        self.assertIs(first.rn(0), second.rn(1))
+
+    def test_json_dump(self):
+        """UriList: Serializes as a list using json.dumps(default=list).
+        """
+        print(self.shortDescription())
+
+        self.assertEqual(self.URIS, json.loads(json.dumps({'m2m:uril': UriList(self.URIS)}, default=list))['m2m:uril'])